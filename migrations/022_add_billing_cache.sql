@@ -0,0 +1,14 @@
+-- Migration: Add billing_cache table for precomputed admin billing totals
+-- Run: mysql -u root -p shophosting_db < migrations/022_add_billing_cache.sql
+
+USE shophosting_db;
+
+-- Single-row-per-metric cache of billing aggregates (MRR, active subscription
+-- count, month-to-date revenue). Refreshed by get_billing_stats() when rows are
+-- older than BILLING_CACHE_MAX_AGE so dashboard loads don't re-run the
+-- subscriptions/pricing_plans join on every request.
+CREATE TABLE IF NOT EXISTS billing_cache (
+    metric VARCHAR(64) NOT NULL PRIMARY KEY,
+    value DECIMAL(12,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
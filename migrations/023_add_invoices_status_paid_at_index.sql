@@ -0,0 +1,15 @@
+-- Migration: Add composite (status, paid_at) index on invoices
+-- Run: mysql -u root -p shophosting_db < migrations/023_add_invoices_status_paid_at_index.sql
+-- Lets month-to-date revenue queries (status = 'paid' AND paid_at in range)
+-- use an index range scan instead of scanning every paid invoice.
+
+USE shophosting_db;
+
+SET @idx_exists = (SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'invoices' AND INDEX_NAME = 'idx_status_paid_at');
+SET @sql = IF(@idx_exists = 0,
+    'ALTER TABLE invoices ADD INDEX idx_status_paid_at (status, paid_at)',
+    'SELECT ''Index idx_status_paid_at already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
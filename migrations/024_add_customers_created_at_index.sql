@@ -0,0 +1,15 @@
+-- Migration: Add (created_at, id) index on customers for keyset pagination
+-- Run: mysql -u root -p shophosting_db < migrations/024_add_customers_created_at_index.sql
+-- The manage-customers listing pages with WHERE (created_at, id) < (last seen)
+-- ORDER BY created_at DESC, id DESC, which this index serves directly.
+
+USE shophosting_db;
+
+SET @idx_exists = (SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'customers' AND INDEX_NAME = 'idx_created_at_id');
+SET @sql = IF(@idx_exists = 0,
+    'ALTER TABLE customers ADD INDEX idx_created_at_id (created_at, id)',
+    'SELECT ''Index idx_created_at_id already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,10 @@
+-- Migration: Add 'deleting' customer status
+-- Run: mysql -u root -p shophosting_db < migrations/025_add_customer_deleting_status.sql
+-- Admin deletions now mark the customer 'deleting' and hand container/file
+-- cleanup to the provisioning worker, which removes the row when done.
+
+USE shophosting_db;
+
+-- Note: MySQL ENUM modification requires redefining all values
+ALTER TABLE customers
+    MODIFY COLUMN status ENUM('pending', 'provisioning', 'active', 'suspended', 'failed', 'deleting') DEFAULT 'pending';
@@ -0,0 +1,22 @@
+-- Migration: Ensure provisioning_jobs.customer_id cascades on customer delete
+-- Run: mysql -u root -p shophosting_db < migrations/026_add_provisioning_jobs_customer_fk.sql
+-- schema.sql declares this foreign key, but databases created before it was
+-- added may lack it. With every child table cascading, customer deletion is a
+-- single DELETE FROM customers.
+
+USE shophosting_db;
+
+-- Drop orphaned jobs first so the constraint can be added
+DELETE pj FROM provisioning_jobs pj
+    LEFT JOIN customers c ON c.id = pj.customer_id
+    WHERE c.id IS NULL;
+
+SET @fk_exists = (SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'provisioning_jobs'
+    AND COLUMN_NAME = 'customer_id' AND REFERENCED_TABLE_NAME = 'customers');
+SET @sql = IF(@fk_exists = 0,
+    'ALTER TABLE provisioning_jobs ADD CONSTRAINT fk_pj_cust FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE CASCADE',
+    'SELECT ''provisioning_jobs.customer_id foreign key already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
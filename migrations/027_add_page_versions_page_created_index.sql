@@ -0,0 +1,16 @@
+-- Migration: Add (page_id, created_at) index on page_versions for page history
+-- Run: mysql -u root -p shophosting_db < migrations/027_add_page_versions_page_created_index.sql
+-- page_history lists a page's versions with WHERE page_id = ? ORDER BY
+-- created_at DESC, which this index serves without a filesort.
+-- page_content.page_slug is already UNIQUE (migration 006).
+
+USE shophosting_db;
+
+SET @idx_exists = (SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'page_versions' AND INDEX_NAME = 'idx_page_versions_page_created');
+SET @sql = IF(@idx_exists = 0,
+    'ALTER TABLE page_versions ADD INDEX idx_page_versions_page_created (page_id, created_at)',
+    'SELECT ''Index idx_page_versions_page_created already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,16 @@
+-- Migration: Store the editor markdown alongside CMS page content
+-- Run: mysql -u root -p shophosting_db < migrations/028_add_page_content_editor_markdown.sql
+-- page_edit saves the submitted editor text here so opening the editor is a
+-- direct read. Existing rows stay NULL and are serialized from content on
+-- open until their next save; rollbacks reset it to NULL.
+
+USE shophosting_db;
+
+SET @col_exists = (SELECT COUNT(*) FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'page_content' AND COLUMN_NAME = 'editor_markdown');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE page_content ADD COLUMN editor_markdown LONGTEXT NULL COMMENT ''Editor text for content; NULL means serialize content''',
+    'SELECT ''Column editor_markdown already exists''');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -12,6 +12,7 @@ from datetime import datetime
 sys.path.insert(0, '/opt/shophosting/webapp')
 from models import Customer, CustomerBackupJob
 from dotenv import load_dotenv
+from rq import get_current_job
 
 # Load environment variables
 env_path = Path(__file__).parent.parent / '.env'
@@ -36,6 +37,15 @@ def _configure_file_logging():
     logger.addHandler(file_handler)
 
 
+# Redis key for the web app's cached restic snapshot list, per customer
+BACKUP_SNAPSHOTS_CACHE_KEY = 'backup:snaps:{}'
+
+# Long-lived worker processes serving the backups queue. Each one imports this
+# module once and forks per job, so concurrent customers don't wait on each
+# other's 10 minute backups.
+BACKUP_WORKERS = max(int(os.getenv('BACKUP_WORKERS', '1')), 1)
+
+
 class BackupError(Exception):
     """Custom exception for backup operations"""
     pass
@@ -93,6 +103,7 @@ class BackupWorker:
 
             job.snapshot_id = snapshot_id
             job.update_status('completed')
+            self._invalidate_snapshot_cache(customer.id)
 
             logger.info(f"Backup job {job_id} completed successfully. Snapshot: {snapshot_id}")
             return snapshot_id
@@ -157,6 +168,16 @@ class BackupWorker:
             job.update_status('failed', str(e))
             raise
 
+    def _invalidate_snapshot_cache(self, customer_id):
+        """Make /api/backup/status list the new snapshot right away"""
+        job = get_current_job()
+        if job is None:
+            return
+        try:
+            job.connection.delete(BACKUP_SNAPSHOTS_CACHE_KEY.format(customer_id))
+        except Exception as e:
+            logger.warning(f"Could not clear snapshot cache for customer {customer_id}: {e}")
+
     def _determine_backup_source(self, snapshot_id, customer_id):
         """Determine if snapshot is from manual or daily backups"""
         # Try manual repository first
@@ -165,7 +186,7 @@ class BackupWorker:
                 ['sudo', 'bash', '-c',
                  f'export RESTIC_REPOSITORY="sftp:sh-backup@15.204.249.219:/home/sh-backup/manual-backups" && '
                  f'export RESTIC_PASSWORD_FILE="/opt/shophosting/.manual-restic-password" && '
-                 f'restic snapshots --json {snapshot_id}'],
+                 f'restic snapshots --json --no-lock {snapshot_id}'],
                 capture_output=True,
                 text=True,
                 timeout=30
@@ -199,6 +220,7 @@ if __name__ == '__main__':
     # Run as RQ worker
     from redis import Redis
     from rq import Worker, Queue
+    from rq.worker_pool import WorkerPool
 
     # Enable file logging when running as worker
     _configure_file_logging()
@@ -208,6 +230,10 @@ if __name__ == '__main__':
 
     queues = [Queue('backups', connection=redis_conn)]
 
-    logger.info("Starting backup worker...")
-    worker = Worker(queues, connection=redis_conn)
-    worker.work()
+    if BACKUP_WORKERS > 1:
+        logger.info(f"Starting backup worker pool ({BACKUP_WORKERS} workers)...")
+        WorkerPool(queues, connection=redis_conn, num_workers=BACKUP_WORKERS).start()
+    else:
+        logger.info("Starting backup worker...")
+        worker = Worker(queues, connection=redis_conn)
+        worker.work()
@@ -9,7 +9,7 @@ import os
 import sys
 import redis
 from rq import Queue
-from provisioning_worker import provision_customer_job
+from provisioning_worker import provision_customer_job, deprovision_customer_job
 import logging
 
 # Add webapp to path for model imports
@@ -26,10 +26,21 @@ class ProvisioningError(Exception):
 class ProvisioningQueue:
     """Handles enqueueing provisioning jobs with multi-server support"""
 
-    def __init__(self, redis_host='localhost', redis_port=6379):
-        self.redis_conn = redis.Redis(host=redis_host, port=redis_port, db=0)
+    def __init__(self, redis_host='localhost', redis_port=6379, connection_pool=None):
+        """
+        Args:
+            redis_host: Redis host (ignored if connection_pool is given)
+            redis_port: Redis port (ignored if connection_pool is given)
+            connection_pool: Optional shared redis.ConnectionPool, so long-lived
+                callers can reuse one pool instead of opening new sockets
+        """
+        if connection_pool is not None:
+            self.redis_conn = redis.Redis(connection_pool=connection_pool)
+        else:
+            self.redis_conn = redis.Redis(host=redis_host, port=redis_port, db=0)
         # Default queue for backward compatibility (single-server mode)
         self.default_queue = Queue('provisioning', connection=self.redis_conn)
+        self._server_queues = {}
 
     def get_queue_for_server(self, server):
         """
@@ -42,7 +53,11 @@ class ProvisioningQueue:
             Queue: RQ Queue for this server
         """
         queue_name = server.get_queue_name()
-        return Queue(queue_name, connection=self.redis_conn)
+        queue = self._server_queues.get(queue_name)
+        if queue is None:
+            queue = Queue(queue_name, connection=self.redis_conn)
+            self._server_queues[queue_name] = queue
+        return queue
 
     def enqueue_customer(self, customer_data, server=None):
         """
@@ -118,6 +133,42 @@ class ProvisioningQueue:
             logger.error(f"Failed to enqueue provisioning job: {e}")
             raise
 
+    def enqueue_deletion(self, customer_id, server=None):
+        """
+        Enqueue deletion of a customer's containers, files and records.
+
+        Args:
+            customer_id: ID of the customer to delete
+            server: Server the customer is hosted on. If not provided, the job
+                goes to the default 'provisioning' queue (single-server mode).
+
+        Returns:
+            job: RQ Job object
+        """
+        try:
+            if server is not None:
+                queue = self.get_queue_for_server(server)
+                server_id = server.id
+            else:
+                queue = self.default_queue
+                server_id = None
+
+            job = queue.enqueue(
+                deprovision_customer_job,
+                customer_id,
+                server_id,
+                job_timeout='5m',
+                failure_ttl='7d'
+            )
+
+            logger.info(f"Enqueued deletion job {job.id} for customer {customer_id} (queue: {queue.name})")
+
+            return job
+
+        except Exception as e:
+            logger.error(f"Failed to enqueue deletion job: {e}")
+            raise
+
     def _select_server(self):
         """
         Select the best server for provisioning.
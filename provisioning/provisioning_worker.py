@@ -7,6 +7,8 @@ import subprocess
 import secrets
 import string
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 sys.path.insert(0, '/opt/shophosting/webapp')
@@ -15,6 +17,7 @@ from jinja2 import Template
 import redis
 from rq import Worker, Queue
 import mysql.connector
+from mysql.connector import pooling
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -39,6 +42,44 @@ class ProvisioningError(Exception):
     pass
 
 
+def get_worker_db_config():
+    """Database connection settings from environment variables"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER', 'shophosting_app'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'database': os.getenv('DB_NAME', 'shophosting_db')
+    }
+
+
+# Provisioning logs one row per log line, so connections come from a small
+# pool instead of a fresh connect each time. RQ forks a work horse per job:
+# the pool is built lazily in the process using it and never crosses a fork.
+WORKER_DB_POOL_SIZE = int(os.getenv('WORKER_DB_POOL_SIZE', '3'))
+
+_db_pool = None
+_db_pool_pid = None
+_db_pool_lock = threading.Lock()
+
+
+def get_worker_db_connection():
+    """Get a pooled database connection, connecting directly if the pool is busy"""
+    global _db_pool, _db_pool_pid
+    if _db_pool_pid != os.getpid():
+        with _db_pool_lock:
+            if _db_pool_pid != os.getpid():
+                _db_pool = pooling.MySQLConnectionPool(
+                    pool_name=f'provisioning_worker_{os.getpid()}',
+                    pool_size=WORKER_DB_POOL_SIZE,
+                    **get_worker_db_config()
+                )
+                _db_pool_pid = os.getpid()
+    try:
+        return _db_pool.get_connection()
+    except mysql.connector.PoolError:
+        return mysql.connector.connect(**get_worker_db_config())
+
+
 class ProvisioningLogHandler(logging.Handler):
     """Custom log handler that saves logs to database"""
 
@@ -89,17 +130,7 @@ class ProvisioningLogHandler(logging.Handler):
             return
 
         try:
-            import mysql.connector
-            from datetime import datetime
-
-            db_config = {
-                'host': os.getenv('DB_HOST', 'localhost'),
-                'user': os.getenv('DB_USER', 'shophosting_app'),
-                'password': os.getenv('DB_PASSWORD', ''),
-                'database': os.getenv('DB_NAME', 'shophosting_db')
-            }
-
-            conn = mysql.connector.connect(**db_config)
+            conn = get_worker_db_connection()
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -122,6 +153,46 @@ class ProvisioningLogHandler(logging.Handler):
             pass
 
 
+NGINX_RELOAD_MARKER = Path('/run/shophosting/nginx-reload-pending')
+
+
+def remove_nginx_site_config(customer_id):
+    """Remove a customer's sites-enabled and sites-available Nginx configs.
+
+    Unlinks directly when the worker user has group write access to the
+    Nginx site directories (nginx-admin group), and only falls back to
+    sudo rm for files it isn't allowed to remove. Missing files are ignored.
+    """
+    for directory in ('sites-enabled', 'sites-available'):
+        config = Path(f"/etc/nginx/{directory}/customer-{customer_id}.conf")
+        try:
+            config.unlink()
+        except FileNotFoundError:
+            pass
+        except PermissionError:
+            result = subprocess.run(['sudo', 'rm', '-f', str(config)], capture_output=True)
+            if result.returncode != 0:
+                logger.warning(f"Failed to remove {config}: {result.stderr.decode()}")
+
+
+def request_nginx_reload():
+    """Ask for a debounced Nginx reload.
+
+    Touches NGINX_RELOAD_MARKER, which shophosting-nginx-reload.path watches,
+    so many back-to-back requests produce one reload. Falls back to an
+    immediate reload when the runtime directory isn't set up.
+    """
+    try:
+        NGINX_RELOAD_MARKER.touch()
+        return
+    except OSError as e:
+        logger.debug(f"Nginx reload marker unavailable ({e}), reloading directly")
+
+    result = subprocess.run(['sudo', 'systemctl', 'reload', 'nginx'], capture_output=True)
+    if result.returncode != 0:
+        logger.warning(f"Nginx reload failed: {result.stderr.decode()}")
+
+
 class ProvisioningWorker:
     """Handles provisioning of new customer containers with Nginx reverse proxy"""
 
@@ -138,12 +209,7 @@ class ProvisioningWorker:
             self.server_id = int(self.server_id)
 
         # Database configuration from environment variables
-        self.db_config = {
-            'host': os.getenv('DB_HOST', 'localhost'),
-            'user': os.getenv('DB_USER', 'shophosting_app'),
-            'password': os.getenv('DB_PASSWORD', ''),
-            'database': os.getenv('DB_NAME', 'shophosting_db')
-        }
+        self.db_config = get_worker_db_config()
 
         # Validate database password is set
         if not self.db_config['password']:
@@ -178,7 +244,7 @@ class ProvisioningWorker:
     def get_db_connection(self):
         """Get database connection"""
         try:
-            return mysql.connector.connect(**self.db_config)
+            return get_worker_db_connection()
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise ProvisioningError(f"Database connection failed: {e}")
@@ -1026,14 +1092,8 @@ bin/magento setup:install \\
                 if result.returncode != 0:
                     logger.warning(f"Rollback rm failed: {result.stderr.decode()}")
             
-            # Remove Nginx config (using sudo)
-            nginx_available = Path(f"/etc/nginx/sites-available/customer-{customer_id}.conf")
-            nginx_enabled = Path(f"/etc/nginx/sites-enabled/customer-{customer_id}.conf")
-
-            if nginx_enabled.exists():
-                subprocess.run(['sudo', 'rm', '-f', str(nginx_enabled)], capture_output=True)
-            if nginx_available.exists():
-                subprocess.run(['sudo', 'rm', '-f', str(nginx_available)], capture_output=True)
+            # Remove Nginx config
+            remove_nginx_site_config(customer_id)
 
             # Reload nginx
             try:
@@ -1046,6 +1106,79 @@ bin/magento setup:install \\
         except Exception as e:
             logger.error(f"Rollback failed: {e}")
     
+    def remove_customer_files(self, customer_id, customer_path):
+        """Stop containers and delete a customer's directory"""
+        if not customer_path.exists():
+            return False
+
+        result = subprocess.run(
+            ['docker', 'compose', 'down', '-v', '--remove-orphans'],
+            cwd=str(customer_path),
+            capture_output=True,
+            timeout=120
+        )
+        if result.returncode != 0:
+            logger.warning(f"Docker compose down failed: {result.stderr.decode()}")
+
+        # Root-owned Docker files are removed by the privileged helper, which
+        # also retries briefly while volumes finish unmounting
+        result = subprocess.run(
+            ['sudo', '/opt/shophosting/scripts/delete-customer-dir.sh', str(customer_id)],
+            capture_output=True,
+            timeout=60
+        )
+        if result.returncode != 0:
+            raise ProvisioningError(f"Failed to delete customer directory: {result.stderr.decode()}")
+        return True
+
+    def remove_nginx_config(self, customer_id):
+        """Remove a customer's Nginx site config and reload Nginx"""
+        remove_nginx_site_config(customer_id)
+        request_nginx_reload()
+
+    def delete_customer_records(self, customer_id):
+        """Delete a customer and dependent rows.
+
+        Invoices, subscriptions, provisioning jobs and monitoring rows all
+        reference customers with ON DELETE CASCADE (see migration 026), so a
+        single DELETE removes them atomically.
+        """
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM customers WHERE id = %s", (customer_id,))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def deprovision_customer(self, customer_id):
+        """Delete a customer's containers, files, Nginx config and database records.
+
+        Container/directory teardown and Nginx cleanup don't depend on each
+        other, so they run concurrently; database rows are only removed once
+        both have succeeded. On failure the customer is marked 'failed' so an
+        admin can see the error and retry.
+        """
+        logger.info(f"Deprovisioning customer {customer_id}")
+        customer_path = self.base_path / f"customer-{customer_id}"
+
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                files_future = executor.submit(self.remove_customer_files, customer_id, customer_path)
+                nginx_future = executor.submit(self.remove_nginx_config, customer_id)
+                files_future.result()
+                nginx_future.result()
+
+            self.delete_customer_records(customer_id)
+        except Exception as e:
+            logger.error(f"Deprovisioning failed for customer {customer_id}: {e}")
+            self.update_customer_status(customer_id, 'failed', f"Deletion failed: {e}")
+            raise
+
+        logger.info(f"Customer {customer_id} deprovisioned")
+        return {'status': 'deleted', 'customer_id': customer_id}
+
     def provision_customer(self, job_data, rq_job_id=None):
         """Main provisioning function - orchestrates all steps"""
 
@@ -1218,6 +1351,12 @@ def provision_customer_job(job_data):
     return worker.provision_customer(job_data, rq_job_id=rq_job_id)
 
 
+def deprovision_customer_job(customer_id, server_id=None):
+    """Job function called by RQ worker to delete a customer"""
+    worker = ProvisioningWorker(server_id=server_id or os.getenv('SERVER_ID'))
+    return worker.deprovision_customer(customer_id)
+
+
 def start_heartbeat_thread(server_id, interval=30):
     """Start a background thread that sends periodic heartbeats"""
     import threading
@@ -0,0 +1,33 @@
+#!/bin/bash
+# Delete Customer Directory
+# Removes a customer's data directory as root. Docker leaves root-owned files
+# behind, so running the delete itself as root avoids a recursive chmod first.
+# Retries with backoff (~5s total) while Docker releases volume mounts.
+# Usage: delete-customer-dir.sh <customer_id>
+
+set -euo pipefail
+
+CUSTOMER_ID="${1:-}"
+
+if ! [[ "$CUSTOMER_ID" =~ ^[0-9]+$ ]]; then
+    echo "Usage: $0 <customer_id>"
+    exit 1
+fi
+
+CUSTOMER_PATH="/var/customers/customer-${CUSTOMER_ID}"
+
+if [ ! -e "$CUSTOMER_PATH" ]; then
+    exit 0
+fi
+
+# --one-file-system makes rm fail rather than descend into a volume that is
+# still mounted, so a failure here means "not released yet" and we retry.
+for delay in 0.25 0.5 1 1.25 2; do
+    if rm -rf --one-file-system "$CUSTOMER_PATH" 2>/dev/null; then
+        exit 0
+    fi
+    sleep "$delay"
+done
+
+# Final attempt, letting rm report the error
+rm -rf --one-file-system "$CUSTOMER_PATH"
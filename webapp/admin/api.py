@@ -17,6 +17,10 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import PortManager, Ticket, TicketCategory
 
+# Upper bound for client-supplied per_page, so a single request can't
+# materialize an entire table in memory
+MAX_PER_PAGE = 100
+
 
 @admin_bp.route('/api/stats')
 @admin_required
@@ -41,7 +45,7 @@ def api_customers():
     status = request.args.get('status', '')
     platform = request.args.get('platform', '')
     page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 20))
+    per_page = max(1, min(int(request.args.get('per_page', 20)), MAX_PER_PAGE))
 
     customers, total = get_customers_filtered(
         search=search,
@@ -122,7 +126,7 @@ def api_tickets():
     assigned = request.args.get('assigned', '')
     search = request.args.get('search', '').strip()
     page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 20))
+    per_page = max(1, min(int(request.args.get('per_page', 20)), MAX_PER_PAGE))
 
     tickets, total = Ticket.get_all_filtered(
         status=status or None,
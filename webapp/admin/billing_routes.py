@@ -3,16 +3,21 @@ Admin Billing Routes
 Dedicated routes for billing management
 """
 
+import csv
+import io
+import json
 import logging
 from datetime import datetime, timedelta
 from functools import wraps
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+import stripe
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g, Response
 
 from models import get_db_connection, Customer, Subscription, Invoice, PricingPlan
 from .models import AdminUser, log_admin_action
 from .billing_service import BillingService, BillingAuditLog, CustomerCredit, BillingServiceError
 from services.container_service import ContainerService
+from stripe_integration.config import is_stripe_configured
 from .permissions import (
     require_billing_read, require_billing_write, require_billing_refund,
     require_revenue_access, require_billing_admin, can_process_refund,
@@ -36,11 +41,14 @@ def admin_required(f):
 
 
 def get_current_admin():
-    """Get current logged in admin user"""
+    """Get current logged in admin user, looked up once per request"""
     admin_id = session.get('admin_user_id')
-    if admin_id:
-        return AdminUser.get_by_id(admin_id)
-    return None
+    if not admin_id:
+        return None
+    if g.get('current_admin_id') != admin_id:
+        g.current_admin = AdminUser.get_by_id(admin_id)
+        g.current_admin_id = admin_id
+    return g.current_admin
 
 
 # =============================================================================
@@ -630,9 +638,6 @@ def pause_subscription(subscription_id):
             flash('Subscription not found.', 'error')
             return redirect(url_for('admin_billing.subscriptions'))
 
-        import stripe
-        from stripe_integration.config import is_stripe_configured
-
         if not is_stripe_configured():
             flash('Stripe is not configured.', 'error')
             return redirect(url_for('admin_billing.subscription_detail', subscription_id=subscription_id))
@@ -644,7 +649,6 @@ def pause_subscription(subscription_id):
         )
 
         # Log the action
-        from .billing_service import BillingAuditLog
         log = BillingAuditLog(
             admin_user_id=admin.id,
             action_type='subscription_pause',
@@ -678,9 +682,6 @@ def resume_subscription(subscription_id):
             flash('Subscription not found.', 'error')
             return redirect(url_for('admin_billing.subscriptions'))
 
-        import stripe
-        from stripe_integration.config import is_stripe_configured
-
         if not is_stripe_configured():
             flash('Stripe is not configured.', 'error')
             return redirect(url_for('admin_billing.subscription_detail', subscription_id=subscription_id))
@@ -692,7 +693,6 @@ def resume_subscription(subscription_id):
         )
 
         # Log the action
-        from .billing_service import BillingAuditLog
         log = BillingAuditLog(
             admin_user_id=admin.id,
             action_type='subscription_resume',
@@ -899,10 +899,6 @@ def revenue_api_mrr():
 @require_revenue_access
 def revenue_export():
     """Export revenue data as CSV"""
-    from flask import Response
-    import csv
-    import io
-
     days = int(request.args.get('days', 30))
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
@@ -1024,9 +1020,6 @@ def get_customers_for_select():
 
 def create_manual_invoice(admin_id, customer_id, amount_cents, description, notes, ip_address):
     """Create a manual invoice via Stripe"""
-    import stripe
-    from stripe_integration.config import is_stripe_configured
-
     if not is_stripe_configured():
         raise BillingServiceError("Stripe is not configured")
 
@@ -1125,9 +1118,6 @@ def coupons():
 
 def get_stripe_coupons():
     """Get coupons from Stripe"""
-    import stripe
-    from stripe_integration.config import is_stripe_configured
-
     if not is_stripe_configured():
         return []
 
@@ -1159,7 +1149,6 @@ def apply_coupon():
         return redirect(url_for('admin_billing.coupons'))
 
     try:
-        import stripe
         stripe.Subscription.modify(
             subscription.stripe_subscription_id,
             coupon=coupon_id
@@ -1212,9 +1201,6 @@ def payment_methods(customer_id):
 
 def get_customer_payment_methods(customer):
     """Get payment methods for a customer from Stripe"""
-    import stripe
-    from stripe_integration.config import is_stripe_configured
-
     if not is_stripe_configured() or not customer.stripe_customer_id:
         return []
 
@@ -1242,7 +1228,6 @@ def remove_payment_method(customer_id, pm_id):
         return redirect(url_for('admin_billing.dashboard'))
 
     try:
-        import stripe
         stripe.PaymentMethod.detach(pm_id)
 
         # Log the action
@@ -1311,7 +1296,6 @@ def get_all_billing_settings():
         settings = {}
         for row in rows:
             try:
-                import json
                 settings[row['setting_key']] = json.loads(row['setting_value'])
             except:
                 settings[row['setting_key']] = row['setting_value']
@@ -1324,7 +1308,6 @@ def get_all_billing_settings():
 
 def update_billing_settings(admin_id, settings_dict, ip_address):
     """Update billing settings"""
-    import json
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -1363,10 +1346,6 @@ def update_billing_settings(admin_id, settings_dict, ip_address):
 @require_revenue_access
 def audit_log_export():
     """Export audit log as CSV"""
-    from flask import Response
-    import csv
-    import io
-
     logs = BillingAuditLog.search(limit=1000)
 
     output = io.StringIO()
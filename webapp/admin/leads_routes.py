@@ -7,7 +7,7 @@ import json
 import logging
 from functools import wraps
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g
 
 from .models import AdminUser, log_admin_action
 from models import get_db_connection
@@ -53,11 +53,14 @@ def acquisition_or_admin_required(f):
 
 
 def get_current_admin():
-    """Get current logged in admin user"""
+    """Get current logged in admin user, looked up once per request"""
     admin_id = session.get('admin_user_id')
-    if admin_id:
-        return AdminUser.get_by_id(admin_id)
-    return None
+    if not admin_id:
+        return None
+    if g.get('current_admin_id') != admin_id:
+        g.current_admin = AdminUser.get_by_id(admin_id)
+        g.current_admin_id = admin_id
+    return g.current_admin
 
 
 # =============================================================================
@@ -5,12 +5,18 @@ Handles admin user authentication and database operations
 
 import os
 import sys
+import atexit
+import logging
+import queue
+import threading
+import time
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 
 # Add parent directory for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import get_db_connection
+from models import get_db_connection, hash_password, password_needs_rehash, verify_password
+
+logger = logging.getLogger(__name__)
 
 
 # =============================================================================
@@ -55,11 +61,35 @@ class AdminUser:
 
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Verify password against hash"""
-        return check_password_hash(self.password_hash, password)
+        """Verify password against hash, upgrading outdated hashes on success"""
+        if not verify_password(self.password_hash, password):
+            return False
+
+        if self.id and password_needs_rehash(self.password_hash):
+            try:
+                self.set_password(password)
+                self.update_password_hash()
+            except Exception as e:
+                logger.warning(f"Failed to rehash password for admin {self.id}: {e}")
+        return True
+
+    def update_password_hash(self):
+        """Persist only the password hash"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "UPDATE admin_users SET password_hash = %s WHERE id = %s",
+                (self.password_hash, self.id)
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
 
     def save(self):
         """Insert or update admin user in database"""
@@ -163,6 +193,24 @@ class AdminUser:
             cursor.close()
             conn.close()
 
+    @staticmethod
+    def iter_all():
+        """Yield all admin users without materializing the full list.
+
+        Uses an unbuffered cursor so rows are streamed from the server as the
+        caller consumes them; the connection is held until iteration ends.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True, buffered=False)
+
+        try:
+            cursor.execute("SELECT * FROM admin_users ORDER BY created_at DESC")
+            for row in cursor:
+                yield AdminUser(**row)
+        finally:
+            cursor.close()
+            conn.close()
+
     def delete(self):
         """Delete admin user from database"""
         if not self.id:
@@ -180,18 +228,92 @@ class AdminUser:
             conn.close()
 
 
-def log_admin_action(admin_id, action, entity_type=None, entity_id=None, details=None, ip_address=None):
-    """Log admin action to audit_log table"""
+# =============================================================================
+# Audit Log
+# =============================================================================
+
+# Audit entries are buffered in-process and written by a background thread in
+# multi-row batches, keeping the INSERT off the request path.
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 0.1  # seconds
+
+_audit_queue = queue.Queue(maxsize=10000)
+_audit_writer_pid = None
+_audit_writer_lock = threading.Lock()
+
+
+def _write_audit_entries(entries):
+    """Insert a batch of audit entries in one statement"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
-        cursor.execute("""
+        cursor.executemany("""
             INSERT INTO audit_log
             (admin_user_id, action, entity_type, entity_id, details, ip_address, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, NOW())
-        """, (admin_id, action, entity_type, entity_id, details, ip_address))
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, entries)
         conn.commit()
     finally:
         cursor.close()
         conn.close()
+
+
+def _drain_audit_queue(first=None, wait=AUDIT_FLUSH_INTERVAL):
+    """Collect up to AUDIT_BATCH_SIZE queued entries and write them"""
+    batch = [first] if first is not None else []
+    deadline = time.monotonic() + wait
+    while len(batch) < AUDIT_BATCH_SIZE:
+        timeout = deadline - time.monotonic()
+        try:
+            batch.append(_audit_queue.get(timeout=timeout) if timeout > 0
+                         else _audit_queue.get_nowait())
+        except queue.Empty:
+            break
+
+    if batch:
+        try:
+            _write_audit_entries(batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} audit log entries: {e}")
+    return len(batch)
+
+
+def _audit_writer():
+    """Background loop: block for an entry, then flush it with any that follow"""
+    while True:
+        _drain_audit_queue(_audit_queue.get())
+
+
+def _ensure_audit_writer():
+    """Start the writer thread once per process (gunicorn forks workers)"""
+    global _audit_writer_pid
+    if _audit_writer_pid == os.getpid():
+        return
+    with _audit_writer_lock:
+        if _audit_writer_pid != os.getpid():
+            threading.Thread(target=_audit_writer, name='audit-log-writer', daemon=True).start()
+            _audit_writer_pid = os.getpid()
+
+
+def flush_audit_log():
+    """Synchronously write everything still queued (used at exit)"""
+    while _drain_audit_queue(wait=0):
+        pass
+
+
+atexit.register(flush_audit_log)
+
+
+def log_admin_action(admin_id, action, entity_type=None, entity_id=None, details=None, ip_address=None):
+    """Queue an admin action for the audit_log table.
+
+    The timestamp is taken now, so batching doesn't shift created_at. If the
+    buffer is full the entry is written synchronously rather than dropped.
+    """
+    entry = (admin_id, action, entity_type, entity_id, details, ip_address, datetime.now())
+    _ensure_audit_writer()
+    try:
+        _audit_queue.put_nowait(entry)
+    except queue.Full:
+        _write_audit_entries([entry])
@@ -4,20 +4,41 @@ Handles all admin page routes and actions
 """
 
 import os
+import json
+import hashlib
 import subprocess
 import logging
 import re
 import secrets
 import string
-from functools import wraps
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps, partial, lru_cache
 from datetime import datetime, timedelta
+from decimal import Decimal
+from urllib.parse import urlparse
 
-from flask import render_template, request, redirect, url_for, flash, session, jsonify, current_app
+from flask import (render_template, request, redirect, url_for, flash,
+                   session, jsonify, current_app, g, abort)
 from flask_wtf import FlaskForm
+from flask_wtf.csrf import generate_csrf
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from wtforms import StringField, PasswordField, SelectField, BooleanField, SubmitField, ValidationError
 from wtforms.validators import DataRequired, Email, Length, EqualTo
+from mysql.connector import IntegrityError
+from redis import Redis, ConnectionPool
+from rq import Queue, Retry
+from rq.job import Job
+import stripe
+from jinja2 import Environment
+from markupsafe import Markup
+
+try:
+    import orjson
+except ImportError:  # optional speedup for CMS page JSON; stdlib json is used otherwise
+    orjson = None
 
 from . import admin_bp
 from .models import AdminUser, log_admin_action
@@ -25,13 +46,21 @@ from .billing_service import BillingService, CustomerCredit, BillingServiceError
 
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import Customer, PortManager, get_db_connection, PricingPlan, Subscription, Invoice
+from models import Customer, PortManager, get_db_connection, hash_password, PricingPlan, Subscription, Invoice
 from models import Ticket, TicketMessage, TicketAttachment, TicketCategory, ConsultationAppointment
 from models import Server, ServerSelector
 from models import MonitoringCheck, CustomerMonitoringStatus, MonitoringAlert
 from models import ResourceUsage, ResourceAlert
 from models import StagingEnvironment, StagingPortManager
 from status.models import StatusIncident, StatusIncidentUpdate, StatusMaintenance, StatusOverride
+from attachments import send_ticket_attachment
+from email_service import send_admin_password_reset_email_job
+from stripe_integration.config import init_stripe
+from stripe_integration.pricing import sync_price_to_stripe, get_all_pricing_sync_status
+
+if '/opt/shophosting/provisioning' not in sys.path:
+    sys.path.insert(0, '/opt/shophosting/provisioning')
+from enqueue_provisioning import ProvisioningQueue
 from services.container_service import ContainerService
 
 logger = logging.getLogger(__name__)
@@ -91,11 +120,14 @@ def acquisition_or_admin_required(f):
 
 
 def get_current_admin():
-    """Get current logged in admin user"""
+    """Get current logged in admin user, looked up once per request"""
     admin_id = session.get('admin_user_id')
-    if admin_id:
-        return AdminUser.get_by_id(admin_id)
-    return None
+    if not admin_id:
+        return None
+    if g.get('current_admin_id') != admin_id:
+        g.current_admin = AdminUser.get_by_id(admin_id)
+        g.current_admin_id = admin_id
+    return g.current_admin
 
 
 # =============================================================================
@@ -114,7 +146,6 @@ class AdminLoginForm(FlaskForm):
 
 def get_admin_limiter():
     """Get the limiter from the current app context"""
-    from flask import current_app
     return current_app.extensions.get('limiter')
 
 
@@ -190,19 +221,17 @@ def dashboard():
         flash('You must change your password before accessing the admin panel.', 'warning')
         return redirect(url_for('admin.force_password_change'))
 
-    stats = get_customer_stats()
-    port_usage = PortManager.get_port_usage()
-    queue_stats = get_queue_stats()
-    recent_customers = get_recent_customers(5)
-    failed_customers = get_failed_customers(5)
+    results = gather_stats(
+        stats=get_customer_stats,
+        port_usage=PortManager.get_port_usage,
+        queue_stats=get_queue_stats,
+        recent_customers=partial(get_recent_customers, 5),
+        failed_customers=partial(get_failed_customers, 5)
+    )
 
     return render_template('admin/dashboard.html',
                            admin=admin,
-                           stats=stats,
-                           port_usage=port_usage,
-                           queue_stats=queue_stats,
-                           recent_customers=recent_customers,
-                           failed_customers=failed_customers)
+                           **results)
 
 
 # =============================================================================
@@ -315,7 +344,7 @@ def customer_resources(customer_id):
     usage = customer.get_resource_usage()
     history = ResourceUsage.get_usage_history(customer_id, days=30)
     alerts = ResourceAlert.get_recent_for_customer(customer_id, limit=20)
-    plan = PricingPlan.get_by_id(customer.plan_id) if customer.plan_id else None
+    plan = get_pricing_plan(customer.plan_id) if customer.plan_id else None
 
     return render_template('admin/customer_resources.html',
                            admin=admin,
@@ -368,6 +397,8 @@ def customer_suspend(customer_id):
         cursor.close()
         conn.close()
 
+    invalidate_customer_list_cache()
+
     log_admin_action(admin.id, 'customer_suspend', 'customer', customer_id,
                      f'Suspended customer {customer.email}: {reason}', request.remote_addr)
 
@@ -413,17 +444,12 @@ def customer_retry_provisioning(customer_id):
                 timeout=30
             )
 
-        # Remove any existing Nginx config (using sudo)
-        nginx_available = f"/etc/nginx/sites-available/customer-{customer_id}.conf"
-        nginx_enabled = f"/etc/nginx/sites-enabled/customer-{customer_id}.conf"
+        # Remove any existing Nginx config
+        from provisioning_worker import remove_nginx_site_config, request_nginx_reload
+        remove_nginx_site_config(customer_id)
 
-        if os.path.exists(nginx_enabled):
-            subprocess.run(['sudo', 'rm', '-f', nginx_enabled], capture_output=True)
-        if os.path.exists(nginx_available):
-            subprocess.run(['sudo', 'rm', '-f', nginx_available], capture_output=True)
-
-        # Reload nginx to apply changes
-        subprocess.run(['sudo', 'systemctl', 'reload', 'nginx'], capture_output=True)
+        # Reload nginx to apply changes (debounced across requests)
+        request_nginx_reload()
 
         # Update customer status to provisioning
         conn = get_db_connection()
@@ -437,14 +463,7 @@ def customer_retry_provisioning(customer_id):
         conn.close()
 
         # Queue new provisioning job
-        import sys
-        sys.path.insert(0, '/opt/shophosting/provisioning')
-        from enqueue_provisioning import ProvisioningQueue
-
-        queue = ProvisioningQueue(
-            redis_host=os.getenv('REDIS_HOST', 'localhost'),
-            redis_port=int(os.getenv('REDIS_PORT', 6379))
-        )
+        queue = get_provisioning_queue()
 
         customer_data = {
             'customer_id': customer.id,
@@ -481,6 +500,8 @@ def customer_retry_provisioning(customer_id):
         cursor.close()
         conn.close()
 
+        invalidate_customer_list_cache()
+
         log_admin_action(admin.id, 'retry_provisioning', 'customer', customer_id,
                         f'Retried provisioning for customer {customer.email}', request.remote_addr)
         flash(f'Provisioning has been restarted for {customer.email}.', 'success')
@@ -530,6 +551,8 @@ def customer_reactivate(customer_id):
         cursor.close()
         conn.close()
 
+    invalidate_customer_list_cache()
+
     log_admin_action(admin.id, 'customer_reactivate', 'customer', customer_id,
                      f'Reactivated customer {customer.email}', request.remote_addr)
 
@@ -569,13 +592,7 @@ def job_retry(job_id):
     admin = get_current_admin()
 
     try:
-        from redis import Redis
-        from rq import Queue
-        from rq.job import Job
-
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_conn = Redis(host=redis_host, port=6379)
-        job = Job.fetch(job_id, connection=redis_conn)
+        job = Job.fetch(job_id, connection=get_redis_connection())
         job.requeue()
 
         log_admin_action(admin.id, 'job_retry', 'job', None,
@@ -597,19 +614,17 @@ def system():
     """System health dashboard"""
     admin = get_current_admin()
 
-    services = get_service_status()
-    port_usage = PortManager.get_port_usage()
-    disk_usage = get_disk_usage()
-    backup_status = get_backup_status()
-    server_stats = ServerSelector.get_server_stats()
+    results = gather_stats(
+        services=get_service_status,
+        port_usage=PortManager.get_port_usage,
+        disk_usage=get_disk_usage,
+        backup_status=get_backup_status,
+        server_stats=ServerSelector.get_server_stats
+    )
 
     return render_template('admin/system.html',
                            admin=admin,
-                           services=services,
-                           port_usage=port_usage,
-                           disk_usage=disk_usage,
-                           backup_status=backup_status,
-                           server_stats=server_stats)
+                           **results)
 
 
 # =============================================================================
@@ -628,12 +643,11 @@ def system_backups():
         result = subprocess.run(
             ['sudo', 'restic', '-r', 'sftp:sh-backup@15.204.249.219:/home/sh-backup/system',
              '--password-file', '/opt/shophosting/.system-restic-password',
-             'snapshots', '--json'],
+             'snapshots', '--json', '--no-lock'],
             capture_output=True, text=True, timeout=30,
             env={**os.environ, 'HOME': '/root', 'XDG_CACHE_HOME': '/root/.cache'}
         )
         if result.returncode == 0 and result.stdout:
-            import json
             snapshots = json.loads(result.stdout)
             # Sort by time descending
             snapshots.sort(key=lambda x: x.get('time', ''), reverse=True)
@@ -961,14 +975,8 @@ def staging_delete(staging_id):
         return redirect(url_for('admin.staging_list'))
 
     try:
-        from redis import Redis
-        from rq import Queue
-
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_conn = Redis(host=redis_host, port=6379)
-        queue = Queue('staging', connection=redis_conn)
+        queue = get_rq_queue('staging')
 
-        sys.path.insert(0, '/opt/shophosting/provisioning')
         from staging_worker import delete_staging_job
         job = queue.enqueue(delete_staging_job, staging_id,
                            job_timeout=300, result_ttl=3600)
@@ -1008,14 +1016,8 @@ def staging_create_for_customer(customer_id):
     staging_name = request.form.get('staging_name', '').strip() or None
 
     try:
-        from redis import Redis
-        from rq import Queue
-
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_conn = Redis(host=redis_host, port=6379)
-        queue = Queue('staging', connection=redis_conn)
+        queue = get_rq_queue('staging')
 
-        sys.path.insert(0, '/opt/shophosting/provisioning')
         from staging_worker import create_staging_job
         job = queue.enqueue(create_staging_job, customer_id, staging_name,
                            job_timeout=600, result_ttl=3600)
@@ -1087,7 +1089,7 @@ def tickets():
     total_pages = (total + per_page - 1) // per_page
 
     # Get categories and admins for filter dropdowns
-    categories = TicketCategory.get_all_active()
+    categories = get_ticket_categories()
     admins = AdminUser.get_all()
     ticket_stats = Ticket.get_stats()
 
@@ -1120,9 +1122,9 @@ def ticket_detail(ticket_id):
 
     # Get related data
     customer = Customer.get_by_id(ticket.customer_id)
-    category = TicketCategory.get_by_id(ticket.category_id) if ticket.category_id else None
-    messages = ticket.get_messages(include_internal=True)  # Include internal notes for admin
-    attachments = ticket.get_attachments()
+    category = get_ticket_category(ticket.category_id)
+    # Include internal notes for admin
+    messages, attachments = ticket.get_thread(include_internal=True)
     admins = AdminUser.get_all()
 
     # Get customer's other tickets count
@@ -1136,7 +1138,7 @@ def ticket_detail(ticket_id):
                            messages=messages,
                            attachments=attachments,
                            admins=admins,
-                           categories=TicketCategory.get_all_active(),
+                           categories=get_ticket_categories(),
                            customer_ticket_count=customer_ticket_count)
 
 
@@ -1164,12 +1166,13 @@ def ticket_respond(ticket_id):
             message=message_text,
             is_internal_note=False
         )
-        message.save()
 
-        # Update ticket status to in_progress if it was open
+        # Move the ticket to in_progress in the same transaction if it was open
         if ticket.status == 'open':
             ticket.status = 'in_progress'
-            ticket.save()
+            ticket.save_with_message(message)
+        else:
+            message.save()
 
         log_admin_action(admin.id, 'ticket_respond', 'ticket', ticket_id,
                         f'Responded to ticket {ticket.ticket_number}', request.remote_addr)
@@ -1352,24 +1355,11 @@ def ticket_category(ticket_id):
 @admin_required
 def serve_ticket_attachment(attachment_id):
     """Serve attachment file for admin"""
-    from flask import send_file, abort
-    import os
-
     attachment = TicketAttachment.get_by_id(attachment_id)
     if not attachment:
         abort(404)
 
-    TICKET_UPLOAD_PATH = '/var/customers/tickets'
-    full_path = os.path.join(TICKET_UPLOAD_PATH, attachment.file_path)
-
-    if not os.path.exists(full_path):
-        abort(404)
-
-    return send_file(
-        full_path,
-        download_name=attachment.original_filename,
-        as_attachment=True
-    )
+    return send_ticket_attachment(attachment)
 
 
 # =============================================================================
@@ -1522,10 +1512,129 @@ def appointment_notes(appointment_id):
 # Helper Functions
 # =============================================================================
 
+def ttl_cache(seconds):
+    """Cache a zero-argument helper's result in-process for `seconds`.
+
+    Used for system probes (systemctl, df, log tails) whose output changes far
+    slower than the admin pages that poll them.
+    """
+    def decorator(f):
+        lock = threading.Lock()
+        entry = {'value': None, 'expires': 0.0}
+
+        @wraps(f)
+        def wrapper():
+            now = time.monotonic()
+            if now < entry['expires']:
+                return entry['value']
+            with lock:
+                if time.monotonic() >= entry['expires']:
+                    entry['value'] = f()
+                    entry['expires'] = time.monotonic() + seconds
+                return entry['value']
+
+        def cache_clear():
+            entry['expires'] = 0.0
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+# Ticket categories are only seeded by migrations (there is no admin UI for
+# them), so each process can keep the active list for a few minutes
+TICKET_CATEGORIES_CACHE_TTL = 300
+
+
+@ttl_cache(TICKET_CATEGORIES_CACHE_TTL)
+def get_ticket_categories():
+    """Return TicketCategory.get_all_active(), cached in-process"""
+    return TicketCategory.get_all_active()
+
+
+def get_ticket_category(category_id):
+    """Look up a ticket's category, from the cached active list when possible"""
+    if not category_id:
+        return None
+    for category in get_ticket_categories():
+        if category.id == category_id:
+            return category
+    # Deactivated categories can still be attached to old tickets
+    return TicketCategory.get_by_id(category_id)
+
+
+# Shared pool for fanning out independent dashboard probes. Kept below the
+# DB pool size so concurrent probes can't exhaust connections.
+_stats_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='admin-stats')
+
+
+def gather_stats(**tasks):
+    """Run independent zero-argument stat helpers concurrently.
+
+    Returns a dict mapping each keyword to its helper's result, so page
+    latency tracks the slowest probe instead of the sum of all of them.
+    """
+    futures = {name: _stats_executor.submit(fn) for name, fn in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+_redis_conn = None
+_rq_queues = {}
+
+
+def get_redis_connection():
+    """Get the shared Redis client used for RQ queue operations.
+
+    The client owns a connection pool, so reusing one instance across requests
+    avoids a fresh TCP + RESP handshake for every dashboard load.
+    """
+    global _redis_conn
+    if _redis_conn is None:
+        pool = ConnectionPool(
+            host=os.getenv('REDIS_HOST', 'localhost'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            max_connections=16
+        )
+        _redis_conn = Redis(connection_pool=pool)
+    return _redis_conn
+
+
+_provisioning_queue = None
+
+
+def get_provisioning_queue():
+    """Get the shared ProvisioningQueue, built on the admin Redis connection pool"""
+    global _provisioning_queue
+    if _provisioning_queue is None:
+        _provisioning_queue = ProvisioningQueue(
+            connection_pool=get_redis_connection().connection_pool
+        )
+    return _provisioning_queue
+
+
+def get_rq_queue(name):
+    """Get a cached RQ queue bound to the shared Redis client"""
+    queue = _rq_queues.get(name)
+    if queue is None:
+        queue = Queue(name, connection=get_redis_connection())
+        _rq_queues[name] = queue
+    return queue
+
+
+def rows_as_dicts(cursor):
+    """Fetch all rows from a plain tuple cursor as dicts.
+
+    Builds the column list once per result set rather than per row, which is
+    cheaper than a dictionary=True cursor for larger result sets.
+    """
+    keys = [col[0] for col in cursor.description]
+    return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+
 def get_customer_stats():
     """Get customer statistics by status"""
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
 
     try:
         cursor.execute("""
@@ -1544,9 +1653,9 @@ def get_customer_stats():
             'suspended': 0
         }
 
-        for row in rows:
-            stats[row['status']] = row['count']
-            stats['total'] += row['count']
+        for status, count in rows:
+            stats[status] = count
+            stats['total'] += count
 
         return stats
     finally:
@@ -1591,43 +1700,82 @@ def get_failed_customers(limit=10):
         conn.close()
 
 
+def generate_temp_password():
+    """Generate a 16-character temporary password.
+
+    One token_urlsafe() call for the bulk of the entropy, with the last two
+    characters swapped for a symbol and a digit to satisfy password policy.
+    """
+    temp_password = secrets.token_urlsafe(12)
+    return temp_password[:-2] + secrets.choice('!@#$%^&*') + secrets.choice(string.digits)
+
+
+def duplicate_customer_field(error):
+    """Return which customers UNIQUE column ('email', 'domain', 'web_port') an
+    IntegrityError collided on, or None if it can't be determined"""
+    if getattr(error, 'errno', None) != 1062:
+        return None
+    # MySQL reports e.g. "Duplicate entry 'x' for key 'customers.email'"
+    key = str(error.msg).rsplit('for key', 1)[-1].strip(" '")
+    column = key.rsplit('.', 1)[-1]
+    return column if column in ('email', 'domain', 'web_port') else None
+
+
+@lru_cache(maxsize=8)
+def build_customer_filter_sql(has_search, has_status, has_platform):
+    """Build the (count_sql, select_sql) pair for a customer filter shape.
+
+    There are only eight filter shapes, so caching the assembled SQL keeps
+    statement text stable per shape and skips rebuilding it on every call.
+    """
+    where_clauses = []
+    if has_search:
+        where_clauses.append("(email LIKE %s OR domain LIKE %s OR company_name LIKE %s)")
+    if has_status:
+        where_clauses.append("status = %s")
+    if has_platform:
+        where_clauses.append("platform = %s")
+
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+
+    count_sql = f"SELECT COUNT(*) as count FROM customers WHERE {where_sql}"
+    select_sql = f"""
+        SELECT id, email, company_name, domain, platform, status, web_port, created_at
+        FROM customers
+        WHERE {where_sql}
+        ORDER BY created_at DESC
+        LIMIT %s OFFSET %s
+    """
+    return count_sql, select_sql
+
+
 def get_customers_filtered(search='', status='', platform='', page=1, per_page=20):
     """Get filtered and paginated customer list"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        where_clauses = []
         params = []
 
         if search:
-            where_clauses.append("(email LIKE %s OR domain LIKE %s OR company_name LIKE %s)")
             search_param = f'%{search}%'
             params.extend([search_param, search_param, search_param])
 
         if status:
-            where_clauses.append("status = %s")
             params.append(status)
 
         if platform:
-            where_clauses.append("platform = %s")
             params.append(platform)
 
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+        count_sql, select_sql = build_customer_filter_sql(bool(search), bool(status), bool(platform))
 
         # Get total count
-        cursor.execute(f"SELECT COUNT(*) as count FROM customers WHERE {where_sql}", params)
+        cursor.execute(count_sql, params)
         total = cursor.fetchone()['count']
 
         # Get paginated results
         offset = (page - 1) * per_page
-        cursor.execute(f"""
-            SELECT id, email, company_name, domain, platform, status, web_port, created_at
-            FROM customers
-            WHERE {where_sql}
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """, params + [per_page, offset])
+        cursor.execute(select_sql, params + [per_page, offset])
 
         customers = cursor.fetchall()
         return customers, total
@@ -1636,6 +1784,127 @@ def get_customers_filtered(search='', status='', platform='', page=1, per_page=2
         conn.close()
 
 
+@lru_cache(maxsize=4)
+def build_customer_keyset_sql(has_search, has_after):
+    """Build the keyset-paginated customer listing query for a filter shape"""
+    where_clauses = []
+    if has_search:
+        where_clauses.append("(email LIKE %s OR domain LIKE %s OR company_name LIKE %s)")
+    if has_after:
+        where_clauses.append("(created_at < %s OR (created_at = %s AND id < %s))")
+
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+
+    return f"""
+        SELECT id, email, company_name, domain, platform, status, web_port, created_at
+        FROM customers
+        WHERE {where_sql}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    """
+
+
+def get_customers_keyset(search='', after=None, per_page=20):
+    """Get a page of customers ordered newest first using keyset pagination.
+
+    Args:
+        search: Optional substring matched against email, domain and company
+        after: Optional (created_at, id) of the last row on the previous page
+        per_page: Page size
+
+    Returns:
+        (customers, has_next) - no COUNT(*) is run, so deep pages cost the
+        same as the first one.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        params = []
+        if search:
+            search_param = f'%{search}%'
+            params.extend([search_param, search_param, search_param])
+        if after:
+            after_created, after_id = after
+            params.extend([after_created, after_created, after_id])
+
+        # Fetch one extra row to learn whether another page exists
+        cursor.execute(build_customer_keyset_sql(bool(search), bool(after)),
+                       params + [per_page + 1])
+        customers = cursor.fetchall()
+        return customers[:per_page], len(customers) > per_page
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# Redis read-through cache for the manage-customers listing. Writes bump the
+# version key so every cached page is invalidated at once; the TTL bounds
+# staleness from status changes made outside the admin panel (e.g. workers).
+CUSTOMER_LIST_CACHE_TTL = 60
+CUSTOMER_LIST_VERSION_KEY = 'admin:manage_customers:version'
+
+
+# Stand-in for the per-session CSRF token in cached row HTML, swapped for the
+# real token on every request so one admin's token is never served to another
+CUSTOMER_ROWS_CSRF_PLACEHOLDER = '__customer_rows_csrf_token__'
+
+
+def customer_list_cache_key(redis_conn, search, after, per_page):
+    """Build a versioned Redis key for one manage-customers page"""
+    version = (redis_conn.get(CUSTOMER_LIST_VERSION_KEY) or b'0').decode()
+    shape = json.dumps([search, after[0].isoformat() if after else None,
+                        after[1] if after else None, per_page])
+    return f"admin:manage_customers:html:{version}:{hashlib.sha1(shape.encode()).hexdigest()}"
+
+
+def render_customer_rows(search='', after=None, per_page=20):
+    """Render the manage-customers table body, cached in Redis as HTML.
+
+    Returns (rows_html, next_cursor). On a hit neither the database nor the
+    row template is touched; the CSRF placeholder is filled in per request.
+    """
+    cache_key = None
+    try:
+        redis_conn = get_redis_connection()
+        cache_key = customer_list_cache_key(redis_conn, search, after, per_page)
+        cached = redis_conn.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Customer table cache unavailable: {e}")
+        cached = None
+
+    if cached:
+        data = json.loads(cached)
+        rows_html, next_cursor = data['rows_html'], data['next_cursor']
+    else:
+        customers, has_next = get_customers_keyset(search=search, after=after, per_page=per_page)
+
+        next_cursor = None
+        if has_next and customers:
+            last = customers[-1]
+            next_cursor = {'after_created': last['created_at'].isoformat(), 'after_id': last['id']}
+
+        rows_html = render_template('admin/_manage_customers_rows.html', customers=customers,
+                                    csrf_placeholder=CUSTOMER_ROWS_CSRF_PLACEHOLDER)
+
+        if cache_key:
+            try:
+                redis_conn.setex(cache_key, CUSTOMER_LIST_CACHE_TTL,
+                                 json.dumps({'rows_html': rows_html, 'next_cursor': next_cursor}))
+            except Exception as e:
+                logger.warning(f"Could not cache customer table: {e}")
+
+    return rows_html.replace(CUSTOMER_ROWS_CSRF_PLACEHOLDER, generate_csrf()), next_cursor
+
+
+def invalidate_customer_list_cache():
+    """Invalidate all cached manage-customers pages after a customer write"""
+    try:
+        get_redis_connection().incr(CUSTOMER_LIST_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Could not invalidate customer list cache: {e}")
+
+
 def get_provisioning_jobs(customer_id):
     """Get provisioning jobs for a customer"""
     conn = get_db_connection()
@@ -1675,7 +1944,7 @@ def get_provisioning_logs_by_job(job_id):
 def get_provisioning_logs_by_customer(customer_id, limit=100):
     """Get provisioning logs for a customer (most recent first)"""
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
 
     try:
         cursor.execute("""
@@ -1690,7 +1959,7 @@ def get_provisioning_logs_by_customer(customer_id, limit=100):
             ORDER BY pl.created_at DESC
             LIMIT %s
         """, (customer_id, limit))
-        return cursor.fetchall()
+        return rows_as_dicts(cursor)
     finally:
         cursor.close()
         conn.close()
@@ -1746,15 +2015,15 @@ def get_queue_stats():
 
     # Get live queue stats from Redis - this is the source of truth for active jobs
     try:
-        from redis import Redis
-        from rq import Queue
-
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_conn = Redis(host=redis_host, port=6379)
-        queue = Queue('provisioning', connection=redis_conn)
-
-        stats['queued'] = len(queue)
-        stats['started'] = len(queue.started_job_registry)
+        queue = get_rq_queue('provisioning')
+
+        # One round trip for both counts. Started-registry scores are expiry
+        # timestamps, so counting scores >= now matches len(registry) without
+        # the cleanup pass it triggers.
+        pipe = get_redis_connection().pipeline(transaction=False)
+        pipe.llen(queue.key)
+        pipe.zcount(queue.started_job_registry.key, time.time(), '+inf')
+        stats['queued'], stats['started'] = pipe.execute()
         stats['connected'] = True
     except Exception as e:
         stats['error'] = str(e)
@@ -1763,29 +2032,24 @@ def get_queue_stats():
     # and only if the customer status matches the job status for consistency
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Count finished jobs (customers who are now active)
-        cursor.execute("""
-            SELECT COUNT(DISTINCT pj.customer_id) as count
-            FROM provisioning_jobs pj
-            INNER JOIN customers c ON pj.customer_id = c.id
-            WHERE pj.status = 'finished' AND c.status = 'active'
-        """)
-        row = cursor.fetchone()
-        if row:
-            stats['finished'] = row['count']
+        cursor = conn.cursor()
 
-        # Count failed jobs (only for customers still in failed status)
+        # Finished jobs for customers now active, and failed jobs for customers
+        # still in failed status, counted in a single pass over the join
         cursor.execute("""
-            SELECT COUNT(DISTINCT pj.customer_id) as count
+            SELECT
+                COUNT(DISTINCT IF(pj.status = 'finished' AND c.status = 'active',
+                                  pj.customer_id, NULL)) as finished,
+                COUNT(DISTINCT IF(pj.status = 'failed' AND c.status = 'failed',
+                                  pj.customer_id, NULL)) as failed
             FROM provisioning_jobs pj
             INNER JOIN customers c ON pj.customer_id = c.id
-            WHERE pj.status = 'failed' AND c.status = 'failed'
+            WHERE pj.status IN ('finished', 'failed')
+            AND c.status IN ('active', 'failed')
         """)
         row = cursor.fetchone()
         if row:
-            stats['failed'] = row['count']
+            stats['finished'], stats['failed'] = row
 
         cursor.close()
         conn.close()
@@ -1795,6 +2059,7 @@ def get_queue_stats():
     return stats
 
 
+@ttl_cache(10)
 def get_service_status():
     """Check status of system services"""
     services = {
@@ -1818,6 +2083,7 @@ def get_service_status():
     return services
 
 
+@ttl_cache(10)
 def get_disk_usage():
     """Get disk usage for customer data directory"""
     try:
@@ -1840,6 +2106,7 @@ def get_disk_usage():
     return {'total': 'N/A', 'used': 'N/A', 'available': 'N/A', 'percent': 'N/A'}
 
 
+@ttl_cache(10)
 def get_backup_status():
     """Get backup status from log file"""
     log_path = '/var/log/shophosting-backup.log'
@@ -1873,39 +2140,81 @@ def get_backup_status():
     return status
 
 
+# Maximum age (seconds) of billing_cache rows before get_billing_stats recomputes them
+BILLING_CACHE_MAX_AGE = 120
+BILLING_CACHE_METRICS = ('mrr', 'active_subs', 'month_revenue')
+
+
+def compute_billing_stats(cursor):
+    """Run the billing aggregate queries directly against subscriptions/invoices"""
+    # Monthly Recurring Revenue
+    cursor.execute("""
+        SELECT COALESCE(SUM(pp.price_monthly), 0) as mrr
+        FROM subscriptions s
+        JOIN pricing_plans pp ON s.plan_id = pp.id
+        WHERE s.status = 'active'
+    """)
+    mrr = cursor.fetchone()['mrr'] or 0
+
+    # Active subscriptions count
+    cursor.execute("SELECT COUNT(*) as count FROM subscriptions WHERE status = 'active'")
+    active_subs = cursor.fetchone()['count']
+
+    # This month's revenue - range predicate so idx_status_paid_at can be used
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+    cursor.execute("""
+        SELECT COALESCE(SUM(amount_paid), 0) as revenue
+        FROM invoices
+        WHERE status = 'paid'
+        AND paid_at >= %s AND paid_at < %s
+    """, (month_start, next_month_start))
+    month_revenue = cursor.fetchone()['revenue'] or 0
+
+    return {
+        'mrr': mrr,
+        'active_subs': active_subs,
+        'month_revenue': month_revenue
+    }
+
+
+def refresh_billing_cache(conn, cursor):
+    """Recompute billing aggregates and upsert them into billing_cache"""
+    values = compute_billing_stats(cursor)
+    cursor.executemany("""
+        INSERT INTO billing_cache (metric, value) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE value = VALUES(value), updated_at = CURRENT_TIMESTAMP
+    """, list(values.items()))
+    conn.commit()
+    return values
+
+
 def get_billing_stats():
-    """Get billing statistics"""
+    """Get billing statistics, served from billing_cache while it is fresh"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # Monthly Recurring Revenue
-        cursor.execute("""
-            SELECT COALESCE(SUM(pp.price_monthly), 0) as mrr
-            FROM subscriptions s
-            JOIN pricing_plans pp ON s.plan_id = pp.id
-            WHERE s.status = 'active'
-        """)
-        mrr = cursor.fetchone()['mrr'] or 0
-
-        # Active subscriptions count
-        cursor.execute("SELECT COUNT(*) as count FROM subscriptions WHERE status = 'active'")
-        active_subs = cursor.fetchone()['count']
-
-        # This month's revenue
-        cursor.execute("""
-            SELECT COALESCE(SUM(amount_paid), 0) as revenue
-            FROM invoices
-            WHERE status = 'paid'
-            AND MONTH(paid_at) = MONTH(CURRENT_DATE())
-            AND YEAR(paid_at) = YEAR(CURRENT_DATE())
-        """)
-        month_revenue = cursor.fetchone()['revenue'] or 0
+        try:
+            cursor.execute("""
+                SELECT metric, value
+                FROM billing_cache
+                WHERE metric IN (%s, %s, %s)
+                AND updated_at >= NOW() - INTERVAL %s SECOND
+            """, BILLING_CACHE_METRICS + (BILLING_CACHE_MAX_AGE,))
+            values = {row['metric']: row['value'] for row in cursor.fetchall()}
+            if len(values) < len(BILLING_CACHE_METRICS):
+                values = refresh_billing_cache(conn, cursor)
+        except Exception as e:
+            # billing_cache missing or unwritable - compute directly
+            logger.warning(f"billing_cache unavailable, computing billing stats directly: {e}")
+            conn.rollback()
+            values = compute_billing_stats(cursor)
 
         return {
-            'mrr': float(mrr),
-            'active_subscriptions': active_subs,
-            'month_revenue': float(month_revenue)
+            'mrr': float(values['mrr'] or 0),
+            'active_subscriptions': int(values['active_subs'] or 0),
+            'month_revenue': float(values['month_revenue'] or 0)
         }
     finally:
         cursor.close()
@@ -1972,6 +2281,7 @@ def restart_service(service):
             capture_output=True, text=True, timeout=30
         )
         if result.returncode == 0:
+            get_service_status.cache_clear()
             log_admin_action(admin.id, 'restart_service', 'service', None,
                            f'Restarted {service}', request.remote_addr)
             flash(f'Service {service} restarted successfully.', 'success')
@@ -2013,12 +2323,7 @@ def clear_failed_jobs():
     admin = get_current_admin()
 
     try:
-        from redis import Redis
-        from rq import Queue
-
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_conn = Redis(host=redis_host, port=6379)
-        queue = Queue('provisioning', connection=redis_conn)
+        queue = get_rq_queue('provisioning')
 
         # Clear failed jobs
         failed_count = len(queue.failed_job_registry)
@@ -2071,6 +2376,10 @@ def view_logs(log_type):
 # Customer Management Routes
 # =============================================================================
 
+# Times create_customer retries when a concurrent create takes its port
+PORT_ASSIGN_ATTEMPTS = 3
+
+
 @admin_bp.route('/manage-customers')
 @admin_required
 def manage_customers():
@@ -2078,19 +2387,26 @@ def manage_customers():
     admin = get_current_admin()
 
     search = request.args.get('search', '').strip()
-    page = int(request.args.get('page', 1))
     per_page = 20
 
-    customers_list, total = get_customers_filtered(search=search, page=page, per_page=per_page)
-    total_pages = (total + per_page - 1) // per_page
+    # Keyset cursor: created_at/id of the last customer on the previous page
+    after = None
+    after_created = request.args.get('after_created', '')
+    after_id = request.args.get('after_id', type=int)
+    if after_created and after_id:
+        try:
+            after = (datetime.fromisoformat(after_created), after_id)
+        except ValueError:
+            after = None
+
+    customer_rows, next_cursor = render_customer_rows(search=search, after=after, per_page=per_page)
 
     return render_template('admin/manage_customers.html',
                           admin=admin,
-                          customers=customers_list,
+                          customer_rows=customer_rows,
                           search=search,
-                          page=page,
-                          total_pages=total_pages,
-                          total=total)
+                          is_first_page=after is None,
+                          next_cursor=next_cursor)
 
 
 @admin_bp.route('/manage-customers/create', methods=['GET', 'POST'])
@@ -2113,51 +2429,55 @@ def create_customer():
             flash('All fields are required.', 'error')
             return render_template('admin/customer_form.html', admin=admin, customer=None)
 
-        # Check for duplicates
-        if Customer.email_exists(email):
-            flash('Email already exists.', 'error')
-            return render_template('admin/customer_form.html', admin=admin, customer=None)
-
-        if Customer.domain_exists(domain):
-            flash('Domain already exists.', 'error')
-            return render_template('admin/customer_form.html', admin=admin, customer=None)
-
         try:
-            # Assign a port
-            web_port = PortManager.get_next_available_port()
-            if not web_port:
-                flash('No available ports. Maximum capacity reached.', 'error')
-                return render_template('admin/customer_form.html', admin=admin, customer=None)
-
-            # Create customer with port
-            conn = get_db_connection()
-            cursor = conn.cursor()
-
-            from werkzeug.security import generate_password_hash
-            password_hash = generate_password_hash(password)
+            password_hash = hash_password(password)
+
+            # Create customer with port. Duplicate email/domain/port is detected by
+            # the UNIQUE keys on the INSERT itself rather than separate pre-checks;
+            # a port claimed by a concurrent create is retried with the next one.
+            customer_id = None
+            for _ in range(PORT_ASSIGN_ATTEMPTS):
+                web_port = PortManager.get_next_available_port()
+                if not web_port:
+                    flash('No available ports. Maximum capacity reached.', 'error')
+                    return render_template('admin/customer_form.html', admin=admin, customer=None)
+
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("""
+                        INSERT INTO customers (email, password_hash, company_name, domain, platform, status, web_port)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, (email, password_hash, company_name, domain, platform,
+                          'provisioning' if start_provisioning else 'pending', web_port))
 
-            cursor.execute("""
-                INSERT INTO customers (email, password_hash, company_name, domain, platform, status, web_port)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (email, password_hash, company_name, domain, platform,
-                  'provisioning' if start_provisioning else 'pending', web_port))
+                    customer_id = cursor.lastrowid
+                    conn.commit()
+                except IntegrityError as e:
+                    conn.rollback()
+                    field = duplicate_customer_field(e)
+                    if field != 'web_port':
+                        if field == 'email':
+                            flash('Email already exists.', 'error')
+                        elif field == 'domain':
+                            flash('Domain already exists.', 'error')
+                        else:
+                            flash('Customer could not be created due to a conflict. Please try again.', 'error')
+                        return render_template('admin/customer_form.html', admin=admin, customer=None)
+                finally:
+                    cursor.close()
+                    conn.close()
 
-            customer_id = cursor.lastrowid
-            conn.commit()
-            cursor.close()
-            conn.close()
+                if customer_id:
+                    break
+            else:
+                flash('Customer could not be created due to a conflict. Please try again.', 'error')
+                return render_template('admin/customer_form.html', admin=admin, customer=None)
 
             # Queue provisioning if requested
             if start_provisioning:
                 try:
-                    import sys
-                    sys.path.insert(0, '/opt/shophosting/provisioning')
-                    from enqueue_provisioning import ProvisioningQueue
-
-                    queue = ProvisioningQueue(
-                        redis_host=os.getenv('REDIS_HOST', 'localhost'),
-                        redis_port=int(os.getenv('REDIS_PORT', 6379))
-                    )
+                    queue = get_provisioning_queue()
 
                     customer_data = {
                         'customer_id': customer_id,
@@ -2172,27 +2492,22 @@ def create_customer():
 
                     job, server = queue.enqueue_customer(customer_data)
 
-                    # Update customer with server assignment
+                    # Update customer with server assignment and record the job
                     conn = get_db_connection()
                     cursor = conn.cursor()
-                    cursor.execute(
-                        "UPDATE customers SET server_id = %s WHERE id = %s",
-                        (server.id, customer_id)
-                    )
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
-
-                    # Record the job with server_id
-                    conn = get_db_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO provisioning_jobs (customer_id, job_id, status, server_id)
-                        VALUES (%s, %s, 'queued', %s)
-                    """, (customer_id, job.id, server.id))
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
+                    try:
+                        cursor.execute(
+                            "UPDATE customers SET server_id = %s WHERE id = %s",
+                            (server.id, customer_id)
+                        )
+                        cursor.execute("""
+                            INSERT INTO provisioning_jobs (customer_id, job_id, status, server_id)
+                            VALUES (%s, %s, 'queued', %s)
+                        """, (customer_id, job.id, server.id))
+                        conn.commit()
+                    finally:
+                        cursor.close()
+                        conn.close()
 
                     flash(f'Customer {email} created and provisioning started on server {server.name}.', 'success')
                 except Exception as e:
@@ -2200,6 +2515,8 @@ def create_customer():
             else:
                 flash(f'Customer {email} created successfully (not provisioned).', 'success')
 
+            invalidate_customer_list_cache()
+
             log_admin_action(admin.id, 'create_customer', 'customer', customer_id,
                            f'Created customer {email}', request.remote_addr)
             return redirect(url_for('admin.manage_customers'))
@@ -2234,24 +2551,14 @@ def edit_customer(customer_id):
             flash('Email, company name, and domain are required.', 'error')
             return render_template('admin/customer_form.html', admin=admin, customer=customer)
 
-        # Check for duplicates (excluding current customer)
+        # Duplicate email/domain (on another customer) is detected by the
+        # UNIQUE keys on the UPDATE itself, as in create_customer
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
-            cursor.execute("SELECT id FROM customers WHERE email = %s AND id != %s", (email, customer_id))
-            if cursor.fetchone():
-                flash('Email already exists.', 'error')
-                return render_template('admin/customer_form.html', admin=admin, customer=customer)
-
-            cursor.execute("SELECT id FROM customers WHERE domain = %s AND id != %s", (domain, customer_id))
-            if cursor.fetchone():
-                flash('Domain already exists.', 'error')
-                return render_template('admin/customer_form.html', admin=admin, customer=customer)
-
             # Update customer
             if new_password:
-                from werkzeug.security import generate_password_hash
-                password_hash = generate_password_hash(new_password)
+                password_hash = hash_password(new_password)
                 cursor.execute("""
                     UPDATE customers SET email=%s, company_name=%s, domain=%s,
                     platform=%s, status=%s, password_hash=%s WHERE id=%s
@@ -2263,14 +2570,26 @@ def edit_customer(customer_id):
                 """, (email, company_name, domain, platform, status, customer_id))
 
             conn.commit()
-            log_admin_action(admin.id, 'edit_customer', 'customer', customer_id,
-                           f'Updated customer {email}', request.remote_addr)
-            flash(f'Customer {email} updated successfully.', 'success')
-            return redirect(url_for('admin.manage_customers'))
+        except IntegrityError as e:
+            conn.rollback()
+            field = duplicate_customer_field(e)
+            if field == 'email':
+                flash('Email already exists.', 'error')
+            elif field == 'domain':
+                flash('Domain already exists.', 'error')
+            else:
+                flash('Customer could not be updated due to a conflict.', 'error')
+            return render_template('admin/customer_form.html', admin=admin, customer=customer)
         finally:
             cursor.close()
             conn.close()
 
+        invalidate_customer_list_cache()
+        log_admin_action(admin.id, 'edit_customer', 'customer', customer_id,
+                         f'Updated customer {email}', request.remote_addr)
+        flash(f'Customer {email} updated successfully.', 'success')
+        return redirect(url_for('admin.manage_customers'))
+
     return render_template('admin/customer_form.html', admin=admin, customer=customer)
 
 
@@ -2278,7 +2597,12 @@ def edit_customer(customer_id):
 @admin_required
 @super_admin_required
 def delete_customer(customer_id):
-    """Delete a customer and their containers/configs (super_admin only)"""
+    """Delete a customer and their containers/configs (super_admin only)
+
+    Cancels the Stripe subscription inline, then marks the customer as
+    'deleting' and hands container, file, Nginx and database cleanup to the
+    provisioning worker so the request doesn't block on docker/rm.
+    """
     admin = get_current_admin()
     customer = Customer.get_by_id(customer_id)
 
@@ -2287,18 +2611,15 @@ def delete_customer(customer_id):
         return redirect(url_for('admin.manage_customers'))
 
     email = customer.email
-    customer_path = f"/var/customers/customer-{customer_id}"
-    db_deleted = False
-    directory_deleted = False
+    previous_status = customer.status
     subscription_cancelled = False
+    marked_deleting = False
 
     try:
         # Cancel Stripe subscription if exists
         subscription = Subscription.get_by_customer_id(customer_id)
         if subscription and subscription.stripe_subscription_id:
             try:
-                import stripe
-                from stripe_integration.config import init_stripe
                 init_stripe()
                 stripe.Subscription.cancel(subscription.stripe_subscription_id)
                 subscription_cancelled = True
@@ -2311,99 +2632,37 @@ def delete_customer(customer_id):
                 logger.error(f"Failed to cancel Stripe subscription: {e}")
                 # Continue with deletion even if Stripe cancellation fails
 
-        # Stop and remove containers with volume removal
-        if os.path.exists(customer_path):
-            result = subprocess.run(
-                ['docker', 'compose', 'down', '-v', '--remove-orphans'],
-                cwd=customer_path,
-                capture_output=True,
-                timeout=120
-            )
-            if result.returncode != 0:
-                logger.warning(f"Docker compose down failed: {result.stderr.decode()}")
-            
-            # Short delay to ensure volumes are unmounted
-            import time
-            time.sleep(2)
-            
-            # Change ownership of all files to current user before deletion
-            # This fixes permission issues with Docker-created root files
-            result = subprocess.run(
-                ['sudo', 'chmod', '-R', '777', customer_path],
-                capture_output=True,
-                timeout=30
-            )
-            if result.returncode != 0:
-                logger.warning(f"chmod failed: {result.stderr.decode()}")
-            
-            # Also fix individual problem files like license.txt
-            license_file = os.path.join(customer_path, 'license.txt')
-            if os.path.exists(license_file):
-                subprocess.run(['sudo', 'chmod', '777', license_file], capture_output=True)
-            
-            # Now remove the directory
-            result = subprocess.run(
-                ['sudo', 'rm', '-rf', customer_path],
-                capture_output=True,
-                timeout=60
-            )
-            if result.returncode != 0:
-                raise PermissionError(f"Failed to delete customer directory: {result.stderr.decode()}")
-            directory_deleted = True
-
-        # Remove Nginx config
-        nginx_available = f"/etc/nginx/sites-available/customer-{customer_id}.conf"
-        nginx_enabled = f"/etc/nginx/sites-enabled/customer-{customer_id}.conf"
-
-        if os.path.exists(nginx_enabled):
-            result = subprocess.run(['sudo', 'rm', '-f', nginx_enabled], capture_output=True)
-            if result.returncode != 0:
-                logger.warning(f"Failed to remove nginx enabled config: {result.stderr.decode()}")
-        if os.path.exists(nginx_available):
-            result = subprocess.run(['sudo', 'rm', '-f', nginx_available], capture_output=True)
-            if result.returncode != 0:
-                logger.warning(f"Failed to remove nginx available config: {result.stderr.decode()}")
-
-        # Reload nginx
-        result = subprocess.run(['sudo', 'systemctl', 'reload', 'nginx'], capture_output=True)
-        if result.returncode != 0:
-            logger.warning(f"Nginx reload failed: {result.stderr.decode()}")
-
-        # Always try to delete from database
+        conn = get_db_connection()
+        cursor = conn.cursor()
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            # Delete related records first (foreign key order)
-            cursor.execute("DELETE FROM invoices WHERE customer_id = %s", (customer_id,))
-            cursor.execute("DELETE FROM subscriptions WHERE customer_id = %s", (customer_id,))
-            cursor.execute("DELETE FROM provisioning_jobs WHERE customer_id = %s", (customer_id,))
-            cursor.execute("DELETE FROM monitoring_alerts WHERE customer_id = %s", (customer_id,))
-            cursor.execute("DELETE FROM monitoring_checks WHERE customer_id = %s", (customer_id,))
-            cursor.execute("DELETE FROM customer_monitoring_status WHERE customer_id = %s", (customer_id,))
-            cursor.execute("DELETE FROM customers WHERE id = %s", (customer_id,))
+            cursor.execute("UPDATE customers SET status = 'deleting' WHERE id = %s", (customer_id,))
             conn.commit()
+            marked_deleting = True
+        finally:
             cursor.close()
             conn.close()
-            db_deleted = True
-        except Exception as db_error:
-            logger.error(f"Database deletion failed: {db_error}")
-            raise
+
+        queue = get_provisioning_queue()
+        job = queue.enqueue_deletion(customer_id, customer.get_server())
+
+        invalidate_customer_list_cache()
 
         subscription_msg = ' and cancelled subscription' if subscription_cancelled else ''
         log_admin_action(admin.id, 'delete_customer', 'customer', customer_id,
-                        f'Deleted customer {email}{subscription_msg} and removed containers', request.remote_addr)
-        flash(f'Customer {email} and all associated resources deleted successfully.{" Stripe subscription cancelled." if subscription_cancelled else ""}', 'success')
+                        f'Queued deletion of customer {email}{subscription_msg} (job {job.id})', request.remote_addr)
+        flash(f'Customer {email} is being deleted.{" Stripe subscription cancelled." if subscription_cancelled else ""}', 'success')
     except Exception as e:
-        if directory_deleted and db_deleted:
-            log_admin_action(admin.id, 'delete_customer_partial', 'customer', customer_id,
-                            f'Deleted customer {email} but cleanup had issues: {str(e)}', request.remote_addr)
-            flash(f'Customer {email} was deleted but some cleanup steps failed: {str(e)}. Check logs for details.', 'warning')
-        elif directory_deleted:
-            log_admin_action(admin.id, 'delete_customer_directory_only', 'customer', customer_id,
-                            f'Deleted customer directory but database record remains: {str(e)}', request.remote_addr)
-            flash(f'Customer directory deleted but database record could not be removed: {str(e)}. Contact administrator.', 'error')
-        else:
-            flash(f'Error deleting customer: {str(e)}', 'error')
+        if marked_deleting:
+            # Deletion never got queued - restore the previous status
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("UPDATE customers SET status = %s WHERE id = %s", (previous_status, customer_id))
+                conn.commit()
+            finally:
+                cursor.close()
+                conn.close()
+        flash(f'Error deleting customer: {str(e)}', 'error')
 
     return redirect(url_for('admin.manage_customers'))
 
@@ -2459,7 +2718,7 @@ class ChangePasswordForm(FlaskForm):
 def admins():
     """List all admin users"""
     admin = get_current_admin()
-    admins = AdminUser.get_all()
+    admins = AdminUser.iter_all()
 
     return render_template('admin/admins.html',
                            admin=admin,
@@ -2487,7 +2746,7 @@ def new_admin():
             if form.password.data:
                 new_admin_user.set_password(form.password.data)
             else:
-                temp_password = ''.join(secrets.choice(string.ascii_letters + string.digits + '!@#$%^&*') for _ in range(16))
+                temp_password = generate_temp_password()
                 new_admin_user.set_password(temp_password)
                 flash(f'Password not provided. A temporary password has been generated and will need to be reset.', 'warning')
 
@@ -2616,24 +2875,30 @@ def reset_admin_password(admin_id):
         flash('Cannot reset password for inactive admin user.', 'error')
         return redirect(url_for('admin.admins'))
 
-    temp_password = ''.join(secrets.choice(string.ascii_letters + string.digits + '!@#$%^&*') for _ in range(16))
+    temp_password = generate_temp_password()
     admin_user.set_password(temp_password)
     admin_user.must_change_password = True
     admin_user.save()
 
+    # SMTP can take seconds, so delivery runs on the leads worker's 'emails'
+    # queue. The job carries the temporary password, so keep it only briefly.
     try:
-        from email_service import email_service
-        email_service.send_admin_password_reset_email(admin_user.email, admin_user.full_name, temp_password)
-        email_sent = True
+        get_rq_queue('emails').enqueue(
+            send_admin_password_reset_email_job,
+            admin_user.email, admin_user.full_name, temp_password,
+            retry=Retry(max=3, interval=[10, 60, 300]),
+            job_timeout=60, result_ttl=0, failure_ttl=86400
+        )
+        email_queued = True
     except Exception as e:
-        logger.error(f'Failed to send password reset email: {e}')
-        email_sent = False
+        logger.error(f'Failed to queue password reset email: {e}')
+        email_queued = False
 
     log_admin_action(admin.id, 'reset_admin_password', 'admin_user', admin_id,
-                   f'Reset password for {admin_user.email}' + (' (email sent)' if email_sent else ' (email failed)'), request.remote_addr)
+                   f'Reset password for {admin_user.email}' + (' (email queued)' if email_queued else ' (email failed)'), request.remote_addr)
 
-    if email_sent:
-        flash(f'Password reset email sent to {admin_user.email}.', 'success')
+    if email_queued:
+        flash(f'Password reset; email to {admin_user.email} queued for delivery.', 'success')
     else:
         flash(f'Password reset but email failed to send. Temporary password: {temp_password}', 'warning')
 
@@ -2697,6 +2962,20 @@ def force_password_change():
 # CMS Pages Management
 # =============================================================================
 
+def page_json_loads(text):
+    """Parse CMS page JSON (str or bytes), using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def page_json_dumps(value, indent=False):
+    """Serialize CMS page JSON to str, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else None).decode('utf-8')
+    return json.dumps(value, indent=2 if indent else None)
+
+
 @admin_bp.route('/pages')
 @super_admin_required
 def pages():
@@ -2732,7 +3011,7 @@ def page_edit(slug):
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("SELECT * FROM page_content WHERE page_slug = %s", (slug,))
+        cursor.execute("SELECT id, title, content, editor_markdown FROM page_content WHERE page_slug = %s", (slug,))
         page = cursor.fetchone()
         
         if not page:
@@ -2740,8 +3019,6 @@ def page_edit(slug):
             return redirect(url_for('admin.pages'))
         
         if request.method == 'POST':
-            import json
-
             raw_body = request.form.get('content_body', '')
             content_data, error_message = parse_page_editor_content(raw_body)
             if error_message:
@@ -2752,35 +3029,46 @@ def page_edit(slug):
                                        editor_content=raw_body,
                                        slug=slug)
 
-            content_json = json.dumps(content_data)
+            content_json = page_json_dumps(content_data)
             title = request.form.get('title', page['title'])
 
-            cursor.execute("""
-                UPDATE page_content 
-                SET title = %s, content = %s, updated_at = NOW()
-                WHERE id = %s
-            """, (title, content_json, page['id']))
-            conn.commit()
+            # Content update and version record commit together, or not at all
+            try:
+                cursor.execute("""
+                    UPDATE page_content 
+                    SET title = %s, content = %s, editor_markdown = %s, updated_at = NOW()
+                    WHERE id = %s
+                """, (title, content_json, raw_body, page['id']))
 
-            cursor.execute("""
-                INSERT INTO page_versions (page_id, content, changed_by_admin_id, change_summary)
-                VALUES (%s, %s, %s, %s)
-            """, (page['id'], content_json, admin.id, request.form.get('change_summary', 'Content updated')))
-            conn.commit()
+                cursor.execute("""
+                    INSERT INTO page_versions (page_id, content, changed_by_admin_id, change_summary)
+                    VALUES (%s, %s, %s, %s)
+                """, (page['id'], content_json, admin.id, request.form.get('change_summary', 'Content updated')))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                flash(f'Error saving page: {str(e)}', 'error')
+                return render_template('admin/page_edit.html',
+                                       admin=admin,
+                                       page=page,
+                                       editor_content=raw_body,
+                                       slug=slug)
 
+            invalidate_page_html_cache(slug)
             log_admin_action(admin.id, 'page_edit', 'page_content', page['id'],
                            f'Edited page: {slug}', request.remote_addr)
             flash(f'Page "{page["title"]}" saved successfully.', 'success')
 
             return redirect(url_for('admin.page_edit', slug=slug))
         
-        import json
-        if page['content'] and isinstance(page['content'], str):
-            page_content = json.loads(page['content'])
-        else:
-            page_content = page['content']
-
-        editor_content = serialize_page_content(page_content or {})
+        editor_content = page['editor_markdown']
+        if editor_content is None:
+            # Saved before editor_markdown existed, or rolled back since
+            if page['content'] and isinstance(page['content'], str):
+                page_content = page_json_loads(page['content'])
+            else:
+                page_content = page['content']
+            editor_content = serialize_page_content(page_content or {})
 
         return render_template('admin/page_edit.html',
                                admin=admin,
@@ -2802,13 +3090,14 @@ def page_preview(slug):
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("SELECT * FROM page_content WHERE page_slug = %s", (slug,))
+        # POST previews the submitted draft, so the stored content isn't needed
+        columns = 'id, title' if request.method == 'POST' else 'id, title, content'
+        cursor.execute(f"SELECT {columns} FROM page_content WHERE page_slug = %s", (slug,))
         page = cursor.fetchone()
 
         if not page:
             return jsonify({'error': 'Page not found'}), 404
 
-        import json
         if request.method == 'POST':
             raw_body = request.form.get('content_body', '')
             content_data, error_message = parse_page_editor_content(raw_body)
@@ -2816,13 +3105,19 @@ def page_preview(slug):
                 return jsonify({'success': False, 'error': error_message}), 400
             content_data['title'] = request.form.get('title', page['title'])
             page_content = content_data
+            content_json = None
         else:
+            # Stored content was written by page_json_dumps, so its text keys
+            # the HTML cache the same way a re-serialized copy would
             if page['content'] and isinstance(page['content'], str):
-                page_content = json.loads(page['content'])
+                content_json = page['content']
+                page_content = page_json_loads(content_json)
             else:
+                content_json = None
                 page_content = page['content']
 
-        preview_html = render_page_content(slug, page_content, preview=True)
+        preview_html = render_page_content(slug, page_content, preview=True,
+                                           content_json=content_json)
 
         return jsonify({
             'success': True,
@@ -2844,23 +3139,28 @@ def page_publish(slug):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT id, title FROM page_content WHERE page_slug = %s", (slug,))
-        page = cursor.fetchone()
+        # LAST_INSERT_ID(id) hands the matched row's id back as lastrowid, so
+        # the lookup and the update share one round trip. It is still set when
+        # the row was already in this state, unlike rowcount.
+        cursor.execute("""
+            UPDATE page_content 
+            SET is_published = TRUE, published_at = NOW(), updated_at = NOW(), id = LAST_INSERT_ID(id)
+            WHERE page_slug = %s
+        """, (slug,))
+        page_id = cursor.lastrowid
         
-        if not page:
+        if not page_id:
             flash('Page not found.', 'error')
             return redirect(url_for('admin.pages'))
-        
-        cursor.execute("""
-            UPDATE page_content 
-            SET is_published = TRUE, published_at = NOW(), updated_at = NOW()
-            WHERE id = %s
-        """, (page[0],))
         conn.commit()
         
-        log_admin_action(admin.id, 'page_publish', 'page_content', page[0],
+        cursor.execute("SELECT title FROM page_content WHERE id = %s", (page_id,))
+        title = cursor.fetchone()[0]
+        
+        invalidate_page_html_cache(slug)
+        log_admin_action(admin.id, 'page_publish', 'page_content', page_id,
                        f'Published page: {slug}', request.remote_addr)
-        flash(f'Page "{page[1]}" has been published.', 'success')
+        flash(f'Page "{title}" has been published.', 'success')
     finally:
         cursor.close()
         conn.close()
@@ -2878,23 +3178,25 @@ def page_unpublish(slug):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT id, title FROM page_content WHERE page_slug = %s", (slug,))
-        page = cursor.fetchone()
+        cursor.execute("""
+            UPDATE page_content 
+            SET is_published = FALSE, updated_at = NOW(), id = LAST_INSERT_ID(id)
+            WHERE page_slug = %s
+        """, (slug,))
+        page_id = cursor.lastrowid
         
-        if not page:
+        if not page_id:
             flash('Page not found.', 'error')
             return redirect(url_for('admin.pages'))
-        
-        cursor.execute("""
-            UPDATE page_content 
-            SET is_published = FALSE, updated_at = NOW()
-            WHERE id = %s
-        """, (page[0],))
         conn.commit()
         
-        log_admin_action(admin.id, 'page_unpublish', 'page_content', page[0],
+        cursor.execute("SELECT title FROM page_content WHERE id = %s", (page_id,))
+        title = cursor.fetchone()[0]
+        
+        invalidate_page_html_cache(slug)
+        log_admin_action(admin.id, 'page_unpublish', 'page_content', page_id,
                        f'Unpublished page: {slug}', request.remote_addr)
-        flash(f'Page "{page[1]}" has been unpublished.', 'success')
+        flash(f'Page "{title}" has been unpublished.', 'success')
     finally:
         cursor.close()
         conn.close()
@@ -2902,6 +3204,10 @@ def page_unpublish(slug):
     return redirect(url_for('admin.pages'))
 
 
+# Most recent versions listed on the page history screen
+PAGE_HISTORY_LIMIT = 200
+
+
 @admin_bp.route('/pages/<slug>/history')
 @super_admin_required
 def page_history(slug):
@@ -2912,26 +3218,26 @@ def page_history(slug):
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("SELECT * FROM page_content WHERE page_slug = %s", (slug,))
+        cursor.execute("SELECT id, title FROM page_content WHERE page_slug = %s", (slug,))
         page = cursor.fetchone()
         
         if not page:
             flash('Page not found.', 'error')
             return redirect(url_for('admin.pages'))
         
+        # Seconds use %S: a lowercase %s would be taken as a query parameter
         cursor.execute("""
-            SELECT pv.*, au.full_name as changed_by_name
+            SELECT pv.id, pv.page_id, pv.change_summary, pv.changed_by_admin_id,
+                   DATE_FORMAT(pv.created_at, '%Y-%m-%d %H:%i:%S') AS created_at,
+                   au.full_name AS changed_by_name
             FROM page_versions pv
             LEFT JOIN admin_users au ON pv.changed_by_admin_id = au.id
             WHERE pv.page_id = %s
             ORDER BY pv.created_at DESC
-        """, (page['id'],))
+            LIMIT %s
+        """, (page['id'], PAGE_HISTORY_LIMIT))
         versions = cursor.fetchall()
         
-        for v in versions:
-            if v['created_at']:
-                v['created_at'] = v['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-        
         return render_template('admin/page_history.html',
                                admin=admin,
                                page=page,
@@ -2959,7 +3265,7 @@ def page_rollback(slug, version_id):
             flash('Page not found.', 'error')
             return redirect(url_for('admin.pages'))
         
-        cursor.execute("SELECT * FROM page_versions WHERE id = %s AND page_id = %s", 
+        cursor.execute("SELECT content, created_at FROM page_versions WHERE id = %s AND page_id = %s", 
                       (version_id, page['id']))
         version = cursor.fetchone()
         
@@ -2969,7 +3275,7 @@ def page_rollback(slug, version_id):
         
         cursor.execute("""
             UPDATE page_content 
-            SET content = %s, updated_at = NOW()
+            SET content = %s, editor_markdown = NULL, updated_at = NOW()
             WHERE id = %s
         """, (version['content'], page['id']))
         
@@ -2980,10 +3286,12 @@ def page_rollback(slug, version_id):
               f'Rolback to version {version_id} from {version["created_at"]}'))
         conn.commit()
         
+        invalidate_page_html_cache(slug)
         log_admin_action(admin.id, 'page_rollback', 'page_content', page['id'],
                        f'Rolled back page {slug} to version {version_id}', request.remote_addr)
         flash(f'Page has been rolled back to version from {version["created_at"]}.', 'success')
     except Exception as e:
+        conn.rollback()
         flash(f'Error during rollback: {str(e)}', 'error')
     finally:
         cursor.close()
@@ -3006,12 +3314,21 @@ def api_page_content(slug):
         if not page:
             return jsonify({'error': 'Page not found'}), 404
         
-        import json
+        # Every page write bumps updated_at, so it versions the response.
+        # Answer a matching If-None-Match before decoding or encoding content.
+        etag = None
+        if page['updated_at']:
+            etag = f"{page['id']}-{int(page['updated_at'].timestamp())}"
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+        
         content = page['content']
         if isinstance(content, str):
-            content = json.loads(content)
+            content = page_json_loads(content)
         
-        return jsonify({
+        response = jsonify({
             'id': page['id'],
             'slug': page['page_slug'],
             'title': page['title'],
@@ -3020,6 +3337,9 @@ def api_page_content(slug):
             'published_at': page['published_at'].isoformat() if page['published_at'] else None,
             'updated_at': page['updated_at'].isoformat() if page['updated_at'] else None
         })
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
     finally:
         cursor.close()
         conn.close()
@@ -3029,16 +3349,124 @@ def api_page_content(slug):
 # Pricing Plans Management (Super Admin Only)
 # =============================================================================
 
+# Plan feature flags edited as checkboxes (form fields feature_<key>), in the
+# order they are stored
+PRICING_PLAN_FEATURE_KEYS = (
+    'daily_backups', 'email_support', 'premium_plugins', 'support_24_7',
+    'redis_cache', 'staging', 'sla_uptime', 'advanced_security',
+    'centralized_management', 'white_label', 'dedicated_support'
+)
+
+PRICING_PLANS_CACHE_KEY = 'pricing:plans:split'
+PRICING_PLANS_CACHE_TTL = 300
+# Active plans for the public /pricing page
+ACTIVE_PRICING_PLANS_CACHE_KEY = 'pricing:plans:active'
+ACTIVE_PRICING_PLANS_CACHE_TTL = 600
+
+
+def _pricing_plan_json_default(value):
+    """json.dumps fallback for PricingPlan fields (datetimes, Decimal prices)"""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _pricing_plans_from_rows(rows):
+    """Rebuild PricingPlan objects from rows cached as JSON"""
+    plans = []
+    for row in rows:
+        if row.get('price_monthly') is not None:
+            row['price_monthly'] = Decimal(str(row['price_monthly']))
+        for key in ('created_at', 'updated_at'):
+            if row.get(key):
+                row[key] = datetime.fromisoformat(row[key])
+        plans.append(PricingPlan(**row))
+    return plans
+
+
+def get_pricing_plans_by_platform():
+    """Return (woocommerce_plans, magento_plans), cached in Redis between edits"""
+    try:
+        cached = get_redis_connection().get(PRICING_PLANS_CACHE_KEY)
+        if cached:
+            data = json.loads(cached)
+            return (_pricing_plans_from_rows(data['woocommerce']),
+                    _pricing_plans_from_rows(data['magento']))
+    except Exception as e:
+        logger.warning(f"Pricing plan cache unavailable: {e}")
+
+    woocommerce_plans, magento_plans = [], []
+    for plan in PricingPlan.get_all():
+        if plan.platform == 'woocommerce':
+            woocommerce_plans.append(plan)
+        elif plan.platform == 'magento':
+            magento_plans.append(plan)
+
+    try:
+        payload = json.dumps({'woocommerce': [vars(plan) for plan in woocommerce_plans],
+                              'magento': [vars(plan) for plan in magento_plans]},
+                             default=_pricing_plan_json_default)
+        get_redis_connection().setex(PRICING_PLANS_CACHE_KEY, PRICING_PLANS_CACHE_TTL, payload)
+    except Exception as e:
+        logger.warning(f"Could not cache pricing plans: {e}")
+
+    return woocommerce_plans, magento_plans
+
+
+def get_active_pricing_plans():
+    """Return PricingPlan.get_all_active(), cached in Redis between edits"""
+    try:
+        cached = get_redis_connection().get(ACTIVE_PRICING_PLANS_CACHE_KEY)
+        if cached:
+            return _pricing_plans_from_rows(json.loads(cached))
+    except Exception as e:
+        logger.warning(f"Pricing plan cache unavailable: {e}")
+
+    plans = PricingPlan.get_all_active()
+
+    try:
+        payload = json.dumps([vars(plan) for plan in plans], default=_pricing_plan_json_default)
+        get_redis_connection().setex(ACTIVE_PRICING_PLANS_CACHE_KEY, ACTIVE_PRICING_PLANS_CACHE_TTL, payload)
+    except Exception as e:
+        logger.warning(f"Could not cache pricing plans: {e}")
+
+    return plans
+
+
+def get_pricing_plan(plan_id):
+    """Look up a plan (active or not) in the cached plan lists.
+
+    For display only - code that bills against the plan should read it with
+    PricingPlan.get_by_id() so Stripe ids are current.
+    """
+    woocommerce_plans, magento_plans = get_pricing_plans_by_platform()
+    for plan in woocommerce_plans + magento_plans:
+        if plan.id == plan_id:
+            return plan
+    return PricingPlan.get_by_id(plan_id)
+
+
+def get_pricing_plan_by_slug(slug):
+    """Look up a plan by slug in the cached plan lists (display only, as above)"""
+    woocommerce_plans, magento_plans = get_pricing_plans_by_platform()
+    for plan in woocommerce_plans + magento_plans:
+        if plan.slug == slug:
+            return plan
+    return PricingPlan.get_by_slug(slug)
+
+
+def invalidate_pricing_plans_cache():
+    """Drop the cached pricing plan lists after a plan changes"""
+    try:
+        get_redis_connection().delete(PRICING_PLANS_CACHE_KEY, ACTIVE_PRICING_PLANS_CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Could not invalidate pricing plan cache: {e}")
+
+
 @admin_bp.route('/pricing')
 @super_admin_required
 def pricing_plans():
     """List all pricing plans"""
     admin = get_current_admin()
-    plans = PricingPlan.get_all()
-
-    # Group by platform
-    woocommerce_plans = [p for p in plans if p.platform == 'woocommerce']
-    magento_plans = [p for p in plans if p.platform == 'magento']
+    woocommerce_plans, magento_plans = get_pricing_plans_by_platform()
 
     return render_template('admin/pricing_plans.html',
                            admin=admin,
@@ -3071,23 +3499,21 @@ def pricing_plan_edit(plan_id):
             plan.display_order = int(request.form.get('display_order', plan.display_order))
             plan.is_active = request.form.get('is_active') == 'on'
 
-            # Update features from checkboxes
-            feature_keys = [
-                'daily_backups', 'email_support', 'premium_plugins', 'support_24_7',
-                'redis_cache', 'staging', 'sla_uptime', 'advanced_security',
-                'centralized_management', 'white_label', 'dedicated_support'
-            ]
-            plan.features = {key: request.form.get(f'feature_{key}') == 'on' for key in feature_keys}
+            # Update features from checkboxes, scanning the submitted form once
+            checked = {key[len('feature_'):] for key, value in request.form.items()
+                       if key.startswith('feature_') and value == 'on'}
+            plan.features = {key: key in checked for key in PRICING_PLAN_FEATURE_KEYS}
 
             plan.update()
+            invalidate_pricing_plans_cache()
 
             # Sync to Stripe if price changed
             price_changed = old_price != plan.price_monthly
             if price_changed and plan.stripe_price_id:
                 try:
-                    from stripe_integration.pricing import sync_price_to_stripe
                     # Stripe prices are immutable - must create new price when amount changes
                     result = sync_price_to_stripe(plan.id, create_new=True)
+                    invalidate_pricing_plans_cache()
                     if result['success']:
                         log_admin_action(admin.id, 'pricing_plan_edit', f"Updated pricing plan: {plan.name} (ID: {plan.id}) - synced to Stripe")
                         flash(f'Pricing plan "{plan.name}" updated and synced to Stripe.', 'success')
@@ -3122,7 +3548,6 @@ def pricing_plan_edit(plan_id):
 def api_pricing_sync_options():
     """Get Stripe sync options for all pricing plans"""
     try:
-        from stripe_integration.pricing import get_all_pricing_sync_status
         result = get_all_pricing_sync_status()
         return jsonify(result)
     except Exception as e:
@@ -3134,9 +3559,9 @@ def api_pricing_sync_options():
 def api_pricing_sync(plan_id):
     """Sync pricing plan to Stripe"""
     try:
-        from stripe_integration.pricing import sync_price_to_stripe
         create_new = request.json.get('create_new', False) if request.json else False
         result = sync_price_to_stripe(plan_id, create_new)
+        invalidate_pricing_plans_cache()
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -3148,8 +3573,6 @@ def api_pricing_sync(plan_id):
 
 def serialize_page_content(content):
     """Convert structured page content into editor markdown."""
-    import json
-
     if not content:
         return ''
 
@@ -3161,7 +3584,7 @@ def serialize_page_content(content):
                 if isinstance(value, (list, dict)):
                     lines.append(f"## section: {section}.{key} (json)")
                     lines.append("```json")
-                    lines.append(json.dumps(value, indent=2))
+                    lines.append(page_json_dumps(value, indent=True))
                     lines.append("```")
                 else:
                     lines.append(f"## section: {section}.{key}")
@@ -3174,42 +3597,44 @@ def serialize_page_content(content):
         else:
             lines.append(f"## section: {section} (json)")
             lines.append("```json")
-            lines.append(json.dumps(section_data, indent=2))
+            lines.append(page_json_dumps(section_data, indent=True))
             lines.append("```")
             lines.append('')
 
     return "\n".join(lines).strip() + "\n"
 
 
+# "## section: <name>" headers in the page editor markdown
+PAGE_SECTION_HEADER_RE = re.compile(r'^##\s+section:\s*(.+)$', re.MULTILINE)
+
+
 def parse_page_editor_content(raw_text):
     """Parse editor markdown into structured page content."""
-    import json
-
     if not raw_text or not raw_text.strip():
         return {}, 'Editor is empty. Add at least one section header.'
 
-    pattern = re.compile(r'^##\s+section:\s*(.+)$', re.MULTILINE)
-    matches = list(pattern.finditer(raw_text))
-    if not matches:
+    # Capturing split gives [preamble, header1, body1, header2, body2, ...]
+    parts = PAGE_SECTION_HEADER_RE.split(raw_text)
+    if len(parts) == 1:
         return {}, "No section headers found. Use '## section: <name>' to define sections."
 
     content = {}
-    for index, match in enumerate(matches):
-        header = match.group(1).strip()
-        start = match.end()
-        end = matches[index + 1].start() if index + 1 < len(matches) else len(raw_text)
-        body = raw_text[start:end].strip('\n').strip()
+    for index in range(1, len(parts), 2):
+        header = parts[index].strip()
+        body = parts[index + 1].strip()
 
         is_json = header.lower().endswith('(json)')
         if is_json:
             header = header[:-6].strip()
             json_text = body
             if json_text.startswith('```'):
-                lines = json_text.splitlines()
-                if len(lines) >= 2 and lines[-1].strip().startswith('```'):
-                    json_text = "\n".join(lines[1:-1]).strip()
+                # Drop the opening ```json line and a closing ``` line
+                opening_end = json_text.find('\n')
+                closing_start = json_text.rfind('\n')
+                if opening_end != -1 and json_text[closing_start + 1:].lstrip().startswith('```'):
+                    json_text = json_text[opening_end + 1:closing_start].strip()
             try:
-                value = json.loads(json_text) if json_text else {}
+                value = page_json_loads(json_text) if json_text else {}
             except json.JSONDecodeError as exc:
                 return {}, f"Invalid JSON in section '{header}': {exc.msg}."
         else:
@@ -3223,11 +3648,29 @@ def parse_page_editor_content(raw_text):
 
     return content, None
 
-def render_page_content(slug, content, preview=False):
-    """Render page content to HTML based on page type"""
-    from flask import render_template_string
-    
-    base_template = '''
+
+# Link schemes allowed in CMS-supplied hrefs; anything else (javascript:,
+# data:, ...) is replaced so page content can't inject script via a link
+SAFE_LINK_SCHEMES = {'', 'http', 'https'}
+
+
+def safe_page_link(url):
+    """Return a CMS link if its scheme is http(s) or relative, else '#'"""
+    url = str(url).strip()
+    try:
+        scheme = urlparse(url).scheme.lower()
+    except ValueError:
+        return '#'
+    return url if scheme in SAFE_LINK_SCHEMES else '#'
+
+
+# Jinja environment for the CMS page templates below. Autoescaping matches
+# render_template_string(), which the page shell previously went through.
+PAGE_TEMPLATE_ENV = Environment(autoescape=True)
+PAGE_TEMPLATE_ENV.filters['safe_link'] = safe_page_link
+
+# Page shell for render_page_content(), compiled once at import
+PAGE_BASE_TEMPLATE = PAGE_TEMPLATE_ENV.from_string('''
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -3364,71 +3807,110 @@ def render_page_content(slug, content, preview=False):
         </footer>
     </body>
     </html>
-    '''
-    
-    content_html = ''
-    
-    if slug == 'home' and content:
-        content_html = _render_homepage(content)
-    elif slug == 'pricing' and content:
-        content_html = _render_pricing_page(content)
-    elif slug == 'features' and content:
-        content_html = _render_features_page(content)
-    elif slug == 'about' and content:
-        content_html = _render_about_page(content)
-    elif slug == 'contact' and content:
-        content_html = _render_contact_page(content)
+    ''')
+
+
+# Rendered page HTML is cached in Redis by slug and content hash. Each slug has
+# a version counter that edits/publishes/rollbacks bump to drop its entries.
+PAGE_HTML_CACHE_TTL = 3600
+
+
+def page_html_version_key(slug):
+    """Redis key holding the cache version for a page's rendered HTML"""
+    return f"page:html:{slug}:version"
+
+
+def invalidate_page_html_cache(slug):
+    """Invalidate cached rendered HTML for a page after it changes"""
+    try:
+        get_redis_connection().incr(page_html_version_key(slug))
+    except Exception as e:
+        logger.warning(f"Could not invalidate page HTML cache for {slug}: {e}")
+
+
+def render_page_content(slug, content, preview=False, content_json=None):
+    """Render page content to HTML, served from Redis when already rendered.
+
+    content_json is the stored JSON text of content, when the caller has it;
+    it is hashed as-is for the cache key instead of re-serializing content.
+    """
+    content = content or {}
+    cache_key = None
+    try:
+        redis_conn = get_redis_connection()
+        version = (redis_conn.get(page_html_version_key(slug)) or b'0').decode()
+        if content_json is None:
+            content_json = page_json_dumps(content)
+        digest = hashlib.blake2b(content_json.encode(), digest_size=16).hexdigest()
+        cache_key = f"page:html:{slug}:{version}:{digest}:{int(preview)}"
+
+        cached = redis_conn.get(cache_key)
+        if cached:
+            return cached.decode()
+    except Exception as e:
+        logger.warning(f"Page HTML cache unavailable: {e}")
+
+    html = _render_page_html(slug, content, preview)
+
+    if cache_key:
+        try:
+            redis_conn.setex(cache_key, PAGE_HTML_CACHE_TTL, html)
+        except Exception as e:
+            logger.warning(f"Could not cache page HTML for {slug}: {e}")
+
+    return html
+
+
+def _render_page_html(slug, content, preview=False):
+    """Render page content to HTML based on page type"""
+    renderer = PAGE_RENDERERS.get(slug)
+    if renderer and content:
+        content_html = renderer(content)
     else:
-        content_html = f'<div class="container"><h1>{content.get("title", slug)}</h1><p>Content placeholder for {slug}</p></div>'
-    
-    return render_template_string(base_template, title=content.get('title', slug), content_html=content_html, preview=preview)
+        content_html = Markup(PLACEHOLDER_FRAGMENT.render(title=content.get('title', slug), slug=slug))
 
+    return PAGE_BASE_TEMPLATE.render(title=content.get('title', slug), content_html=content_html, preview=preview)
 
-def _render_homepage(content):
-    hero = content.get('hero', {})
-    stats = content.get('stats', {})
-    cta = content.get('cta', {})
-    
-    return f'''
+
+# Per-page content fragments, compiled once alongside PAGE_BASE_TEMPLATE. CMS
+# values are autoescaped; the rendered fragment is returned as Markup so the
+# page shell inserts it as HTML.
+HOMEPAGE_FRAGMENT = PAGE_TEMPLATE_ENV.from_string('''
     <div class="container">
         <section class="hero">
-            <h1>{hero.get("headline", "")}</h1>
-            <p>{hero.get("subheadline", "")}</p>
-            <a href="{hero.get("cta_link", "/signup")}" class="btn">{hero.get("cta_text", "Get Started")}</a>
+            <h1>{{ hero.get("headline", "") }}</h1>
+            <p>{{ hero.get("subheadline", "") }}</p>
+            <a href="{{ hero.get("cta_link", "/signup")|safe_link }}" class="btn">{{ hero.get("cta_text", "Get Started") }}</a>
         </section>
         
         <section class="stats">
             <div class="stat">
-                <div class="stat-value">{stats.get("stores_count", "100+")}</div>
+                <div class="stat-value">{{ stats.get("stores_count", "100+") }}</div>
                 <div class="stat-label">Active Stores</div>
             </div>
             <div class="stat">
-                <div class="stat-value">{stats.get("uptime", "99.9%")}</div>
+                <div class="stat-value">{{ stats.get("uptime", "99.9%") }}</div>
                 <div class="stat-label">Uptime SLA</div>
             </div>
             <div class="stat">
-                <div class="stat-value">{stats.get("hours_saved", "5000+")}</div>
+                <div class="stat-value">{{ stats.get("hours_saved", "5000+") }}</div>
                 <div class="stat-label">Dev Hours Saved</div>
             </div>
         </section>
         
         <section class="cta">
-            <h2>{cta.get("headline", "Ready to Scale?")}</h2>
-            <p>{cta.get("subheadline", "")}</p>
-            <a href="{cta.get("button_link", "/signup")}" class="btn">{cta.get("button_text", "Get Started")}</a>
+            <h2>{{ cta.get("headline", "Ready to Scale?") }}</h2>
+            <p>{{ cta.get("subheadline", "") }}</p>
+            <a href="{{ cta.get("button_link", "/signup")|safe_link }}" class="btn">{{ cta.get("button_text", "Get Started") }}</a>
         </section>
     </div>
-    '''
-
+    ''')
 
-def _render_pricing_page(content):
-    header = content.get('header', {})
-    
-    return f'''
+PRICING_FRAGMENT = PAGE_TEMPLATE_ENV.from_string('''
     <div class="container">
         <section class="hero">
-            <h1>{header.get("headline", "")}</h1>
-            <p>{header.get("subheadline", "")}</p>
+            <h1>{{ header.get("headline", "") }}</h1>
+            <p>{{ header.get("subheadline", "") }}</p>
         </section>
         
         <div style="text-align: center; padding: 40px;">
@@ -3436,46 +3918,46 @@ def _render_pricing_page(content):
             <p style="color: var(--text-tertiary); margin-top: 16px;">Edit pricing content in the CMS.</p>
         </div>
     </div>
-    '''
-
+    ''')
 
-def _render_features_page(content):
-    hero = content.get('hero', {})
-    
-    return f'''
+# Features, about and contact pages share the same hero-only layout
+HERO_FRAGMENT = PAGE_TEMPLATE_ENV.from_string('''
     <div class="container">
         <section class="hero">
-            <h1>{hero.get("headline", "")}</h1>
-            <p>{hero.get("subheadline", "")}</p>
+            <h1>{{ hero.get("headline", "") }}</h1>
+            <p>{{ hero.get("subheadline", "") }}</p>
         </section>
     </div>
-    '''
+    ''')
 
+PLACEHOLDER_FRAGMENT = PAGE_TEMPLATE_ENV.from_string(
+    '<div class="container"><h1>{{ title }}</h1><p>Content placeholder for {{ slug }}</p></div>'
+)
 
-def _render_about_page(content):
-    hero = content.get('hero', {})
-    
-    return f'''
-    <div class="container">
-        <section class="hero">
-            <h1>{hero.get("headline", "")}</h1>
-            <p>{hero.get("subheadline", "")}</p>
-        </section>
-    </div>
-    '''
 
+def _render_homepage(content):
+    return Markup(HOMEPAGE_FRAGMENT.render(hero=content.get('hero', {}),
+                                           stats=content.get('stats', {}),
+                                           cta=content.get('cta', {})))
 
-def _render_contact_page(content):
-    hero = content.get('hero', {})
 
-    return f'''
-    <div class="container">
-        <section class="hero">
-            <h1>{hero.get("headline", "")}</h1>
-            <p>{hero.get("subheadline", "")}</p>
-        </section>
-    </div>
-    '''
+def _render_pricing_page(content):
+    return Markup(PRICING_FRAGMENT.render(header=content.get('header', {})))
+
+
+def _render_hero_page(content):
+    return Markup(HERO_FRAGMENT.render(hero=content.get('hero', {})))
+
+
+# Slug -> content renderer used by _render_page_html(); slugs without an entry
+# get the placeholder layout
+PAGE_RENDERERS = {
+    'home': _render_homepage,
+    'pricing': _render_pricing_page,
+    'features': _render_hero_page,
+    'about': _render_hero_page,
+    'contact': _render_hero_page,
+}
 
 
 # =============================================================================
@@ -9,9 +9,8 @@ import re
 import logging
 from datetime import datetime
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 
-import uuid
-import mimetypes
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_file, abort, g
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
@@ -19,18 +18,24 @@ from flask_wtf.csrf import CSRFProtect, CSRFError
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
+from markupsafe import Markup
 from wtforms import StringField, PasswordField, SelectField, SubmitField, HiddenField, TextAreaField
 from werkzeug.utils import secure_filename
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
 from dotenv import load_dotenv
 import redis
+import stripe
 import time
+import subprocess
+import socket
+import ssl
+import urllib.request
 
 # Add provisioning module to path
 sys.path.insert(0, '/opt/shophosting/provisioning')
 
-from models import Customer, PortManager, PricingPlan, Subscription, Invoice, init_db_pool, get_db_connection
-from models import Ticket, TicketMessage, TicketAttachment, TicketCategory, ConsultationAppointment
+from models import Customer, PortManager, PricingPlan, Subscription, init_db_pool, get_db_connection
+from models import Ticket, TicketMessage, TicketAttachment, ConsultationAppointment
 from models import StagingEnvironment, StagingPortManager
 from models import CustomerBackupJob
 from models import Customer2FASettings, CustomerLoginHistory, CustomerVerificationToken
@@ -45,7 +50,16 @@ import io
 from enqueue_provisioning import ProvisioningQueue
 from stripe_integration import init_stripe, create_checkout_session, process_webhook, create_portal_session
 from stripe_integration.checkout import get_checkout_session
+from stripe_integration.config import get_stripe_config, is_stripe_configured
 from email_utils import send_contact_notification, send_consultation_confirmation, send_consultation_notification_to_sales
+from json_provider import init_json_provider
+from attachments import TICKET_UPLOAD_PATH, TICKET_ATTACHMENT_MIME_EXTENSIONS
+from attachments import guess_attachment_type, send_ticket_attachment
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional; only needed for REQUEST_PROFILING
+    Profiler = None
 
 # Load environment variables
 load_dotenv('/opt/shophosting/.env')
@@ -119,6 +133,9 @@ app = Flask(__name__)
 # Allow URLs with or without trailing slashes to work the same
 app.url_map.strict_slashes = False
 
+# Encode jsonify() responses with orjson when available
+init_json_provider(app)
+
 # Secret key - must be set in environment
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 if not app.config['SECRET_KEY']:
@@ -265,6 +282,34 @@ limiter = Limiter(
 )
 
 
+# Server-side sessions (optional): with SESSION_BACKEND=redis the cookie only
+# carries a session id and the data lives in Redis next to the rate limits.
+# Needs Flask-Session; falls back to signed cookie sessions without it.
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cookie').lower()
+
+
+def init_redis_sessions(flask_app, redis_client):
+    """Store sessions in Redis via Flask-Session; False if it isn't installed"""
+    try:
+        from flask_session import Session
+    except ImportError:
+        logger.warning("SESSION_BACKEND=redis but Flask-Session is not installed; using cookie sessions")
+        return False
+
+    flask_app.config['SESSION_TYPE'] = 'redis'
+    flask_app.config['SESSION_REDIS'] = redis_client
+    flask_app.config['SESSION_KEY_PREFIX'] = 'session:'
+    # Keep browser-session cookies. Flask-Session still writes every Redis
+    # entry with a TTL of PERMANENT_SESSION_LIFETIME, permanent or not.
+    flask_app.config['SESSION_PERMANENT'] = False
+    Session(flask_app)
+    return True
+
+
+if SESSION_BACKEND == 'redis':
+    init_redis_sessions(app, redis.from_url(redis_url, socket_connect_timeout=2))
+
+
 @app.errorhandler(429)
 def ratelimit_handler(e):
     """Handle rate limit exceeded"""
@@ -291,6 +336,17 @@ def ratelimit_handler(e):
 # Session idle timeout (30 minutes)
 SESSION_IDLE_TIMEOUT = int(os.getenv('SESSION_IDLE_TIMEOUT', '1800'))  # 30 minutes default
 
+# Activity timestamps are only rewritten this often; every session write
+# re-signs the cookie and adds a Set-Cookie header to the response. Idle
+# timeouts can fire up to this many seconds early.
+SESSION_ACTIVITY_WRITE_INTERVAL = 60
+
+
+def _touch_session_activity(key, now):
+    """Record activity under key, at most once per SESSION_ACTIVITY_WRITE_INTERVAL"""
+    if now - session.get(key, 0) >= SESSION_ACTIVITY_WRITE_INTERVAL:
+        session[key] = now
+
 
 @app.before_request
 def check_session_timeout():
@@ -327,7 +383,7 @@ def check_session_timeout():
                 if request.endpoint and request.endpoint.startswith('admin.'):
                     return redirect(url_for('admin.login'))
                 return redirect(url_for('login'))
-        session['last_activity'] = time.time()
+        _touch_session_activity('last_activity', time.time())
 
     # Check for admin session timeout - only on admin routes
     # This prevents customers from being redirected to admin login when they have
@@ -349,7 +405,7 @@ def check_session_timeout():
                     session.pop('admin_last_activity', None)
                     flash('Your admin session has expired due to inactivity. Please log in again.', 'info')
                     return redirect(url_for('admin.login'))
-            session['admin_last_activity'] = time.time()
+            _touch_session_activity('admin_last_activity', time.time())
 
 
 @app.before_request
@@ -369,6 +425,31 @@ def log_request_info():
         )
 
 
+# Sampling profiler for slow pages (e.g. /signup?profile=1). Only admins
+# get a trace, and only when REQUEST_PROFILING is on and pyinstrument is
+# installed; the HTML report replaces the normal response.
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', 'false').lower() == 'true'
+
+
+@app.before_request
+def start_request_profiler():
+    """Start pyinstrument for admins who pass ?profile=1"""
+    if (REQUEST_PROFILING and Profiler is not None
+            and request.args.get('profile') and session.get('admin_user_id')):
+        g.profiler = Profiler()
+        g.profiler.start()
+
+
+@app.after_request
+def stop_request_profiler(response):
+    """Swap the response for the profiler report when one was started"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    return app.response_class(profiler.output_html(), mimetype='text/html')
+
+
 @app.after_request
 def log_response_info(response):
     """Log response information for failed requests"""
@@ -406,6 +487,8 @@ init_stripe()
 
 # Register admin blueprint
 from admin import admin_bp
+from admin.routes import get_active_pricing_plans, get_pricing_plan, get_pricing_plan_by_slug
+from admin.routes import get_ticket_categories, get_ticket_category
 app.register_blueprint(admin_bp, url_prefix='/admin')
 
 # Register admin billing blueprint
@@ -465,25 +548,28 @@ def load_user(user_id):
     return Customer.get_by_id(int(user_id))
 
 
+def get_current_customer():
+    """The logged-in Customer that load_user() already fetched this request"""
+    return current_user._get_current_object()
+
+
 # =============================================================================
 # Custom Validators
 # =============================================================================
 
+# Input formats checked by the validators and routes below, compiled once
+DOMAIN_RE = re.compile(r'^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?(\.[a-z]{2,})+$')
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Restic snapshot IDs are hex strings (8-64 chars for short/full IDs)
+SNAPSHOT_ID_RE = re.compile(r'^[a-f0-9]{8,64}$')
+
+
 def validate_domain(form, field):
     """Validate domain format"""
     domain = field.data.lower().strip()
     # Basic domain validation
-    pattern = r'^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?(\.[a-z]{2,})+$'
-    if not re.match(pattern, domain):
+    if not DOMAIN_RE.match(domain):
         raise ValidationError('Please enter a valid domain name (e.g., mystore.com)')
-    if Customer.domain_exists(domain):
-        raise ValidationError('This domain is already registered')
-
-
-def validate_email_unique(form, field):
-    """Check if email is already registered"""
-    if Customer.email_exists(field.data):
-        raise ValidationError('This email is already registered')
 
 
 # =============================================================================
@@ -495,8 +581,7 @@ class SignupForm(FlaskForm):
     email = StringField('Email', validators=[
         DataRequired(),
         Email(),
-        Length(max=255),
-        validate_email_unique
+        Length(max=255)
     ])
     password = PasswordField('Password', validators=[
         DataRequired(),
@@ -522,6 +607,26 @@ class SignupForm(FlaskForm):
     plan_slug = HiddenField('Plan')
     submit = SubmitField('Continue to Payment')
 
+    def validate(self, extra_validators=None):
+        """Run field validators, then check email and domain are unused in one query"""
+        valid = super().validate(extra_validators)
+
+        check_email = not self.email.errors and bool(self.email.data)
+        check_domain = not self.domain.errors and bool(self.domain.data)
+        if not (check_email or check_domain):
+            return valid
+
+        email_taken, domain_taken = Customer.signup_conflicts(
+            self.email.data if check_email else None,
+            self.domain.data.lower().strip() if check_domain else None)
+        if check_email and email_taken:
+            self.email.errors.append('This email is already registered')
+            valid = False
+        if check_domain and domain_taken:
+            self.domain.errors.append('This domain is already registered')
+            valid = False
+        return valid
+
 
 class LoginForm(FlaskForm):
     """Customer login form"""
@@ -553,43 +658,62 @@ class TicketReplyForm(FlaskForm):
     submit = SubmitField('Send Reply')
 
 
-# Ticket attachment upload path
-TICKET_UPLOAD_PATH = '/var/customers/tickets'
-
-
 # =============================================================================
 # Routes - Public
 # =============================================================================
 
+# Marketing pages are the same for every visitor apart from base.html (CSP
+# nonce, login state, flashes), so their own blocks are rendered once per
+# process and only the shell is rendered per request.
+STATIC_PAGE_BLOCKS = ('title', 'extra_css', 'content')
+
+_static_page_blocks = {}
+
+
+def render_static_page(template_name):
+    """render_template() for a page whose blocks don't depend on the request"""
+    blocks = _static_page_blocks.get(template_name)
+    if blocks is None:
+        template = app.jinja_env.get_template(template_name)
+        context = template.new_context()
+        blocks = {name: Markup(''.join(template.blocks[name](context)))
+                  for name in STATIC_PAGE_BLOCKS if name in template.blocks}
+        if not app.debug:
+            _static_page_blocks[template_name] = blocks
+    return render_template('static_page.html', static_blocks=blocks)
+
+
 @app.route('/')
 def index():
     """Landing page"""
-    return render_template('index.html')
+    return render_static_page('index.html')
 
 
 @app.route('/pricing')
 def pricing():
     """Pricing page - display all plans"""
-    plans = PricingPlan.get_all_active()
+    # Only the plan query is cached: the rendered page carries per-visitor
+    # login state and CSRF tokens
+    plans = get_active_pricing_plans()
     return render_template('pricing.html', plans=plans)
 
 
 @app.route('/features')
 def features():
     """Features page"""
-    return render_template('features.html')
+    return render_static_page('features.html')
 
 
 @app.route('/about')
 def about():
     """About us page"""
-    return render_template('about.html')
+    return render_static_page('about.html')
 
 
 @app.route('/contact')
 def contact():
     """Contact us page"""
-    return render_template('contact.html')
+    return render_static_page('contact.html')
 
 
 @app.route('/contact', methods=['POST'])
@@ -680,6 +804,31 @@ def schedule_consultation():
         return jsonify({'success': False, 'message': 'An error occurred. Please try again.'}), 500
 
 
+# Signup only needs to know whether any port is free; cache the usage briefly
+# per process instead of scanning customers on every page view. Allocation
+# itself always checks the database.
+PORT_USAGE_CACHE_TTL = 10
+
+_port_usage_cache = None  # (expires_at, usage)
+
+
+def get_cached_port_usage():
+    """PortManager.get_port_usage(), reused for PORT_USAGE_CACHE_TTL seconds"""
+    global _port_usage_cache
+    cached = _port_usage_cache
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    usage = PortManager.get_port_usage()
+    _port_usage_cache = (time.monotonic() + PORT_USAGE_CACHE_TTL, usage)
+    return usage
+
+
+def invalidate_port_usage_cache():
+    """Drop the cached port usage after a port is taken"""
+    global _port_usage_cache
+    _port_usage_cache = None
+
+
 @app.route('/signup', methods=['GET', 'POST'])
 @app.route('/signup/<plan_slug>', methods=['GET', 'POST'])
 @limiter.limit("30 per hour", error_message="Too many signup attempts. Please try again later.")
@@ -692,7 +841,10 @@ def signup(plan_slug=None):
     plan_slug = plan_slug or request.args.get('plan')
     plan = None
     if plan_slug:
-        plan = PricingPlan.get_by_slug(plan_slug)
+        # A submitted signup bills against the plan, so read its Stripe price
+        # id from the row rather than the cached plan lists
+        plan = (PricingPlan.get_by_slug(plan_slug) if request.method == 'POST'
+                else get_pricing_plan_by_slug(plan_slug))
 
     # Redirect to pricing if no valid plan selected
     if not plan:
@@ -711,12 +863,19 @@ def signup(plan_slug=None):
     form.plan_slug.data = plan_slug
 
     # Check port availability
-    port_usage = PortManager.get_port_usage()
+    port_usage = get_cached_port_usage()
     if port_usage['available'] == 0:
         flash('We are currently at capacity. Please try again later.', 'warning')
         return render_template('signup.html', form=form, plan=plan, ports_available=False)
 
     if form.validate_on_submit():
+        # Check the plan can be bought before allocating a port or writing a
+        # customer row that would only be left behind
+        if not plan.stripe_price_id:
+            logger.error(f"Plan {plan.slug} missing Stripe price ID")
+            flash('This plan is not available for purchase yet. Please contact support.', 'error')
+            return render_template('signup.html', form=form, plan=plan, ports_available=True)
+
         try:
             # Get next available port
             web_port = PortManager.get_next_available_port()
@@ -736,15 +895,10 @@ def signup(plan_slug=None):
             )
             customer.set_password(form.password.data)
             customer.save()
+            invalidate_port_usage_cache()
 
             logger.info(f"New customer signup (pending payment): {customer.email} - {customer.domain}")
 
-            # Check if plan has Stripe price configured
-            if not plan.stripe_price_id:
-                logger.error(f"Plan {plan.slug} missing Stripe price ID")
-                flash('This plan is not available for purchase yet. Please contact support.', 'error')
-                return render_template('signup.html', form=form, plan=plan, ports_available=True)
-
             # Create Stripe Checkout Session
             try:
                 checkout_session = create_checkout_session(customer, plan)
@@ -1032,6 +1186,44 @@ def auth_2fa_recovery_verify():
 # Stripe Checkout Routes
 # =============================================================================
 
+# Checkout Sessions don't change once complete, so the success page caches the
+# one field it needs and a refresh skips the Stripe round trip
+CHECKOUT_SESSION_CACHE_TTL = 300
+
+_redis_client = None
+
+
+def get_redis_client():
+    """Shared Redis client for app-level caches (same server as the limiter)"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(redis_url, socket_connect_timeout=2)
+    return _redis_client
+
+
+def get_checkout_customer_id(session_id):
+    """Return a Checkout Session's client_reference_id, cached in Redis"""
+    cache_key = f"checkout:session:{session_id}:customer"
+    try:
+        cached = get_redis_client().get(cache_key)
+        if cached:
+            return cached.decode()
+    except Exception as e:
+        logger.warning(f"Checkout session cache unavailable: {e}")
+
+    checkout_session = get_checkout_session(session_id)
+    if not checkout_session:
+        return None
+
+    customer_id = checkout_session.get('client_reference_id')
+    if customer_id:
+        try:
+            get_redis_client().setex(cache_key, CHECKOUT_SESSION_CACHE_TTL, customer_id)
+        except Exception as e:
+            logger.warning(f"Could not cache checkout session {session_id}: {e}")
+    return customer_id
+
+
 @app.route('/checkout/success')
 def checkout_success():
     """Handle successful checkout - display success page"""
@@ -1040,17 +1232,15 @@ def checkout_success():
     plan = None
 
     if session_id:
-        # Retrieve session to get customer info
-        checkout_session = get_checkout_session(session_id)
-        if checkout_session:
-            customer_id = checkout_session.get('client_reference_id')
-            if customer_id:
-                customer = Customer.get_by_id(int(customer_id))
-                if customer and customer.plan_id:
-                    plan = PricingPlan.get_by_id(customer.plan_id)
-                # Log the user in
-                if customer:
-                    login_user(customer)
+        # Look up the customer the checkout was created for
+        customer_id = get_checkout_customer_id(session_id)
+        if customer_id:
+            customer = Customer.get_by_id(int(customer_id))
+            if customer and customer.plan_id:
+                plan = get_pricing_plan(customer.plan_id)
+            # Log the user in
+            if customer:
+                login_user(customer)
 
     return render_template('checkout_success.html', customer=customer, plan=plan)
 
@@ -1069,17 +1259,24 @@ def checkout_cancel():
     return render_template('checkout_cancel.html')
 
 
+# Stripe events are a few KB; anything bigger is refused before it is buffered
+STRIPE_WEBHOOK_MAX_BYTES = 1024 * 1024
+
+
 @app.route('/webhook/stripe', methods=['POST'])
 @csrf.exempt
 def stripe_webhook():
     """Handle Stripe webhooks"""
-    payload = request.get_data()
     sig_header = request.headers.get('Stripe-Signature')
 
     if not sig_header:
         logger.warning("Stripe webhook received without signature")
         return jsonify({'error': 'No signature'}), 400
 
+    # Raises 413 on an oversized Content-Length or once the stream passes the cap
+    request.max_content_length = STRIPE_WEBHOOK_MAX_BYTES
+    payload = request.get_data()
+
     success, message = process_webhook(payload, sig_header)
 
     if success:
@@ -1095,35 +1292,33 @@ def stripe_webhook():
 # Billing Routes
 # =============================================================================
 
+# Invoices shown per page on the billing pages (older ones via ?invoice_page=N)
+BILLING_INVOICES_PER_PAGE = 10
+
+
 @app.route('/billing')
 @login_required
 def billing():
     """Billing management page"""
-    customer = Customer.get_by_id(current_user.id)
-
-    # Get subscription and plan
-    subscription = Subscription.get_by_customer_id(customer.id)
-    plan = None
-    if subscription and subscription.plan_id:
-        plan = PricingPlan.get_by_id(subscription.plan_id)
-    elif customer.plan_id:
-        plan = PricingPlan.get_by_id(customer.plan_id)
-
-    # Get invoices
-    invoices = Invoice.get_by_customer_id(customer.id)
+    customer = get_current_customer()
+    invoice_page = max(request.args.get('invoice_page', 1, type=int), 1)
+    subscription, plan, invoices, has_more_invoices = customer.get_billing_summary(
+        invoice_page, BILLING_INVOICES_PER_PAGE)
 
     return render_template('billing.html',
                           customer=customer,
                           subscription=subscription,
                           plan=plan,
-                          invoices=invoices)
+                          invoices=invoices,
+                          invoice_page=invoice_page,
+                          has_more_invoices=has_more_invoices)
 
 
 @app.route('/billing/portal', methods=['POST'])
 @login_required
 def billing_portal():
     """Redirect to Stripe Customer Portal"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if not customer.stripe_customer_id:
         flash('No billing information found. Please contact support.', 'error')
@@ -1153,9 +1348,9 @@ def dashboard():
 @login_required
 def dashboard_overview():
     """Dashboard overview page"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     credentials = customer.get_credentials()
-    plan = PricingPlan.get_by_id(customer.plan_id) if customer.plan_id else None
+    plan = get_pricing_plan(customer.plan_id) if customer.plan_id else None
     usage = customer.get_resource_usage() if hasattr(customer, 'get_resource_usage') else {
         'disk': {'used_gb': 0, 'limit_gb': 10, 'percent': 0},
         'bandwidth': {'used_gb': 0, 'limit_gb': 100, 'percent': 0}
@@ -1173,7 +1368,7 @@ def dashboard_overview():
 @login_required
 def dashboard_health():
     """Site health page"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     credentials = customer.get_credentials()
 
     return render_template('dashboard/health.html',
@@ -1186,15 +1381,11 @@ def dashboard_health():
 @login_required
 def dashboard_backups():
     """Backups management page"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     active_job = CustomerBackupJob.get_active_job(customer.id)
     recent_jobs = CustomerBackupJob.get_recent_jobs(customer.id, limit=5)
 
-    # Get manual backups from restic
-    manual_backups = get_customer_manual_backups(customer.id)
-
-    # Get daily backups (filtered to this customer's data)
-    daily_backups = get_customer_daily_backups(customer.id)
+    manual_backups, daily_backups = list_customer_backups(customer.id)
 
     return render_template('dashboard/backups.html',
                           customer=customer,
@@ -1209,7 +1400,7 @@ def dashboard_backups():
 @login_required
 def dashboard_staging():
     """Staging environments page"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     if not customer:
         flash('Customer account not found.', 'error')
         return redirect(url_for('dashboard'))
@@ -1239,7 +1430,7 @@ def dashboard_domains():
     """Domains management page"""
     from cloudflare.models import CloudflareConnection, DNSRecordCache
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     if not customer:
         flash('Customer account not found.', 'error')
         return redirect(url_for('dashboard'))
@@ -1270,11 +1461,8 @@ def dashboard_domains():
 @login_required
 def api_domain_health():
     """Check domain health (DNS resolution, SSL status)"""
-    import socket
-    import ssl
-    from datetime import datetime
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     if not customer or not customer.domain:
         return jsonify({'error': 'No domain configured'}), 400
 
@@ -1329,7 +1517,6 @@ def api_domain_health():
 
     # Check HTTP connectivity
     try:
-        import urllib.request
         req = urllib.request.Request(
             f'https://{domain}',
             headers={'User-Agent': 'ShopHosting Health Check'}
@@ -1351,24 +1538,18 @@ def api_domain_health():
 @login_required
 def dashboard_billing():
     """Billing page"""
-    customer = Customer.get_by_id(current_user.id)
-
-    # Get subscription and plan
-    subscription = Subscription.get_by_customer_id(customer.id)
-    plan = None
-    if subscription and subscription.plan_id:
-        plan = PricingPlan.get_by_id(subscription.plan_id)
-    elif customer.plan_id:
-        plan = PricingPlan.get_by_id(customer.plan_id)
-
-    # Get invoices
-    invoices = Invoice.get_by_customer_id(customer.id)
+    customer = get_current_customer()
+    invoice_page = max(request.args.get('invoice_page', 1, type=int), 1)
+    subscription, plan, invoices, has_more_invoices = customer.get_billing_summary(
+        invoice_page, BILLING_INVOICES_PER_PAGE)
 
     return render_template('dashboard/billing.html',
                           customer=customer,
                           subscription=subscription,
                           plan=plan,
                           invoices=invoices,
+                          invoice_page=invoice_page,
+                          has_more_invoices=has_more_invoices,
                           active_page='billing')
 
 
@@ -1376,14 +1557,12 @@ def dashboard_billing():
 @login_required
 def dashboard_pause_subscription():
     """Pause customer's subscription"""
-    import stripe
-    from stripe_integration.config import get_stripe_config, is_stripe_configured
 
     if not is_stripe_configured():
         flash('Billing system is not configured.', 'error')
         return redirect(url_for('dashboard_billing'))
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     subscription = Subscription.get_by_customer_id(customer.id)
 
     if not subscription or not subscription.stripe_subscription_id:
@@ -1429,14 +1608,12 @@ def dashboard_pause_subscription():
 @login_required
 def dashboard_cancel_subscription():
     """Cancel customer's subscription at period end"""
-    import stripe
-    from stripe_integration.config import get_stripe_config, is_stripe_configured
 
     if not is_stripe_configured():
         flash('Billing system is not configured.', 'error')
         return redirect(url_for('dashboard_billing'))
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     subscription = Subscription.get_by_customer_id(customer.id)
 
     if not subscription or not subscription.stripe_subscription_id:
@@ -1487,14 +1664,12 @@ def dashboard_cancel_subscription():
 @login_required
 def dashboard_resume_subscription():
     """Resume a paused or cancelled subscription"""
-    import stripe
-    from stripe_integration.config import get_stripe_config, is_stripe_configured
 
     if not is_stripe_configured():
         flash('Billing system is not configured.', 'error')
         return redirect(url_for('dashboard_billing'))
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     subscription = Subscription.get_by_customer_id(customer.id)
 
     if not subscription or not subscription.stripe_subscription_id:
@@ -1546,7 +1721,7 @@ def dashboard_resume_subscription():
 @login_required
 def dashboard_settings():
     """Account settings page with security features"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     # Get 2FA settings
     tfa_settings = Customer2FASettings.get_by_customer(current_user.id)
@@ -1606,7 +1781,7 @@ def api_settings_password():
     if not current_password or not new_password:
         return jsonify({'success': False, 'error': 'Both passwords are required'}), 400
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if not customer.check_password(current_password):
         security_logger.warning(f"Password change failed - wrong current password: {customer.email}")
@@ -1629,7 +1804,7 @@ def api_settings_password():
 @limiter.limit("10 per hour")
 def api_settings_2fa_setup():
     """Generate TOTP secret and QR code for 2FA setup"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     # Generate new secret
     secret = pyotp.random_base32()
@@ -1703,7 +1878,7 @@ def api_settings_2fa_verify():
     # Enable 2FA
     tfa_settings.enable(json.dumps(backup_codes_hashed))
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     security_logger.info(f"2FA enabled for customer: {customer.email}")
 
     return jsonify({
@@ -1725,7 +1900,7 @@ def api_settings_2fa_disable():
     if not password:
         return jsonify({'success': False, 'error': 'Password is required'}), 400
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     if not customer.check_password(password):
         security_logger.warning(f"2FA disable failed - wrong password: {customer.email}")
         return jsonify({'success': False, 'error': 'Incorrect password'}), 401
@@ -1752,7 +1927,7 @@ def api_settings_2fa_backup_codes_regenerate():
     if not password:
         return jsonify({'success': False, 'error': 'Password is required'}), 400
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     if not customer.check_password(password):
         return jsonify({'success': False, 'error': 'Incorrect password'}), 401
 
@@ -1812,7 +1987,7 @@ def api_settings_logout_all():
     if not password:
         return jsonify({'success': False, 'error': 'Password is required'}), 400
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     if not customer.check_password(password):
         return jsonify({'success': False, 'error': 'Incorrect password'}), 401
 
@@ -1862,7 +2037,7 @@ def api_settings_profile():
     company_name = data.get('company_name')
     timezone = data.get('timezone')
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     customer.update_profile(company_name=company_name, timezone=timezone)
 
     return jsonify({'success': True, 'message': 'Profile updated successfully'})
@@ -1882,11 +2057,10 @@ def api_settings_email_change():
         return jsonify({'success': False, 'error': 'Email and password are required'}), 400
 
     # Validate email format
-    import re
-    if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', new_email):
+    if not EMAIL_RE.match(new_email):
         return jsonify({'success': False, 'error': 'Invalid email format'}), 400
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if not customer.check_password(password):
         return jsonify({'success': False, 'error': 'Incorrect password'}), 401
@@ -2282,7 +2456,7 @@ def api_settings_account_delete():
     if not password:
         return jsonify({'success': False, 'error': 'Password is required'}), 400
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if not customer.check_password(password):
         return jsonify({'success': False, 'error': 'Incorrect password'}), 401
@@ -2339,11 +2513,11 @@ def api_settings_account_delete_cancel():
 @login_required
 def dashboard_support():
     """Support ticketing page"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     status_filter = request.args.get('status')
     page = request.args.get('page', 1, type=int)
 
-    tickets, total = Ticket.get_by_customer(current_user.id, status=status_filter, page=page)
+    tickets, total = get_customer_tickets(current_user.id, status=status_filter, page=page)
     total_pages = (total + 19) // 20
 
     return render_template('dashboard/support.html',
@@ -2432,7 +2606,7 @@ def readiness_check():
 @login_required
 def api_status():
     """API endpoint for checking provisioning status"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     return jsonify({
         'status': customer.status,
         'domain': customer.domain,
@@ -2446,9 +2620,8 @@ def api_status():
 @limiter.limit("60 per minute")  # Allow frequent polling
 def api_container_status():
     """Get container status for current customer"""
-    import subprocess
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if not customer:
         return jsonify({'error': 'Customer not found', 'status': 'error', 'running': False}), 404
@@ -2483,7 +2656,6 @@ def api_container_status():
         # Calculate uptime
         uptime_str = None
         if started_at and running:
-            from datetime import datetime
             try:
                 # Docker returns ISO format with timezone
                 started = datetime.fromisoformat(started_at.replace('Z', '+00:00'))
@@ -2515,9 +2687,8 @@ def api_container_status():
 @csrf.exempt
 def api_container_restart():
     """Restart container for current customer"""
-    import subprocess
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if not customer:
         return jsonify({'success': False, 'message': 'Customer not found'}), 404
@@ -2558,15 +2729,23 @@ def api_container_restart():
         }), 500
 
 
+# Secrets masked out of container logs before they are returned
+LOG_REDACTION_PATTERNS = [
+    (re.compile(r'password["\s:=]+[^\s"]+', re.IGNORECASE), 'password=***REDACTED***'),
+    (re.compile(r'api[_-]?key["\s:=]+[^\s"]+', re.IGNORECASE), 'api_key=***REDACTED***'),
+    (re.compile(r'secret["\s:=]+[^\s"]+', re.IGNORECASE), 'secret=***REDACTED***'),
+    (re.compile(r'token["\s:=]+[^\s"]+', re.IGNORECASE), 'token=***REDACTED***'),
+    (re.compile(r'Authorization:\s*\S+', re.IGNORECASE), 'Authorization: ***REDACTED***'),
+]
+
+
 @app.route('/api/container/logs')
 @login_required
 @limiter.limit("30 per minute")
 def api_container_logs():
     """Get recent container logs for current customer"""
-    import subprocess
-    import re
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if not customer:
         return jsonify({'error': 'Customer not found', 'logs': []}), 404
@@ -2590,16 +2769,8 @@ def api_container_logs():
         logs = result.stdout + result.stderr
 
         # Sanitize sensitive data
-        patterns_to_redact = [
-            (r'password["\s:=]+[^\s"]+', 'password=***REDACTED***'),
-            (r'api[_-]?key["\s:=]+[^\s"]+', 'api_key=***REDACTED***'),
-            (r'secret["\s:=]+[^\s"]+', 'secret=***REDACTED***'),
-            (r'token["\s:=]+[^\s"]+', 'token=***REDACTED***'),
-            (r'Authorization:\s*\S+', 'Authorization: ***REDACTED***'),
-        ]
-
-        for pattern, replacement in patterns_to_redact:
-            logs = re.sub(pattern, replacement, logs, flags=re.IGNORECASE)
+        for pattern, replacement in LOG_REDACTION_PATTERNS:
+            logs = pattern.sub(replacement, logs)
 
         # Split into lines and return
         log_lines = logs.strip().split('\n') if logs.strip() else []
@@ -2620,7 +2791,7 @@ def api_container_logs():
 @login_required
 def api_credentials():
     """API endpoint for getting store credentials"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if customer.status != 'active':
         return jsonify({'error': 'Store not yet active'}), 400
@@ -2635,10 +2806,7 @@ def api_credentials():
 @csrf.exempt
 def api_backup():
     """API endpoint for triggering a customer backup"""
-    import subprocess
-    import os
-
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if customer.status != 'active':
         return jsonify({'error': 'Store not active, cannot backup'}), 400
@@ -2647,40 +2815,38 @@ def api_backup():
     if not os.path.exists(customer_dir):
         return jsonify({'error': 'Customer directory not found'}), 404
 
-    BACKUP_SCRIPT = "/opt/shophosting/scripts/customer-backup.sh"
+    if CustomerBackupJob.get_active_job(customer.id):
+        return jsonify({'error': 'A backup operation is already in progress'}), 400
 
     try:
-        subprocess.Popen(
-            ['sudo', BACKUP_SCRIPT, str(customer.id)],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        job = queue_backup_job(customer.id, 'backup', 'both')
 
         # Audit log for backup operation
         security_logger.info(
             f"BACKUP_STARTED: customer={customer.id} email={customer.email} "
-            f"domain={customer.domain} IP={request.remote_addr}"
+            f"domain={customer.domain} job={job.id} IP={request.remote_addr}"
         )
 
         return jsonify({
             'success': True,
             'message': 'Backup started. This may take a few minutes.',
-            'note': 'Check back shortly for completion status.'
+            'note': 'Check back shortly for completion status.',
+            'job_id': job.id
         })
     except Exception as e:
         logger.error(f"Failed to start backup for customer {customer.id}: {str(e)}")
         return jsonify({'error': 'Failed to start backup. Please try again later.'}), 500
 
 
+BACKUP_SNAPSHOTS_CACHE_TTL = 60
+
+
 @app.route('/api/backup/status')
 @login_required
 @csrf.exempt
 def api_backup_status():
     """API endpoint for checking backup status and recent snapshots"""
-    import subprocess
-    import json
-    
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if customer.status != 'active':
         return jsonify({'error': 'Store not active'}), 400
@@ -2693,16 +2859,26 @@ def api_backup_status():
         logger.error("Backup configuration missing: RESTIC_REPOSITORY or RESTIC_PASSWORD_FILE not set")
         return jsonify({'error': 'Backup service not configured'}), 503
 
+    # Snapshots only change when a backup runs; the backup worker drops this key
+    from backup_worker import BACKUP_SNAPSHOTS_CACHE_KEY
+    cache_key = BACKUP_SNAPSHOTS_CACHE_KEY.format(customer.id)
+    try:
+        cached = get_backup_queue().connection.get(cache_key)
+        if cached:
+            return jsonify({'success': True, 'snapshots': json.loads(cached)})
+    except Exception as e:
+        logger.warning(f"Backup snapshot cache unavailable: {e}")
+
     try:
         result = subprocess.run(
             [
-                'restic', 'snapshots', '--json',
+                'restic', 'snapshots', '--json', '--no-lock',
                 '--tag', f'customer-{customer.id}',
                 '--latest', '20'
             ],
+            # Both settings checked above come from os.environ, which restic
+            # inherits as-is; no need to copy the environment per request
             capture_output=True, text=True,
-            env={**os.environ, 'RESTIC_REPOSITORY': restic_repo,
-                 'RESTIC_PASSWORD_FILE': restic_password_file},
             timeout=30  # Add timeout to prevent hanging
         )
 
@@ -2716,6 +2892,11 @@ def api_backup_status():
                     'time': snap.get('time', '').replace('T', ' ').replace('Z', ''),
                     'paths': snap.get('paths', [])
                 })
+            try:
+                get_backup_queue().connection.setex(
+                    cache_key, BACKUP_SNAPSHOTS_CACHE_TTL, json.dumps(snapshot_list))
+            except Exception as e:
+                logger.warning(f"Could not cache backup snapshots for customer {customer.id}: {e}")
             return jsonify({
                 'success': True,
                 'snapshots': snapshot_list
@@ -2734,10 +2915,7 @@ def api_backup_status():
 @csrf.exempt
 def api_backup_restore():
     """API endpoint for restoring from a backup snapshot"""
-    import subprocess
-    import os
-
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if customer.status != 'active':
         return jsonify({'error': 'Store not active'}), 400
@@ -2749,8 +2927,8 @@ def api_backup_restore():
     if not snapshot_id:
         return jsonify({'error': 'Snapshot ID is required'}), 400
 
-    # Validate snapshot_id format - restic uses hex strings (8-64 chars for short/full IDs)
-    if not re.match(r'^[a-f0-9]{8,64}$', snapshot_id):
+    # Validate snapshot_id format
+    if not SNAPSHOT_ID_RE.match(snapshot_id):
         security_logger.warning(
             f"Invalid snapshot_id format attempted: customer={customer.id} "
             f"snapshot_id={snapshot_id[:20]}... IP={request.remote_addr}"
@@ -2760,20 +2938,20 @@ def api_backup_restore():
     if restore_target not in ['db', 'files', 'all']:
         return jsonify({'error': 'Invalid restore target. Must be db, files, or all'}), 400
 
-    RESTORE_SCRIPT = "/opt/shophosting/scripts/customer-restore.sh"
+    if CustomerBackupJob.get_active_job(customer.id):
+        return jsonify({'error': 'A backup operation is already in progress'}), 400
 
     try:
-        subprocess.Popen(
-            ['sudo', RESTORE_SCRIPT, str(customer.id), snapshot_id, restore_target],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        # The restore script calls restoring everything 'both'
+        job = queue_backup_job(customer.id, 'restore',
+                               'both' if restore_target == 'all' else restore_target,
+                               snapshot_id)
 
         # Audit log for restore operation (critical operation)
         security_logger.warning(
             f"RESTORE_STARTED: customer={customer.id} email={customer.email} "
             f"domain={customer.domain} snapshot={snapshot_id} target={restore_target} "
-            f"IP={request.remote_addr}"
+            f"job={job.id} IP={request.remote_addr}"
         )
 
         target_labels = {
@@ -2785,7 +2963,8 @@ def api_backup_restore():
         return jsonify({
             'success': True,
             'message': f'Restore started. This will restore {target_labels[restore_target]}. Your store will be briefly unavailable during restore.',
-            'note': 'The restore process is running in the background. Your store will be back shortly.'
+            'note': 'The restore process is running in the background. Your store will be back shortly.',
+            'job_id': job.id
         })
     except Exception as e:
         logger.error(f"Failed to start restore for customer {customer.id}: {str(e)}")
@@ -2796,7 +2975,7 @@ def api_backup_restore():
 @login_required
 def backup_page():
     """Customer backup management page"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     credentials = customer.get_credentials() if customer.status == 'active' else None
 
     return render_template('backup.html',
@@ -2812,7 +2991,7 @@ def backup_page():
 @login_required
 def staging_list():
     """List customer's staging environments"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     staging_envs = StagingEnvironment.get_by_customer(customer.id)
     can_create = StagingEnvironment.can_create_staging(customer.id)
 
@@ -2827,7 +3006,7 @@ def staging_list():
 @login_required
 def staging_create():
     """Create a new staging environment"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     if customer.status != 'active':
         flash('Your production site must be active before creating staging environments.', 'error')
@@ -2875,7 +3054,7 @@ def staging_detail(staging_id):
         flash('Staging environment not found.', 'error')
         return redirect(url_for('staging_list'))
 
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     sync_history = staging.get_sync_history(limit=10)
 
     return render_template('staging_detail.html',
@@ -2968,6 +3147,29 @@ def staging_status(staging_id):
 # Support Ticket Routes
 # =============================================================================
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def copy_upload(stream, full_path, max_size):
+    """Copy an upload stream to full_path in chunks.
+
+    Returns the number of bytes written, or None (and removes the partial
+    file) as soon as the stream exceeds max_size.
+    """
+    size = 0
+    with open(full_path, 'wb') as out:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return size
+            size += len(chunk)
+            if size > max_size:
+                break
+            out.write(chunk)
+    os.unlink(full_path)
+    return None
+
+
 def save_ticket_attachment(file, ticket, customer_id=None, admin_id=None, message_id=None):
     """Save uploaded file and create attachment record with security validation"""
     if not file or file.filename == '':
@@ -2976,34 +3178,15 @@ def save_ticket_attachment(file, ticket, customer_id=None, admin_id=None, messag
     if not TicketAttachment.allowed_file(file.filename):
         return None, "File type not allowed"
 
-    # Check file size
-    file.seek(0, os.SEEK_END)
-    size = file.tell()
-    file.seek(0)
-
-    if size > TicketAttachment.MAX_FILE_SIZE:
-        return None, "File too large (max 10MB)"
-
     # Validate file content using magic numbers (not just extension)
+    detected_mime = None
     try:
         import magic
         file_content = file.read(2048)  # Read first 2KB for magic number detection
         file.seek(0)  # Reset file pointer
 
         detected_mime = magic.from_buffer(file_content, mime=True)
-
-        # Map of allowed extensions to their expected MIME types
-        allowed_mimes = {
-            'image/png': ['png'],
-            'image/jpeg': ['jpg', 'jpeg'],
-            'image/gif': ['gif'],
-            'application/pdf': ['pdf'],
-            'text/plain': ['txt'],
-            'application/msword': ['doc'],
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ['docx'],
-            'application/zip': ['zip'],
-            'application/x-zip-compressed': ['zip'],
-        }
+        allowed_mimes = TICKET_ATTACHMENT_MIME_EXTENSIONS
 
         # Get claimed extension
         ext = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
@@ -3017,7 +3200,7 @@ def save_ticket_attachment(file, ticket, customer_id=None, admin_id=None, messag
             return None, "File content does not match allowed types"
 
         # Verify extension matches detected type
-        if ext not in allowed_mimes.get(detected_mime, []):
+        if ext not in allowed_mimes.get(detected_mime, ()):
             security_logger.warning(
                 f"File upload blocked - extension mismatch: claimed_ext={ext} "
                 f"detected_mime={detected_mime} filename={file.filename[:50]}"
@@ -3033,7 +3216,7 @@ def save_ticket_attachment(file, ticket, customer_id=None, admin_id=None, messag
 
     # Generate unique filename
     original_filename = secure_filename(file.filename)
-    unique_prefix = uuid.uuid4().hex[:8]
+    unique_prefix = secrets.token_hex(4)
     filename = f"{unique_prefix}_{original_filename}"
 
     # Create directory structure
@@ -3042,20 +3225,18 @@ def save_ticket_attachment(file, ticket, customer_id=None, admin_id=None, messag
     full_dir = os.path.join(TICKET_UPLOAD_PATH, relative_path)
     os.makedirs(full_dir, exist_ok=True)
 
-    # Save file
+    # Save file, counting bytes as they are copied (size check happens here)
     file_path = os.path.join(relative_path, filename)
     full_path = os.path.join(TICKET_UPLOAD_PATH, file_path)
-    file.save(full_path)
+    size = copy_upload(file.stream, full_path, TicketAttachment.MAX_FILE_SIZE)
+    if size is None:
+        return None, "File too large (max 10MB)"
 
     # Set restrictive permissions on uploaded file (no execute)
     os.chmod(full_path, 0o644)
 
-    # Get mime type from detection or filename
-    try:
-        import magic
-        mime_type = magic.from_file(full_path, mime=True)
-    except (ImportError, Exception):
-        mime_type = mimetypes.guess_type(original_filename)[0] or 'application/octet-stream'
+    # Reuse the type detected above rather than re-reading the saved file
+    mime_type = detected_mime or guess_attachment_type(original_filename)
 
     # Create attachment record
     attachment = TicketAttachment(
@@ -3074,6 +3255,49 @@ def save_ticket_attachment(file, ticket, customer_id=None, admin_id=None, messag
     return attachment, None
 
 
+# Seconds a customer's ticket counts stay cached. Customer actions clear them
+# right away; admin status changes show up once they expire.
+TICKET_COUNT_CACHE_TTL = 120
+
+
+def ticket_count_cache_key(customer_id, status=None):
+    """Redis key for one customer's ticket total under one status filter"""
+    return f"tickets:count:{customer_id}:{status or 'all'}"
+
+
+def get_customer_tickets(customer_id, status=None, page=1):
+    """Ticket.get_by_customer with the total cached in Redis per status filter"""
+    # Unknown filters match nothing and aren't worth a key invalidation can't reach
+    cache_key = ticket_count_cache_key(customer_id, status) \
+        if status is None or status in Ticket.STATUSES else None
+    total = None
+    if cache_key:
+        try:
+            cached = get_redis_client().get(cache_key)
+            if cached is not None:
+                total = int(cached)
+        except Exception as e:
+            logger.warning(f"Ticket count cache unavailable: {e}")
+
+    tickets, count = Ticket.get_by_customer(customer_id, status=status, page=page, total=total)
+
+    if cache_key and total is None:
+        try:
+            get_redis_client().setex(cache_key, TICKET_COUNT_CACHE_TTL, count)
+        except Exception as e:
+            logger.warning(f"Could not cache ticket count for customer {customer_id}: {e}")
+    return tickets, count
+
+
+def invalidate_ticket_counts(customer_id):
+    """Drop a customer's cached ticket counts after a ticket is added or changes status"""
+    try:
+        get_redis_client().delete(*[ticket_count_cache_key(customer_id, status)
+                                    for status in [None] + Ticket.STATUSES])
+    except Exception as e:
+        logger.warning(f"Could not clear ticket counts for customer {customer_id}: {e}")
+
+
 @app.route('/support')
 @login_required
 def support_tickets():
@@ -3081,7 +3305,7 @@ def support_tickets():
     status_filter = request.args.get('status')
     page = request.args.get('page', 1, type=int)
 
-    tickets, total = Ticket.get_by_customer(current_user.id, status=status_filter, page=page)
+    tickets, total = get_customer_tickets(current_user.id, status=status_filter, page=page)
     total_pages = (total + 19) // 20
 
     return render_template('support/tickets.html',
@@ -3099,7 +3323,7 @@ def create_ticket():
     form = CreateTicketForm()
 
     # Populate category choices
-    categories = TicketCategory.get_all_active()
+    categories = get_ticket_categories()
     form.category.choices = [(c.id, c.name) for c in categories]
 
     if form.validate_on_submit():
@@ -3112,15 +3336,14 @@ def create_ticket():
                 status='open',
                 priority='medium'
             )
-            ticket.save()
 
-            # Create initial message
+            # Save it with its initial message in one transaction
             message = TicketMessage(
-                ticket_id=ticket.id,
                 customer_id=current_user.id,
                 message=form.message.data.strip()
             )
-            message.save()
+            ticket.save_with_message(message)
+            invalidate_ticket_counts(current_user.id)
 
             # Handle file attachment
             if 'attachment' in request.files:
@@ -3162,14 +3385,11 @@ def view_ticket(ticket_number):
         flash('Access denied.', 'error')
         return redirect(url_for('support_tickets'))
 
-    # Get messages (excluding internal notes)
-    messages = ticket.get_messages(include_internal=False)
-
-    # Get attachments
-    attachments = ticket.get_attachments()
+    # Get messages (excluding internal notes) and attachments
+    messages, attachments = ticket.get_thread(include_internal=False)
 
     # Get category
-    category = TicketCategory.get_by_id(ticket.category_id) if ticket.category_id else None
+    category = get_ticket_category(ticket.category_id)
 
     form = TicketReplyForm()
 
@@ -3211,12 +3431,14 @@ def reply_ticket(ticket_number):
                 customer_id=current_user.id,
                 message=form.message.data.strip()
             )
-            message.save()
 
-            # Update ticket status if it was waiting for customer
+            # Reopen the ticket in the same transaction if it was waiting for customer
             if ticket.status == 'waiting_customer':
                 ticket.status = 'open'
-                ticket.save()
+                ticket.save_with_message(message)
+                invalidate_ticket_counts(current_user.id)
+            else:
+                message.save()
 
             # Handle file attachment
             if 'attachment' in request.files:
@@ -3254,35 +3476,55 @@ def serve_attachment(attachment_id):
     if not ticket or ticket.customer_id != current_user.id:
         abort(403)
 
-    full_path = os.path.join(TICKET_UPLOAD_PATH, attachment.file_path)
-
-    if not os.path.exists(full_path):
-        abort(404)
-
-    return send_file(
-        full_path,
-        download_name=attachment.original_filename,
-        as_attachment=True
-    )
+    return send_ticket_attachment(attachment)
 
 
 # =============================================================================
 # Customer Backup Routes
 # =============================================================================
 
+_backup_queue = None
+
+
+def get_backup_queue():
+    """RQ queue served by provisioning/backup_worker.py, connected once per process"""
+    global _backup_queue
+    if _backup_queue is None:
+        from rq import Queue
+        redis_conn = redis.Redis(host=os.getenv('REDIS_HOST', 'localhost'), port=6379)
+        _backup_queue = Queue('backups', connection=redis_conn)
+    return _backup_queue
+
+
+def queue_backup_job(customer_id, job_type, backup_type, snapshot_id=None):
+    """Record a pending CustomerBackupJob and enqueue it for the backup worker"""
+    job = CustomerBackupJob(
+        customer_id=customer_id,
+        job_type=job_type,
+        backup_type=backup_type,
+        snapshot_id=snapshot_id,
+        status='pending'
+    )
+    job.save()
+
+    if job_type == 'restore':
+        from backup_worker import restore_backup_job
+        get_backup_queue().enqueue(restore_backup_job, job.id, job_timeout=1300)
+    else:
+        from backup_worker import create_backup_job
+        get_backup_queue().enqueue(create_backup_job, job.id, job_timeout=700)
+    return job
+
+
 @app.route('/backups')
 @login_required
 def backups():
     """Customer backups page"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     active_job = CustomerBackupJob.get_active_job(customer.id)
     recent_jobs = CustomerBackupJob.get_recent_jobs(customer.id, limit=5)
 
-    # Get manual backups from restic
-    manual_backups = get_customer_manual_backups(customer.id)
-
-    # Get daily backups (filtered to this customer's data)
-    daily_backups = get_customer_daily_backups(customer.id)
+    manual_backups, daily_backups = list_customer_backups(customer.id)
 
     return render_template('backups.html',
                           customer=customer,
@@ -3296,7 +3538,7 @@ def backups():
 @login_required
 def backup_create():
     """Create a manual backup"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     # Check for active job
     active_job = CustomerBackupJob.get_active_job(customer.id)
@@ -3311,25 +3553,7 @@ def backup_create():
         return jsonify({'success': False, 'message': 'Invalid backup type'}), 400
 
     try:
-        # Create job record
-        job = CustomerBackupJob(
-            customer_id=customer.id,
-            job_type='backup',
-            backup_type=backup_type,
-            status='pending'
-        )
-        job.save()
-
-        # Queue the job
-        from redis import Redis
-        from rq import Queue
-
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_conn = Redis(host=redis_host, port=6379)
-        queue = Queue('backups', connection=redis_conn)
-
-        from backup_worker import create_backup_job
-        queue.enqueue(create_backup_job, job.id, job_timeout=700)
+        job = queue_backup_job(customer.id, 'backup', backup_type)
 
         logger.info(f"Backup job {job.id} queued for customer {customer.id}")
         return jsonify({'success': True, 'message': 'Backup started', 'job_id': job.id})
@@ -3343,7 +3567,7 @@ def backup_create():
 @login_required
 def backup_restore(snapshot_id):
     """Restore from a backup"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
 
     # Check for active job
     active_job = CustomerBackupJob.get_active_job(customer.id)
@@ -3366,26 +3590,7 @@ def backup_restore(snapshot_id):
         return jsonify({'success': False, 'message': 'Invalid restore type'}), 400
 
     try:
-        # Create job record
-        job = CustomerBackupJob(
-            customer_id=customer.id,
-            job_type='restore',
-            backup_type=restore_type,
-            snapshot_id=snapshot_id,
-            status='pending'
-        )
-        job.save()
-
-        # Queue the job
-        from redis import Redis
-        from rq import Queue
-
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_conn = Redis(host=redis_host, port=6379)
-        queue = Queue('backups', connection=redis_conn)
-
-        from backup_worker import restore_backup_job
-        queue.enqueue(restore_backup_job, job.id, job_timeout=1300)
+        job = queue_backup_job(customer.id, 'restore', restore_type, snapshot_id)
 
         logger.info(f"Restore job {job.id} queued for customer {customer.id}")
         return jsonify({'success': True, 'message': 'Restore started', 'job_id': job.id})
@@ -3399,7 +3604,7 @@ def backup_restore(snapshot_id):
 @login_required
 def backup_status():
     """Get current backup job status"""
-    customer = Customer.get_by_id(current_user.id)
+    customer = get_current_customer()
     active_job = CustomerBackupJob.get_active_job(customer.id)
 
     if active_job:
@@ -3420,16 +3625,26 @@ def backup_status():
         })
 
 
+# Restic repositories listed by the customer backups pages (via sudo)
+MANUAL_BACKUP_RESTIC_ENV = (
+    'export RESTIC_REPOSITORY="sftp:sh-backup@15.204.249.219:/home/sh-backup/manual-backups" && '
+    'export RESTIC_PASSWORD_FILE="/opt/shophosting/.manual-restic-password" && '
+    'export HOME=/root'
+)
+DAILY_BACKUP_RESTIC_ENV = (
+    'export RESTIC_REPOSITORY="sftp:sh-backup@15.204.249.219:/home/sh-backup/backups" && '
+    'export RESTIC_PASSWORD_FILE="/root/.restic-password" && '
+    'export HOME=/root'
+)
+
+
 def get_customer_manual_backups(customer_id, limit=5):
     """Get manual backups for a customer from restic"""
-    import subprocess
     try:
         result = subprocess.run(
             ['sudo', 'bash', '-c',
-             f'export RESTIC_REPOSITORY="sftp:sh-backup@15.204.249.219:/home/sh-backup/manual-backups" && '
-             f'export RESTIC_PASSWORD_FILE="/opt/shophosting/.manual-restic-password" && '
-             f'export HOME=/root && '
-             f'restic snapshots --json --tag "customer-{customer_id}" --tag "manual"'],
+             f'{MANUAL_BACKUP_RESTIC_ENV} && '
+             f'restic snapshots --json --no-lock --tag "customer-{customer_id}" --tag "manual"'],
             capture_output=True,
             text=True,
             timeout=30
@@ -3438,7 +3653,6 @@ def get_customer_manual_backups(customer_id, limit=5):
         logger.info(f"Manual backup list for customer {customer_id}: returncode={result.returncode}, stdout_len={len(result.stdout)}, stderr={result.stderr[:200] if result.stderr else 'none'}")
 
         if result.returncode == 0 and result.stdout.strip():
-            import json
             snapshots = json.loads(result.stdout)
             # Sort by time descending and limit
             snapshots.sort(key=lambda x: x.get('time', ''), reverse=True)
@@ -3451,21 +3665,17 @@ def get_customer_manual_backups(customer_id, limit=5):
 
 def get_customer_daily_backups(customer_id, limit=10):
     """Get daily backups that contain this customer's data"""
-    import subprocess
     try:
         result = subprocess.run(
             ['sudo', 'bash', '-c',
-             f'export RESTIC_REPOSITORY="sftp:sh-backup@15.204.249.219:/home/sh-backup/backups" && '
-             f'export RESTIC_PASSWORD_FILE="/root/.restic-password" && '
-             f'export HOME=/root && '
-             f'restic snapshots --json --tag "daily"'],
+             f'{DAILY_BACKUP_RESTIC_ENV} && '
+             f'restic snapshots --json --no-lock --tag "daily"'],
             capture_output=True,
             text=True,
             timeout=30
         )
 
         if result.returncode == 0 and result.stdout.strip():
-            import json
             snapshots = json.loads(result.stdout)
             # Filter to snapshots that have customer path, sort descending
             customer_path = f"/var/customers/customer-{customer_id}"
@@ -3478,6 +3688,22 @@ def get_customer_daily_backups(customer_id, limit=10):
     return []
 
 
+# Restic listings for the customer backups pages run on their own small pool,
+# separate from the admin dashboard's stat probes
+_backup_list_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='backup-list')
+
+
+def list_customer_backups(customer_id):
+    """Return (manual_backups, daily_backups) for the customer backups pages.
+
+    The two live in separate restic repositories; listing both at once means
+    the page waits for one SFTP session, not two in a row.
+    """
+    manual = _backup_list_executor.submit(get_customer_manual_backups, customer_id)
+    daily = _backup_list_executor.submit(get_customer_daily_backups, customer_id)
+    return manual.result(), daily.result()
+
+
 # =============================================================================
 # Error Handlers
 # =============================================================================
@@ -3512,8 +3738,10 @@ def handle_csrf_error(error):
 
 @app.context_processor
 def inject_now():
-    """Inject current datetime into templates"""
-    return {'now': datetime.now()}
+    """Inject current datetime into templates, fixed once per request"""
+    if 'now' not in g:
+        g.now = datetime.now()
+    return {'now': g.now}
 
 
 # =============================================================================
@@ -0,0 +1,84 @@
+"""
+ShopHosting.io - Ticket attachment downloads
+Hands the file transfer to nginx via X-Accel-Redirect when it is configured
+"""
+
+import os
+import mimetypes
+import unicodedata
+from urllib.parse import quote
+
+from flask import abort, make_response, send_from_directory
+from werkzeug.security import safe_join
+
+# Ticket attachment upload path
+TICKET_UPLOAD_PATH = '/var/customers/tickets'
+
+# URL prefix of an nginx `internal` location aliased to TICKET_UPLOAD_PATH.
+# When set, downloads are served by nginx; otherwise Flask streams the file.
+TICKET_ACCEL_REDIRECT_PREFIX = os.getenv('TICKET_ACCEL_REDIRECT_PREFIX', '')
+
+# Map of allowed attachment MIME types (as detected by python-magic) to the
+# extensions they may be uploaded with
+TICKET_ATTACHMENT_MIME_EXTENSIONS = {
+    'image/png': ('png',),
+    'image/jpeg': ('jpg', 'jpeg'),
+    'image/gif': ('gif',),
+    'application/pdf': ('pdf',),
+    'text/plain': ('txt',),
+    'application/msword': ('doc',),
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ('docx',),
+    'application/zip': ('zip',),
+    'application/x-zip-compressed': ('zip',),
+}
+
+# Extension -> MIME type, read once instead of going through guess_type().
+# Allowed attachment types come from the table above so they don't depend on
+# the host's mime.types.
+mimetypes.init()
+_MIME_TYPES = dict(mimetypes.types_map)
+for _mime, _exts in reversed(TICKET_ATTACHMENT_MIME_EXTENSIONS.items()):
+    _MIME_TYPES.update((f'.{ext}', _mime) for ext in _exts)
+
+
+def guess_attachment_type(filename):
+    """MIME type for a file name, defaulting to application/octet-stream"""
+    ext = os.path.splitext(filename)[1].lower()
+    return _MIME_TYPES.get(ext) or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+def _content_disposition(filename):
+    """Header params for an attachment download, RFC 5987-encoded if needed"""
+    try:
+        filename.encode('ascii')
+        return {'filename': filename}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': "UTF-8''" + quote(filename, safe="!#$&+-.^_`|~")}
+
+
+def send_ticket_attachment(attachment):
+    """Return a download response for a TicketAttachment (access already checked)"""
+    if safe_join(TICKET_UPLOAD_PATH, attachment.file_path) is None:
+        abort(404)
+
+    if not TICKET_ACCEL_REDIRECT_PREFIX:
+        return send_from_directory(
+            TICKET_UPLOAD_PATH,
+            attachment.file_path,
+            download_name=attachment.original_filename,
+            as_attachment=True,
+            conditional=True
+        )
+
+    # nginx answers 404 itself if the file is missing
+    response = make_response('')
+    response.headers['X-Accel-Redirect'] = (
+        f"{TICKET_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(attachment.file_path)}"
+    )
+    response.headers['Content-Type'] = (
+        attachment.mime_type or guess_attachment_type(attachment.original_filename)
+    )
+    response.headers.set('Content-Disposition', 'attachment',
+                         **_content_disposition(attachment.original_filename))
+    return response
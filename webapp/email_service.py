@@ -435,3 +435,13 @@ If you did not request this password reset, please contact the super administrat
 
 # Singleton instance for easy importing
 email_service = EmailService()
+
+
+def send_admin_password_reset_email_job(to_email: str, admin_name: str, temp_password: str):
+    """RQ job wrapper for send_admin_password_reset_email.
+
+    Raises on failure so the job lands in the failed registry and RQ's
+    retry policy applies, instead of silently returning False.
+    """
+    if not email_service.send_admin_password_reset_email(to_email, admin_name, temp_password):
+        raise RuntimeError(f"Failed to send admin password reset email to {to_email}")
@@ -9,17 +9,22 @@ import multiprocessing
 # Server Socket
 bind = os.getenv('GUNICORN_BIND', '127.0.0.1:5000')
 
+# Pending connections queued while all worker threads are busy
+backlog = int(os.getenv('GUNICORN_BACKLOG', '2048'))
+
 # Worker Processes
 # Default: 2 * CPU cores + 1 (recommended for I/O bound applications)
 # Can be overridden with GUNICORN_WORKERS env var
 default_workers = (multiprocessing.cpu_count() * 2) + 1
 workers = int(os.getenv('GUNICORN_WORKERS', default_workers))
 
-# Worker class - sync is default, can use gevent/eventlet for async
-worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+# Worker class - gthread lets each worker overlap requests blocked on MySQL or
+# Redis I/O. Keep GUNICORN_THREADS <= DB_POOL_SIZE so threads don't queue for
+# a pooled connection. Set to 'sync' for one request per worker.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
 
 # Threads per worker (only relevant for gthread worker class)
-threads = int(os.getenv('GUNICORN_THREADS', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
 
 # Timeout for worker processes (seconds)
 timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
@@ -30,6 +35,11 @@ graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
 # Keep-alive connections timeout
 keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '2'))
 
+# Workers touch a heartbeat file every few seconds; keep it on tmpfs so a
+# slow disk can't stall them into being killed as unresponsive
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR',
+                           '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
 # Maximum requests per worker before restart (helps prevent memory leaks)
 max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
 
@@ -37,7 +47,9 @@ max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
 max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '50'))
 
 # Preload application code before forking workers
-# Saves memory but prevents code reloading
+# Saves memory and worker boot time (imports, Stripe/admin setup run once in
+# the master) but prevents code reloading on HUP - restart the service instead.
+# post_fork() gives each worker its own MySQL pool when this is on.
 preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
 
 # Access log format
@@ -57,6 +69,18 @@ def on_starting(server):
     pass
 
 
+def post_fork(server, worker):
+    """Called in a worker right after it is forked.
+
+    With preload_app the master already imported the app and opened the MySQL
+    pool; rebuild it so workers don't share the master's sockets. Redis
+    clients reconnect after a fork on their own.
+    """
+    if preload_app:
+        import models
+        models.init_db_pool()
+
+
 def on_reload(server):
     """Called before reloading the worker processes."""
     pass
@@ -0,0 +1,44 @@
+"""
+ShopHosting.io - orjson JSON Provider
+Encodes jsonify() responses with orjson when it is installed
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider whose responses are encoded by orjson.
+
+    Responses are written straight to bytes in one pass. Datetimes and
+    dataclasses are passed through to Flask's default handler so the wire
+    format (HTTP dates, sorted keys) matches the stdlib provider. dumps() is
+    left alone, so sessions and the tojson filter are unaffected.
+    """
+
+    option = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+              | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS) if orjson else 0
+
+    def response(self, *args, **kwargs):
+        """Serialize the arguments with orjson and wrap them in a Response"""
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self.option)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder handles these
+            return super().response(*args, **kwargs)
+
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Use OrjsonProvider for the app if orjson is available"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -4,15 +4,42 @@ Handles database connections and customer data operations
 """
 
 import os
+import json
+import hashlib
+import logging
+import secrets
+import time
 import mysql.connector
 from mysql.connector import pooling
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # argon2-cffi is only needed for PASSWORD_HASH_METHOD=argon2
+    PasswordHasher = None
+
+logger = logging.getLogger(__name__)
+
 # Database connection pools
 db_pool = None       # Primary pool for writes
 db_pool_read = None  # Read replica pool (optional)
 
+# Method used for new password hashes: 'argon2' (needs argon2-cffi) or a
+# Werkzeug method, e.g. 'scrypt' (default), 'scrypt:16384:8:1' or
+# 'pbkdf2:sha256:600000'. Existing hashes keep verifying with whatever method
+# they were created with and are upgraded on the next successful login.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+
+# argon2id cost; calibrate so one hash takes ~100ms on the production CPU
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '2'))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '65536'))  # KiB
+
+# Seconds to wait for a free pooled connection before giving up. mysql-connector
+# pools raise immediately when exhausted, so get_db_connection() polls instead.
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+
 
 def init_db_pool():
     """Initialize database connection pool(s)"""
@@ -71,6 +98,49 @@ def init_db_pool():
         raise
 
 
+if PASSWORD_HASH_METHOD == 'argon2':
+    if PasswordHasher is None:
+        raise RuntimeError("PASSWORD_HASH_METHOD=argon2 requires the argon2-cffi package")
+    _argon2_hasher = PasswordHasher(time_cost=ARGON2_TIME_COST,
+                                    memory_cost=ARGON2_MEMORY_COST,
+                                    parallelism=1)
+else:
+    _argon2_hasher = None
+
+
+def hash_password(password):
+    """Hash a password with the configured PASSWORD_HASH_METHOD"""
+    if _argon2_hasher is not None:
+        return _argon2_hasher.hash(password)
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored argon2 or Werkzeug hash"""
+    if password_hash.startswith('$argon2'):
+        if PasswordHasher is None:
+            return False
+        try:
+            return (_argon2_hasher or PasswordHasher()).verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+
+# Method/parameter prefix (e.g. "scrypt:32768:8:1$") of hashes made with the
+# current PASSWORD_HASH_METHOD. Resolved once at import, which also rejects a
+# misconfigured method at startup instead of on the first login.
+_PASSWORD_HASH_PREFIX = hash_password('').split('$', 1)[0] + '$'
+
+
+def password_needs_rehash(password_hash):
+    """Check whether a stored hash predates the current PASSWORD_HASH_METHOD"""
+    if _argon2_hasher is not None:
+        return (not password_hash.startswith('$argon2')
+                or _argon2_hasher.check_needs_rehash(password_hash))
+    return not password_hash.startswith(_PASSWORD_HASH_PREFIX)
+
+
 def get_db_connection(read_only=False):
     """
     Get a connection from the appropriate pool.
@@ -93,7 +163,19 @@ def get_db_connection(read_only=False):
             # Fall back to primary if replica is unavailable
             pass
 
-    return db_pool.get_connection()
+    return _get_pooled_connection(db_pool)
+
+
+def _get_pooled_connection(pool):
+    """Get a connection from pool, waiting up to DB_POOL_TIMEOUT if it is exhausted"""
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            return pool.get_connection()
+        except mysql.connector.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
 
 
 # =============================================================================
@@ -108,21 +190,29 @@ class PortManager:
 
     @staticmethod
     def get_next_available_port():
-        """Get the next available port for a new customer"""
+        """Get the next available port for a new customer.
+
+        Finds the lowest free port in one query: candidates are the range start
+        plus the port after each used one, filtered against the UNIQUE web_port
+        index. Callers still rely on that UNIQUE key to catch a concurrent
+        create taking the same port.
+        """
         conn = get_db_connection()
         cursor = conn.cursor()
 
         try:
-            # Get all currently used ports
-            cursor.execute("SELECT web_port FROM customers WHERE web_port IS NOT NULL")
-            used_ports = {row[0] for row in cursor.fetchall()}
-
-            # Find first available port in range
-            for port in range(PortManager.PORT_RANGE_START, PortManager.PORT_RANGE_END + 1):
-                if port not in used_ports:
-                    return port
-
-            return None  # No ports available
+            cursor.execute("""
+                SELECT MIN(c.port) FROM (
+                    SELECT %s AS port
+                    UNION ALL
+                    SELECT web_port + 1 FROM customers WHERE web_port BETWEEN %s AND %s
+                ) c
+                WHERE c.port <= %s
+                  AND NOT EXISTS (SELECT 1 FROM customers u WHERE u.web_port = c.port)
+            """, (PortManager.PORT_RANGE_START, PortManager.PORT_RANGE_START,
+                  PortManager.PORT_RANGE_END, PortManager.PORT_RANGE_END))
+            row = cursor.fetchone()
+            return row[0] if row else None  # None when no ports are available
 
         finally:
             cursor.close()
@@ -216,11 +306,34 @@ class Customer:
 
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Verify password"""
-        return check_password_hash(self.password_hash, password)
+        """Verify password, upgrading outdated hashes on success"""
+        if not verify_password(self.password_hash, password):
+            return False
+
+        if self.id and password_needs_rehash(self.password_hash):
+            try:
+                self.set_password(password)
+                self.update_password_hash()
+            except Exception as e:
+                logger.warning(f"Failed to rehash password for customer {self.id}: {e}")
+        return True
+
+    def update_password_hash(self):
+        """Persist only the password hash (password_changed_at is untouched)"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "UPDATE customers SET password_hash = %s WHERE id = %s",
+                (self.password_hash, self.id)
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
 
     def update_password_changed_at(self):
         """Update the password_changed_at timestamp and save new password"""
@@ -627,6 +740,72 @@ class Customer:
             cursor.close()
             conn.close()
 
+    @staticmethod
+    def signup_conflicts(email, domain):
+        """Check whether an email and a domain are already registered.
+
+        Returns (email_exists, domain_exists) from a single query. Pass None
+        to skip either check; it is reported as not taken.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                SELECT EXISTS(SELECT 1 FROM customers WHERE email = %s),
+                       EXISTS(SELECT 1 FROM customers WHERE domain = %s)
+            """, (email, domain))
+            email_exists, domain_exists = cursor.fetchone()
+            return bool(email_exists), bool(domain_exists)
+
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_billing_summary(self, invoice_page=1, invoices_per_page=10):
+        """Load this customer's latest subscription, its plan and one page of invoices.
+
+        Returns (subscription, plan, invoices, has_more_invoices). The plan is
+        the subscription's, falling back to the customer's own plan_id. All
+        three reads share one pooled connection.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        try:
+            cursor.execute("""
+                SELECT * FROM subscriptions
+                WHERE customer_id = %s
+                ORDER BY created_at DESC
+                LIMIT 1
+            """, (self.id,))
+            row = cursor.fetchone()
+            subscription = Subscription(**row) if row else None
+
+            plan = None
+            plan_id = subscription.plan_id if subscription and subscription.plan_id else self.plan_id
+            if plan_id:
+                cursor.execute("SELECT * FROM pricing_plans WHERE id = %s", (plan_id,))
+                row = cursor.fetchone()
+                if row:
+                    if row.get('features') and isinstance(row['features'], str):
+                        row['features'] = json.loads(row['features'])
+                    plan = PricingPlan(**row)
+
+            # One extra row tells us whether an older page exists without a COUNT
+            cursor.execute("""
+                SELECT * FROM invoices
+                WHERE customer_id = %s
+                ORDER BY created_at DESC
+                LIMIT %s OFFSET %s
+            """, (self.id, invoices_per_page + 1, (invoice_page - 1) * invoices_per_page))
+            invoices = [Invoice(**row) for row in cursor.fetchall()]
+
+            return subscription, plan, invoices[:invoices_per_page], len(invoices) > invoices_per_page
+        finally:
+            cursor.close()
+            conn.close()
+
     # =========================================================================
     # Utility Methods
     # =========================================================================
@@ -733,7 +912,6 @@ class PricingPlan:
             cursor.execute("SELECT * FROM pricing_plans WHERE id = %s", (plan_id,))
             row = cursor.fetchone()
             if row:
-                import json
                 if row.get('features') and isinstance(row['features'], str):
                     row['features'] = json.loads(row['features'])
                 return PricingPlan(**row)
@@ -752,7 +930,6 @@ class PricingPlan:
             cursor.execute("SELECT * FROM pricing_plans WHERE slug = %s", (slug,))
             row = cursor.fetchone()
             if row:
-                import json
                 if row.get('features') and isinstance(row['features'], str):
                     row['features'] = json.loads(row['features'])
                 return PricingPlan(**row)
@@ -773,7 +950,6 @@ class PricingPlan:
                 ORDER BY platform, display_order
             """)
             rows = cursor.fetchall()
-            import json
             plans = []
             for row in rows:
                 if row.get('features') and isinstance(row['features'], str):
@@ -797,7 +973,6 @@ class PricingPlan:
                 ORDER BY platform, display_order
             """)
             rows = cursor.fetchall()
-            import json
             plans = []
             for row in rows:
                 if row.get('features') and isinstance(row['features'], str):
@@ -821,7 +996,6 @@ class PricingPlan:
                 ORDER BY display_order
             """, (platform,))
             rows = cursor.fetchall()
-            import json
             plans = []
             for row in rows:
                 if row.get('features') and isinstance(row['features'], str):
@@ -853,7 +1027,6 @@ class PricingPlan:
 
     def update(self):
         """Update pricing plan in database"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -1361,7 +1534,6 @@ class WebhookEvent:
         cursor = conn.cursor()
 
         try:
-            import json
             payload_json = json.dumps(self.payload) if self.payload else None
 
             if self.id is None:
@@ -1537,41 +1709,61 @@ class Ticket:
             cursor.close()
             conn.close()
 
+    def _write(self, cursor):
+        if self.id is None:
+            # Generate ticket number for new tickets
+            if not self.ticket_number:
+                self.ticket_number = Ticket.generate_ticket_number()
+
+            cursor.execute("""
+                INSERT INTO tickets
+                (ticket_number, customer_id, category_id, assigned_admin_id,
+                 subject, status, priority, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                self.ticket_number, self.customer_id, self.category_id,
+                self.assigned_admin_id, self.subject, self.status,
+                self.priority, self.created_at, self.updated_at
+            ))
+            self.id = cursor.lastrowid
+        else:
+            cursor.execute("""
+                UPDATE tickets SET
+                    category_id = %s, assigned_admin_id = %s, subject = %s,
+                    status = %s, priority = %s, updated_at = %s,
+                    resolved_at = %s, closed_at = %s
+                WHERE id = %s
+            """, (
+                self.category_id, self.assigned_admin_id, self.subject,
+                self.status, self.priority, datetime.now(),
+                self.resolved_at, self.closed_at, self.id
+            ))
+
     def save(self):
         """Save ticket to database (insert or update)"""
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
-            if self.id is None:
-                # Generate ticket number for new tickets
-                if not self.ticket_number:
-                    self.ticket_number = Ticket.generate_ticket_number()
+            self._write(cursor)
+            conn.commit()
+            return self
+        finally:
+            cursor.close()
+            conn.close()
 
-                cursor.execute("""
-                    INSERT INTO tickets
-                    (ticket_number, customer_id, category_id, assigned_admin_id,
-                     subject, status, priority, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    self.ticket_number, self.customer_id, self.category_id,
-                    self.assigned_admin_id, self.subject, self.status,
-                    self.priority, self.created_at, self.updated_at
-                ))
-                self.id = cursor.lastrowid
-            else:
-                cursor.execute("""
-                    UPDATE tickets SET
-                        category_id = %s, assigned_admin_id = %s, subject = %s,
-                        status = %s, priority = %s, updated_at = %s,
-                        resolved_at = %s, closed_at = %s
-                    WHERE id = %s
-                """, (
-                    self.category_id, self.assigned_admin_id, self.subject,
-                    self.status, self.priority, datetime.now(),
-                    self.resolved_at, self.closed_at, self.id
-                ))
+    def save_with_message(self, message):
+        """Save the ticket and a new TicketMessage on it in one transaction"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            self._write(cursor)
+            message.ticket_id = self.id
+            message._write(cursor)
             conn.commit()
             return self
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             cursor.close()
             conn.close()
@@ -1603,8 +1795,11 @@ class Ticket:
             conn.close()
 
     @staticmethod
-    def get_by_customer(customer_id, status=None, page=1, per_page=20):
-        """Get tickets for a customer with optional status filter"""
+    def get_by_customer(customer_id, status=None, page=1, per_page=20, total=None):
+        """Get tickets for a customer with optional status filter
+
+        Pass a previously counted ``total`` to skip the COUNT query.
+        """
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         try:
@@ -1616,8 +1811,9 @@ class Ticket:
                 params.append(status)
 
             # Get count
-            cursor.execute(f"SELECT COUNT(*) as count FROM tickets t WHERE {where}", params)
-            total = cursor.fetchone()['count']
+            if total is None:
+                cursor.execute(f"SELECT COUNT(*) as count FROM tickets t WHERE {where}", params)
+                total = cursor.fetchone()['count']
 
             # Get paginated results
             offset = (page - 1) * per_page
@@ -1745,28 +1941,39 @@ class Ticket:
             cursor.close()
             conn.close()
 
+    def _fetch_messages(self, cursor, include_internal):
+        where = "tm.ticket_id = %s"
+        params = [self.id]
+
+        if not include_internal:
+            where += " AND tm.is_internal_note = FALSE"
+
+        cursor.execute(f"""
+            SELECT tm.*,
+                   c.email as customer_email, c.company_name as customer_name,
+                   a.full_name as admin_name
+            FROM ticket_messages tm
+            LEFT JOIN customers c ON tm.customer_id = c.id
+            LEFT JOIN admin_users a ON tm.admin_user_id = a.id
+            WHERE {where}
+            ORDER BY tm.created_at ASC
+        """, params)
+        return cursor.fetchall()
+
+    def _fetch_attachments(self, cursor):
+        cursor.execute("""
+            SELECT * FROM ticket_attachments
+            WHERE ticket_id = %s
+            ORDER BY created_at ASC
+        """, (self.id,))
+        return cursor.fetchall()
+
     def get_messages(self, include_internal=False):
         """Get all messages for this ticket"""
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         try:
-            where = "tm.ticket_id = %s"
-            params = [self.id]
-
-            if not include_internal:
-                where += " AND tm.is_internal_note = FALSE"
-
-            cursor.execute(f"""
-                SELECT tm.*,
-                       c.email as customer_email, c.company_name as customer_name,
-                       a.full_name as admin_name
-                FROM ticket_messages tm
-                LEFT JOIN customers c ON tm.customer_id = c.id
-                LEFT JOIN admin_users a ON tm.admin_user_id = a.id
-                WHERE {where}
-                ORDER BY tm.created_at ASC
-            """, params)
-            return cursor.fetchall()
+            return self._fetch_messages(cursor, include_internal)
         finally:
             cursor.close()
             conn.close()
@@ -1776,12 +1983,18 @@ class Ticket:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute("""
-                SELECT * FROM ticket_attachments
-                WHERE ticket_id = %s
-                ORDER BY created_at ASC
-            """, (self.id,))
-            return cursor.fetchall()
+            return self._fetch_attachments(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_thread(self, include_internal=False):
+        """Get (messages, attachments) for the ticket page on one pooled connection"""
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            return (self._fetch_messages(cursor, include_internal),
+                    self._fetch_attachments(cursor))
         finally:
             cursor.close()
             conn.close()
@@ -1823,27 +2036,30 @@ class TicketMessage:
         self.created_at = created_at or datetime.now()
         self.updated_at = updated_at
 
+    def _write(self, cursor):
+        if self.id is None:
+            cursor.execute("""
+                INSERT INTO ticket_messages
+                (ticket_id, customer_id, admin_user_id, message, is_internal_note, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (
+                self.ticket_id, self.customer_id, self.admin_user_id,
+                self.message, self.is_internal_note, self.created_at
+            ))
+            self.id = cursor.lastrowid
+
+            # Update ticket's updated_at timestamp
+            cursor.execute(
+                "UPDATE tickets SET updated_at = %s WHERE id = %s",
+                (datetime.now(), self.ticket_id)
+            )
+
     def save(self):
         """Save message to database"""
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
-            if self.id is None:
-                cursor.execute("""
-                    INSERT INTO ticket_messages
-                    (ticket_id, customer_id, admin_user_id, message, is_internal_note, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    self.ticket_id, self.customer_id, self.admin_user_id,
-                    self.message, self.is_internal_note, self.created_at
-                ))
-                self.id = cursor.lastrowid
-
-                # Update ticket's updated_at timestamp
-                cursor.execute(
-                    "UPDATE tickets SET updated_at = %s WHERE id = %s",
-                    (datetime.now(), self.ticket_id)
-                )
+            self._write(cursor)
             conn.commit()
             return self
         finally:
@@ -2988,7 +3204,6 @@ class MonitoringCheck:
 
     def save(self):
         """Store check result in database"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -3012,7 +3227,6 @@ class MonitoringCheck:
     @staticmethod
     def get_recent_by_customer(customer_id, hours=24):
         """Get recent checks for a customer"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -3351,7 +3565,6 @@ class MonitoringAlert:
 
     def save(self):
         """Create alert record"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -3409,7 +3622,6 @@ class MonitoringAlert:
     @staticmethod
     def get_by_id(alert_id):
         """Get alert by ID"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -3428,7 +3640,6 @@ class MonitoringAlert:
     @staticmethod
     def get_unacknowledged(limit=50):
         """Get unacknowledged alerts"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -3453,7 +3664,6 @@ class MonitoringAlert:
     @staticmethod
     def get_recent(limit=50, offset=0):
         """Get recent alerts with pagination"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -3477,7 +3687,6 @@ class MonitoringAlert:
     @staticmethod
     def get_by_customer(customer_id, limit=20):
         """Get alerts for a specific customer"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -3606,7 +3815,6 @@ class Customer2FASettings:
 
     def use_backup_code(self, used_code_hash):
         """Mark a backup code as used by removing it from the list"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
@@ -3961,8 +4169,6 @@ class CustomerApiKey:
     @staticmethod
     def create(customer_id, name, scopes=None, expires_days=None):
         """Create a new API key, returns (ApiKey, raw_key)"""
-        import secrets
-        import hashlib
 
         # Generate key: prefix_randompart
         prefix = secrets.token_hex(4)
@@ -4003,7 +4209,6 @@ class CustomerApiKey:
     @staticmethod
     def verify(raw_key):
         """Verify an API key and return the associated record"""
-        import hashlib
         if not raw_key or not raw_key.startswith('shk_'):
             return None
 
@@ -4097,8 +4302,6 @@ class CustomerWebhook:
     @staticmethod
     def create(customer_id, name, url, events):
         """Create a new webhook"""
-        import secrets
-        import json
 
         secret = secrets.token_hex(32)
         events_json = json.dumps(events) if isinstance(events, list) else events
@@ -4162,7 +4365,6 @@ class CustomerWebhook:
 
     def update(self, **kwargs):
         """Update webhook settings"""
-        import json
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
@@ -8,6 +8,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Stripe calls block the gunicorn worker thread serving the request. Bound
+# them well under GUNICORN_TIMEOUT (the library default is 80s) and let the
+# library retry transient network errors with idempotency keys.
+STRIPE_TIMEOUT = float(os.getenv('STRIPE_TIMEOUT', '20'))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', '2'))
+
 # Global stripe configuration
 _stripe_config = {
     'secret_key': None,
@@ -28,6 +34,8 @@ def init_stripe():
         return False
 
     stripe.api_key = _stripe_config['secret_key']
+    stripe.default_http_client = stripe.http_client.new_default_http_client(timeout=STRIPE_TIMEOUT)
+    stripe.max_network_retries = STRIPE_MAX_NETWORK_RETRIES
     _stripe_config['initialized'] = True
 
     logger.info("Stripe initialized successfully")
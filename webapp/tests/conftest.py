@@ -48,6 +48,32 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@pytest.fixture
+def fake_redis():
+    """
+    Create an in-memory stand-in for a Redis client.
+    Values are stored as bytes, like redis-py returns them.
+    """
+    from unittest.mock import MagicMock
+
+    store = {}
+
+    def encode(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def incr(key, amount=1):
+        value = int(store.get(key, b'0')) + amount
+        store[key] = encode(value)
+        return value
+
+    redis_client = MagicMock()
+    redis_client.get.side_effect = lambda key: store.get(key)
+    redis_client.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, encode(value))
+    redis_client.delete.side_effect = lambda *keys: sum(store.pop(k, None) is not None for k in keys)
+    redis_client.incr.side_effect = incr
+    return redis_client
+
+
 @pytest.fixture
 def auth_headers():
     """Return headers for authenticated requests"""
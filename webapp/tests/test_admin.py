@@ -98,3 +98,943 @@ class TestAdminSecurityHeaders:
         # Check for common security headers
         assert response.status_code == 200
         # The actual headers depend on Flask-Talisman configuration
+
+
+class TestSystemProbeCache:
+    """Test TTL caching of system health probes"""
+
+    def test_ttl_cache_reuses_result_within_ttl(self, app):
+        """Test cached helper is only evaluated once within the TTL"""
+        from admin.routes import ttl_cache
+
+        calls = []
+
+        @ttl_cache(60)
+        def probe():
+            calls.append(1)
+            return {'ok': True}
+
+        assert probe() == {'ok': True}
+        assert probe() == {'ok': True}
+        assert len(calls) == 1
+
+    def test_ttl_cache_clear_forces_refresh(self, app):
+        """Test cache_clear() causes the next call to re-run the helper"""
+        from admin.routes import ttl_cache
+
+        calls = []
+
+        @ttl_cache(60)
+        def probe():
+            calls.append(1)
+            return len(calls)
+
+        assert probe() == 1
+        probe.cache_clear()
+        assert probe() == 2
+
+    def test_gather_stats_returns_results_by_name(self, app):
+        """Test gather_stats maps each task name to its result"""
+        from admin.routes import gather_stats
+
+        results = gather_stats(a=lambda: 1, b=lambda: 'two')
+        assert results == {'a': 1, 'b': 'two'}
+
+
+class TestRowHelpers:
+    """Test cursor row conversion helpers"""
+
+    def test_rows_as_dicts_maps_columns(self, app):
+        """Test rows_as_dicts zips cursor.description names onto each row"""
+        from admin.routes import rows_as_dicts
+
+        cursor = Mock()
+        cursor.description = [('job_id',), ('message',)]
+        cursor.fetchall.return_value = [('j1', 'a'), ('j2', 'b')]
+
+        assert rows_as_dicts(cursor) == [
+            {'job_id': 'j1', 'message': 'a'},
+            {'job_id': 'j2', 'message': 'b'},
+        ]
+
+
+class TestCustomerFilterSql:
+    """Test cached customer filter SQL construction"""
+
+    def test_placeholder_count_matches_filters(self, app):
+        """Test each filter shape has the right number of %s placeholders"""
+        from admin.routes import build_customer_filter_sql
+
+        count_sql, select_sql = build_customer_filter_sql(True, True, False)
+        assert count_sql.count('%s') == 4
+        # Select adds LIMIT/OFFSET placeholders
+        assert select_sql.count('%s') == 6
+
+        count_sql, _ = build_customer_filter_sql(False, False, False)
+        assert 'WHERE 1=1' in count_sql
+
+    def test_same_shape_returns_cached_sql(self, app):
+        """Test repeated calls with the same shape reuse the built strings"""
+        from admin.routes import build_customer_filter_sql
+
+        assert build_customer_filter_sql(False, True, True) is build_customer_filter_sql(False, True, True)
+
+
+class TestDuplicateCustomerField:
+    """Test mapping of duplicate-key errors to customer columns"""
+
+    def test_detects_qualified_and_bare_key_names(self, app):
+        """Test both MySQL 8 ('customers.email') and older ('domain') key formats"""
+        from mysql.connector import IntegrityError
+        from admin.routes import duplicate_customer_field
+
+        err = IntegrityError(msg="Duplicate entry 'a@b.c' for key 'customers.email'", errno=1062)
+        assert duplicate_customer_field(err) == 'email'
+
+        err = IntegrityError(msg="Duplicate entry 'b.com' for key 'domain'", errno=1062)
+        assert duplicate_customer_field(err) == 'domain'
+
+    def test_ignores_non_duplicate_errors(self, app):
+        """Test other integrity errors are not attributed to a column"""
+        from mysql.connector import IntegrityError
+        from admin.routes import duplicate_customer_field
+
+        err = IntegrityError(msg="Cannot add or update a child row", errno=1452)
+        assert duplicate_customer_field(err) is None
+
+
+class TestTempPassword:
+    """Test temporary admin password generation"""
+
+    def test_temp_password_shape(self, app):
+        """Test temp passwords are 16 chars ending in a symbol and a digit"""
+        from admin.routes import generate_temp_password
+
+        password = generate_temp_password()
+        assert len(password) == 16
+        assert password[-2] in '!@#$%^&*'
+        assert password[-1].isdigit()
+        assert generate_temp_password() != password
+
+
+class TestProvisioningQueueSingleton:
+    """Test the shared provisioning queue"""
+
+    def test_queue_is_reused_across_calls(self, app):
+        """Test the queue is built once on the shared Redis pool"""
+        from admin import routes
+
+        redis_conn = MagicMock()
+        with patch.object(routes, '_provisioning_queue', None), \
+                patch.object(routes, 'get_redis_connection', return_value=redis_conn), \
+                patch.object(routes, 'ProvisioningQueue') as queue_cls:
+            first = routes.get_provisioning_queue()
+            assert routes.get_provisioning_queue() is first
+
+        queue_cls.assert_called_once_with(connection_pool=redis_conn.connection_pool)
+
+
+class TestCurrentAdminMemo:
+    """Test per-request memoization of the current admin"""
+
+    def test_admin_loaded_once_per_request(self, app):
+        """Test repeated calls in one request hit the database once"""
+        from flask import session
+        from admin import routes
+
+        admin = Mock()
+        with app.test_request_context(), \
+                patch.object(routes.AdminUser, 'get_by_id', return_value=admin) as get_by_id:
+            session['admin_user_id'] = 7
+            assert routes.get_current_admin() is admin
+            assert routes.get_current_admin() is admin
+            get_by_id.assert_called_once_with(7)
+
+            session['admin_user_id'] = 8
+            routes.get_current_admin()
+            assert get_by_id.call_count == 2
+
+    def test_no_admin_without_session(self, app):
+        """Test None is returned when nobody is logged in"""
+        from admin import routes
+
+        with app.test_request_context():
+            assert routes.get_current_admin() is None
+
+
+class TestAdminResetEmailJob:
+    """Test the queued admin password reset email job"""
+
+    def test_job_raises_when_send_fails(self, app):
+        """Test a failed send raises so RQ can retry the job"""
+        import email_service as email_module
+
+        with patch.object(email_module.email_service, 'send_admin_password_reset_email',
+                          return_value=False):
+            with pytest.raises(RuntimeError):
+                email_module.send_admin_password_reset_email_job('a@example.com', 'A', 'x')
+
+        with patch.object(email_module.email_service, 'send_admin_password_reset_email',
+                          return_value=True) as send:
+            email_module.send_admin_password_reset_email_job('a@example.com', 'A', 'x')
+        send.assert_called_once_with('a@example.com', 'A', 'x')
+
+
+class TestAdminUserIterAll:
+    """Test streaming admin user listing"""
+
+    def test_iter_all_streams_rows_and_releases_connection(self, app):
+        """Test rows become AdminUser objects and the connection is closed"""
+        from admin import models
+
+        cursor = MagicMock()
+        cursor.__iter__.return_value = iter([
+            {'id': 1, 'email': 'a@example.com', 'full_name': 'A'},
+            {'id': 2, 'email': 'b@example.com', 'full_name': 'B'},
+        ])
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        with patch.object(models, 'get_db_connection', return_value=conn):
+            admins = models.AdminUser.iter_all()
+            conn.cursor.assert_not_called()
+            assert [a.email for a in admins] == ['a@example.com', 'b@example.com']
+
+        conn.cursor.assert_called_once_with(dictionary=True, buffered=False)
+        cursor.close.assert_called_once()
+        conn.close.assert_called_once()
+
+
+class TestAuditLogBatching:
+    """Test buffered audit log writes"""
+
+    def test_queued_entries_are_written_in_one_batch(self, app):
+        """Test several actions are flushed with a single executemany"""
+        from datetime import datetime
+        from admin import models
+
+        written = []
+        with patch.object(models, '_ensure_audit_writer'), \
+                patch.object(models, '_write_audit_entries', side_effect=written.append):
+            models.log_admin_action(1, 'suspend_customer', 'customer', 5, 'x', '127.0.0.1')
+            models.log_admin_action(1, 'reactivate_customer', 'customer', 5, 'y', '127.0.0.1')
+            models.flush_audit_log()
+
+        assert len(written) == 1
+        assert [entry[1] for entry in written[0]] == ['suspend_customer', 'reactivate_customer']
+        assert isinstance(written[0][0][6], datetime)
+
+    def test_full_queue_writes_synchronously(self, app):
+        """Test entries are not dropped when the buffer is full"""
+        import queue
+        from admin import models
+
+        with patch.object(models, '_ensure_audit_writer'), \
+                patch.object(models, '_audit_queue', queue.Queue(maxsize=1)), \
+                patch.object(models, '_write_audit_entries') as write:
+            models.log_admin_action(1, 'first')
+            models.log_admin_action(1, 'second')
+
+        write.assert_called_once()
+        assert write.call_args[0][0][0][1] == 'second'
+
+
+class TestAdminPasswordRehash:
+    """Test upgrading admin password hashes on login"""
+
+    def test_outdated_hash_is_upgraded_after_successful_check(self, app):
+        """Test a pbkdf2 hash is replaced with the configured method"""
+        from werkzeug.security import generate_password_hash
+        from admin.models import AdminUser
+        from models import password_needs_rehash
+
+        admin = AdminUser(id=3, password_hash=generate_password_hash('s3cret!', method='pbkdf2:sha256'))
+        assert password_needs_rehash(admin.password_hash)
+
+        with patch.object(AdminUser, 'update_password_hash') as update:
+            assert admin.check_password('s3cret!')
+
+        update.assert_called_once()
+        assert not password_needs_rehash(admin.password_hash)
+        assert admin.check_password('s3cret!')
+
+    def test_wrong_password_does_not_rehash(self, app):
+        """Test failed checks leave the stored hash alone"""
+        from werkzeug.security import generate_password_hash
+        from admin.models import AdminUser
+
+        old_hash = generate_password_hash('s3cret!', method='pbkdf2:sha256')
+        admin = AdminUser(id=3, password_hash=old_hash)
+
+        with patch.object(AdminUser, 'update_password_hash') as update:
+            assert not admin.check_password('wrong')
+
+        update.assert_not_called()
+        assert admin.password_hash == old_hash
+
+
+class TestCreateCustomerPortRetry:
+    """Test create_customer retries when its port is taken concurrently"""
+
+    def test_port_conflict_retries_with_next_port(self, app):
+        """Test a web_port duplicate picks a new port instead of failing"""
+        from mysql.connector import IntegrityError
+        from admin import routes
+
+        taken = IntegrityError(msg="Duplicate entry '8005' for key 'customers.web_port'", errno=1062)
+        cursor = MagicMock()
+        cursor.execute.side_effect = [taken, None]
+        cursor.lastrowid = 42
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        form = {'email': 'a@example.com', 'password': 'Secret123!', 'company_name': 'A',
+                'domain': 'a.example.com', 'platform': 'woocommerce'}
+        with app.test_request_context('/admin/manage-customers/create', method='POST', data=form), \
+                patch.object(routes, 'get_current_admin', return_value=Mock(id=1)), \
+                patch.object(routes.PortManager, 'get_next_available_port', side_effect=[8005, 8006]), \
+                patch.object(routes, 'get_db_connection', return_value=conn), \
+                patch.object(routes, 'invalidate_customer_list_cache'), \
+                patch.object(routes, 'log_admin_action'):
+            response = routes.create_customer.__wrapped__.__wrapped__()
+
+        assert response.status_code == 302
+        ports = [call.args[1][-1] for call in cursor.execute.call_args_list]
+        assert ports == [8005, 8006]
+        conn.rollback.assert_called_once()
+
+
+class TestCustomerRowsCache:
+    """Test the Redis-cached manage-customers table body"""
+
+    def test_rows_rendered_once_and_csrf_filled_per_request(self, app, fake_redis):
+        """Test a cached table is reused and never carries a stale CSRF token"""
+        from datetime import datetime
+        from admin import routes
+
+        rows = [{'id': 9, 'email': 'a@example.com', 'company_name': 'A', 'domain': 'a.example.com',
+                 'platform': 'woocommerce', 'status': 'active', 'created_at': datetime(2024, 5, 1)}]
+
+        with patch.object(routes, 'get_redis_connection', return_value=fake_redis), \
+                patch.object(routes, 'get_customers_keyset', return_value=(rows, True)) as fetch:
+            with app.test_request_context():
+                with patch.object(routes, 'generate_csrf', return_value='token-one'):
+                    first_html, first_cursor = routes.render_customer_rows()
+            with app.test_request_context():
+                with patch.object(routes, 'generate_csrf', return_value='token-two'):
+                    second_html, second_cursor = routes.render_customer_rows()
+
+        assert fetch.call_count == 1
+        assert 'a@example.com' in second_html
+        assert 'token-one' in first_html and 'token-two' in second_html
+        assert routes.CUSTOMER_ROWS_CSRF_PLACEHOLDER not in second_html
+        assert second_cursor == first_cursor == {'after_created': '2024-05-01T00:00:00', 'after_id': 9}
+
+    def test_falls_back_to_db_when_redis_unavailable(self, app):
+        """Test the table still renders if Redis raises"""
+        from admin import routes
+
+        redis_conn = MagicMock()
+        redis_conn.get.side_effect = ConnectionError('down')
+        with patch.object(routes, 'get_redis_connection', return_value=redis_conn), \
+                patch.object(routes, 'get_customers_keyset', return_value=([], False)):
+            with app.test_request_context():
+                rows_html, next_cursor = routes.render_customer_rows()
+
+        assert next_cursor is None
+        redis_conn.setex.assert_not_called()
+
+
+class TestPageContentJson:
+    """Test CMS page content (de)serialization"""
+
+    def test_editor_round_trip_preserves_nested_json(self, app):
+        """Test serialize/parse round-trips nested sections"""
+        from admin.routes import serialize_page_content, parse_page_editor_content
+
+        content = {'hero': {'title': 'Fast hosting', 'features': [{'name': 'SSL', 'on': True}]},
+                   'faq': [{'q': 'Why?', 'a': 'Speed – and ünïcode'}]}
+        parsed, error = parse_page_editor_content(serialize_page_content(content))
+
+        assert error is None
+        assert parsed == content
+
+    def test_invalid_json_section_reports_error(self, app):
+        """Test malformed JSON sections produce an editor error"""
+        from admin.routes import parse_page_editor_content
+
+        parsed, error = parse_page_editor_content("## section: faq (json)\n```json\n[{]\n```\n")
+        assert parsed == {}
+        assert "Invalid JSON in section 'faq'" in error
+
+    def test_text_before_first_section_is_ignored(self, app):
+        """Test preamble text is dropped and section bodies are stripped"""
+        from admin.routes import parse_page_editor_content
+
+        raw = "notes\n## section: hero.title\n\n  Hi  \n\n## section: about\nUs\n## section: faq (json)\n```json\n```\n"
+        parsed, error = parse_page_editor_content(raw)
+
+        assert error is None
+        assert parsed == {'hero': {'title': 'Hi'}, 'about': 'Us', 'faq': {}}
+
+
+class TestPageHtmlCache:
+    """Test Redis caching of rendered CMS page HTML"""
+
+    def test_rendered_html_is_reused_until_invalidated(self, app, fake_redis):
+        """Test identical content renders once and invalidation forces a re-render"""
+        from admin import routes
+
+        content = {'title': 'About', 'hero': {'headline': 'Hi'}}
+
+        with app.test_request_context(), \
+                patch.object(routes, 'get_redis_connection', return_value=fake_redis), \
+                patch.object(routes, '_render_page_html', return_value='<html>about</html>') as render:
+            assert routes.render_page_content('about', content) == '<html>about</html>'
+            assert routes.render_page_content('about', dict(content)) == '<html>about</html>'
+            assert render.call_count == 1
+
+            routes.render_page_content('about', content, preview=True)
+            assert render.call_count == 2
+
+            routes.invalidate_page_html_cache('about')
+            routes.render_page_content('about', content)
+            assert render.call_count == 3
+
+    def test_stored_json_text_shares_the_cache_key(self, app, fake_redis):
+        """Test passing the stored JSON text hits the entry cached from the dict"""
+        from admin import routes
+
+        content = {'title': 'About', 'hero': {'headline': 'Hi'}}
+        stored = routes.page_json_dumps(content)
+
+        with app.test_request_context(), \
+                patch.object(routes, 'get_redis_connection', return_value=fake_redis), \
+                patch.object(routes, '_render_page_html', return_value='<html>about</html>') as render:
+            routes.render_page_content('about', content, preview=True)
+            with patch.object(routes, 'page_json_dumps') as dumps:
+                routes.render_page_content('about', content, preview=True, content_json=stored)
+
+        dumps.assert_not_called()
+        assert render.call_count == 1
+
+
+class TestPageBaseTemplate:
+    """Test the precompiled CMS page shell"""
+
+    def test_shell_renders_title_and_preview_banner(self, app):
+        """Test the compiled shell escapes the title and toggles the preview banner"""
+        from admin.routes import _render_page_html
+
+        with app.test_request_context():
+            html = _render_page_html('about', {'title': 'About <Us>'}, preview=True)
+            assert 'About &lt;Us&gt; - ShopHosting.io' in html
+            assert 'PREVIEW MODE' in html
+            assert 'PREVIEW MODE' not in _render_page_html('about', {'title': 'About'})
+
+    def test_cms_values_are_escaped_but_fragment_html_is_kept(self, app):
+        """Test page fragments render as HTML with CMS text escaped"""
+        from admin.routes import _render_page_html
+
+        with app.test_request_context():
+            html = _render_page_html('home', {'hero': {'headline': '<script>x</script>'}})
+
+        assert '<section class="hero">' in html
+        assert '&lt;script&gt;x&lt;/script&gt;' in html
+        assert '<script>x</script>' not in html
+
+    def test_unsafe_link_schemes_are_neutralized(self, app):
+        """Test javascript: links from the CMS are replaced"""
+        from admin.routes import _render_page_html, safe_page_link
+
+        assert safe_page_link('/signup') == '/signup'
+        assert safe_page_link('https://example.com/x') == 'https://example.com/x'
+        assert safe_page_link(' JavaScript:alert(1)') == '#'
+        assert safe_page_link('data:text/html,x') == '#'
+
+        with app.test_request_context():
+            html = _render_page_html('home', {'hero': {'cta_link': 'javascript:alert(1)'}})
+        assert 'javascript:' not in html
+
+
+class TestPageEditTransaction:
+    """Test page edits commit content and version together"""
+
+    def test_failed_version_insert_rolls_back(self, app):
+        """Test a failing INSERT leaves no half-applied edit"""
+        from admin import routes
+
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'id': 4, 'title': 'About', 'content': '{}'}
+        cursor.execute.side_effect = [None, None, RuntimeError('disk full')]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        form = {'content_body': '## section: hero.headline\nHi\n', 'title': 'About'}
+        with app.test_request_context('/admin/pages/about/edit', method='POST', data=form), \
+                patch.object(routes, 'get_current_admin', return_value=Mock(id=1)), \
+                patch.object(routes, 'get_db_connection', return_value=conn), \
+                patch.object(routes, 'render_template', return_value='form') as render:
+            assert routes.page_edit.__wrapped__('about') == 'form'
+
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+        assert render.call_args.kwargs['editor_content'] == form['content_body']
+
+    def test_open_uses_stored_editor_markdown(self, app):
+        """Test the editor opens with saved markdown, serializing only legacy rows"""
+        from admin import routes
+
+        def open_editor(row):
+            cursor = MagicMock()
+            cursor.fetchone.return_value = row
+            conn = MagicMock()
+            conn.cursor.return_value = cursor
+            with app.test_request_context('/admin/pages/about/edit'), \
+                    patch.object(routes, 'get_current_admin', return_value=Mock(id=1)), \
+                    patch.object(routes, 'get_db_connection', return_value=conn), \
+                    patch.object(routes, 'serialize_page_content', return_value='serialized') as serialize, \
+                    patch.object(routes, 'render_template', return_value='form') as render:
+                routes.page_edit.__wrapped__('about')
+            return render.call_args.kwargs['editor_content'], serialize
+
+        row = {'id': 4, 'title': 'About', 'content': '{"about": "Us"}'}
+        editor_content, serialize = open_editor(dict(row, editor_markdown='## section: about\nUs\n'))
+        assert editor_content == '## section: about\nUs\n'
+        serialize.assert_not_called()
+
+        editor_content, serialize = open_editor(dict(row, editor_markdown=None))
+        assert editor_content == 'serialized'
+        serialize.assert_called_once_with({'about': 'Us'})
+
+
+class TestPageHistoryQuery:
+    """Test page history is formatted and capped in SQL"""
+
+    def test_versions_query_is_limited(self, app):
+        """Test the versions query formats dates and applies the limit"""
+        from admin import routes
+
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'id': 4, 'title': 'About'}
+        cursor.fetchall.return_value = [{'id': 9, 'created_at': '2026-01-02 03:04:05'}]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        with app.test_request_context('/admin/pages/about/history'), \
+                patch.object(routes, 'get_current_admin', return_value=Mock(id=1)), \
+                patch.object(routes, 'get_db_connection', return_value=conn), \
+                patch.object(routes, 'render_template', return_value='history') as render:
+            assert routes.page_history.__wrapped__('about') == 'history'
+
+        sql, params = cursor.execute.call_args.args
+        assert 'DATE_FORMAT(pv.created_at' in sql
+        assert params == (4, routes.PAGE_HISTORY_LIMIT)
+        assert render.call_args.kwargs['versions'][0]['created_at'] == '2026-01-02 03:04:05'
+
+
+class TestPricingPlansCache:
+    """Test the admin pricing plan list is cached in Redis"""
+
+    def test_split_plans_cached_on_miss(self, app):
+        """Test a cache miss queries, splits by platform and stores the result"""
+        import json
+        from admin import routes
+        from models import PricingPlan
+
+        redis_conn = MagicMock()
+        redis_conn.get.return_value = None
+        plans = [PricingPlan(id=1, platform='woocommerce'), PricingPlan(id=2, platform='magento')]
+
+        with patch.object(routes, 'get_redis_connection', return_value=redis_conn), \
+                patch.object(routes.PricingPlan, 'get_all', return_value=plans):
+            woo, mag = routes.get_pricing_plans_by_platform()
+
+        assert [p.id for p in woo] == [1]
+        assert [p.id for p in mag] == [2]
+        key, ttl, payload = redis_conn.setex.call_args.args
+        assert key == routes.PRICING_PLANS_CACHE_KEY
+        assert ttl == routes.PRICING_PLANS_CACHE_TTL
+        assert [row['id'] for row in json.loads(payload)['woocommerce']] == [1]
+
+    def test_cache_hit_skips_database(self, app):
+        """Test cached plans are returned without querying"""
+        import json
+        from decimal import Decimal
+        from admin import routes
+
+        redis_conn = MagicMock()
+        redis_conn.get.return_value = json.dumps({'woocommerce': [{'id': 3, 'price_monthly': '29.99'}],
+                                                  'magento': []})
+
+        with patch.object(routes, 'get_redis_connection', return_value=redis_conn), \
+                patch.object(routes.PricingPlan, 'get_all') as get_all:
+            woo, mag = routes.get_pricing_plans_by_platform()
+
+        get_all.assert_not_called()
+        assert [p.id for p in woo] == [3] and mag == []
+        assert woo[0].price_monthly == Decimal('29.99')
+
+    def test_active_plans_cached_and_invalidated_together(self, app, fake_redis):
+        """Test the public plan list is cached and dropped with the admin lists"""
+        from datetime import datetime
+        from decimal import Decimal
+        from admin import routes
+        from models import PricingPlan
+
+
+        with patch.object(routes, 'get_redis_connection', return_value=fake_redis), \
+                patch.object(routes.PricingPlan, 'get_all_active',
+                             return_value=[PricingPlan(id=5, price_monthly=Decimal('19.00'),
+                                                       features={'staging': True},
+                                                       created_at=datetime(2025, 1, 2))]) as get_all_active:
+            assert [p.id for p in routes.get_active_pricing_plans()] == [5]
+            cached, = routes.get_active_pricing_plans()
+            assert get_all_active.call_count == 1
+            assert cached.price_monthly == Decimal('19.00')
+            assert cached.created_at == datetime(2025, 1, 2)
+            assert cached.has_feature('staging')
+
+            routes.invalidate_pricing_plans_cache()
+            routes.get_active_pricing_plans()
+            assert get_all_active.call_count == 2
+
+    def test_plan_lookup_uses_cached_lists(self, app):
+        """Test plans are found by id in the cached lists, else read from the DB"""
+        import json
+        from admin import routes
+
+        redis_conn = MagicMock()
+        redis_conn.get.return_value = json.dumps({'woocommerce': [{'id': 1, 'platform': 'woocommerce'}],
+                                                  'magento': [{'id': 2, 'platform': 'magento'}]})
+
+        with patch.object(routes, 'get_redis_connection', return_value=redis_conn), \
+                patch.object(routes.PricingPlan, 'get_by_id', return_value=None) as get_by_id:
+            assert routes.get_pricing_plan(2).platform == 'magento'
+            get_by_id.assert_not_called()
+            assert routes.get_pricing_plan(9) is None
+            get_by_id.assert_called_once_with(9)
+
+
+class TestApiPageContentEtag:
+    """Test conditional GETs on the page content API"""
+
+    def _call(self, app, headers=None):
+        from admin import routes
+        from datetime import datetime
+
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {
+            'id': 4, 'page_slug': 'about', 'title': 'About', 'content': '{"a": 1}',
+            'is_published': True, 'published_at': None,
+            'updated_at': datetime(2026, 1, 2, 3, 4, 5),
+        }
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        with app.test_request_context('/admin/api/pages/about', headers=headers or {}), \
+                patch.object(routes, 'get_db_connection', return_value=conn), \
+                patch.object(routes, 'page_json_loads', wraps=routes.page_json_loads) as loads:
+            response = routes.api_page_content.__wrapped__('about')
+        return response, loads
+
+    def test_response_carries_weak_etag(self, app):
+        """Test a full response includes a weak ETag"""
+        response, _ = self._call(app)
+
+        assert response.status_code == 200
+        assert response.headers['ETag'].startswith('W/"4-')
+        assert response.get_json()['content'] == {'a': 1}
+
+    def test_matching_if_none_match_returns_304(self, app):
+        """Test an unchanged page is answered with 304 and no body"""
+        first, _ = self._call(app)
+        response, loads = self._call(app, {'If-None-Match': first.headers['ETag']})
+
+        assert response.status_code == 304
+        assert response.get_data() == b''
+        loads.assert_not_called()
+
+
+class TestPagePublishSingleStatement:
+    """Test publish/unpublish find and update the page in one statement"""
+
+    def _publish(self, app, lastrowid):
+        from admin import routes
+
+        cursor = MagicMock(lastrowid=lastrowid)
+        cursor.fetchone.return_value = ('About Us',)
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        with app.test_request_context('/admin/pages/about/publish', method='POST'), \
+                patch.object(routes, 'get_current_admin', return_value=Mock(id=1)), \
+                patch.object(routes, 'get_db_connection', return_value=conn), \
+                patch.object(routes, 'invalidate_page_html_cache'), \
+                patch.object(routes, 'log_admin_action') as log_action, \
+                patch.object(routes, 'flash') as flash:
+            routes.page_publish.__wrapped__('about')
+        return cursor, conn, log_action, flash
+
+    def test_publish_updates_by_slug(self, app):
+        """Test the page id comes back from the UPDATE itself"""
+        cursor, conn, log_action, flash = self._publish(app, 7)
+
+        update, title_lookup = cursor.execute.call_args_list
+        assert 'WHERE page_slug = %s' in update.args[0]
+        assert title_lookup.args == ("SELECT title FROM page_content WHERE id = %s", (7,))
+        conn.commit.assert_called_once()
+        assert log_action.call_args.args[3] == 7
+        flash.assert_called_once_with('Page "About Us" has been published.', 'success')
+
+    def test_missing_page_is_reported(self, app):
+        """Test an unmatched slug flashes not found without committing"""
+        _, conn, log_action, flash = self._publish(app, 0)
+
+        conn.commit.assert_not_called()
+        log_action.assert_not_called()
+        flash.assert_called_once_with('Page not found.', 'error')
+
+
+class TestTicketAttachmentDownload:
+    """Test ticket attachment downloads"""
+
+    def _attachment(self, file_path='2026/01/TKT-1/ab12_report.pdf', name='report.pdf'):
+        from models import TicketAttachment
+        return TicketAttachment(id=1, ticket_id=1, file_path=file_path,
+                                original_filename=name, mime_type='application/pdf')
+
+    def test_accel_redirect_hands_file_to_nginx(self, app):
+        """Test the response carries only headers when nginx serves the file"""
+        from unittest.mock import patch
+        import attachments
+
+        with app.test_request_context(), \
+                patch.object(attachments, 'TICKET_ACCEL_REDIRECT_PREFIX', '/internal-tickets/'):
+            response = attachments.send_ticket_attachment(self._attachment())
+
+        assert response.headers['X-Accel-Redirect'] == '/internal-tickets/2026/01/TKT-1/ab12_report.pdf'
+        assert response.headers['Content-Type'] == 'application/pdf'
+        assert response.headers['Content-Disposition'] == 'attachment; filename=report.pdf'
+        assert response.get_data() == b''
+
+    def test_rejects_paths_outside_upload_dir(self, app):
+        """Test a stored path escaping the upload directory is a 404"""
+        from unittest.mock import patch
+        from werkzeug.exceptions import NotFound
+        import attachments
+
+        with app.test_request_context(), \
+                patch.object(attachments, 'TICKET_ACCEL_REDIRECT_PREFIX', '/internal-tickets/'):
+            with pytest.raises(NotFound):
+                attachments.send_ticket_attachment(self._attachment(file_path='../../etc/passwd'))
+
+    def test_streams_from_upload_dir_without_nginx(self, app, tmp_path):
+        """Test Flask serves the file when no accel prefix is configured"""
+        from unittest.mock import patch
+        import attachments
+
+        (tmp_path / 'report.pdf').write_bytes(b'%PDF')
+        with app.test_request_context(), \
+                patch.object(attachments, 'TICKET_ACCEL_REDIRECT_PREFIX', ''), \
+                patch.object(attachments, 'TICKET_UPLOAD_PATH', str(tmp_path)):
+            response = attachments.send_ticket_attachment(self._attachment(file_path='report.pdf'))
+            response.direct_passthrough = False
+            assert response.get_data() == b'%PDF'
+
+        assert 'X-Accel-Redirect' not in response.headers
+
+    def test_guess_attachment_type(self):
+        """Test MIME lookup by extension with an octet-stream default"""
+        from attachments import guess_attachment_type
+
+        assert guess_attachment_type('Report.PDF') == 'application/pdf'
+        assert guess_attachment_type('notes.txt') == 'text/plain'
+        assert guess_attachment_type('blob.unknownext') == 'application/octet-stream'
+
+
+class TestTicketAttachmentUpload:
+    """Test ticket attachment uploads are size-checked while copying"""
+
+    def test_copy_upload_within_limit(self, tmp_path):
+        """Test a small upload is written and its size returned"""
+        import io
+        import app as app_module
+
+        target = tmp_path / 'file.txt'
+        assert app_module.copy_upload(io.BytesIO(b'x' * 100), str(target), 100) == 100
+        assert target.read_bytes() == b'x' * 100
+
+    def test_copy_upload_over_limit_removes_file(self, tmp_path):
+        """Test an oversized upload is rejected and the partial file removed"""
+        import io
+        import app as app_module
+
+        target = tmp_path / 'file.txt'
+        data = io.BytesIO(b'x' * (app_module.UPLOAD_CHUNK_SIZE * 3))
+        assert app_module.copy_upload(data, str(target), app_module.UPLOAD_CHUNK_SIZE) is None
+        assert not target.exists()
+        # Stopped after the chunk that crossed the limit
+        assert data.tell() == app_module.UPLOAD_CHUNK_SIZE * 2
+
+
+class TestTicketCategoryCache:
+    """Test ticket categories are cached per process"""
+
+    def test_categories_loaded_once(self):
+        """Test repeated lookups reuse the cached active list"""
+        from admin import routes
+        from models import TicketCategory
+
+        categories = [TicketCategory(id=1, name='Billing'), TicketCategory(id=2, name='Technical')]
+        routes.get_ticket_categories.cache_clear()
+        try:
+            with patch.object(routes.TicketCategory, 'get_all_active', return_value=categories) as get_all, \
+                    patch.object(routes.TicketCategory, 'get_by_id') as get_by_id:
+                assert routes.get_ticket_categories() == categories
+                assert routes.get_ticket_category(2).name == 'Technical'
+                assert routes.get_ticket_category(None) is None
+                get_all.assert_called_once()
+                get_by_id.assert_not_called()
+        finally:
+            routes.get_ticket_categories.cache_clear()
+
+    def test_inactive_category_falls_back_to_db(self):
+        """Test a category missing from the active list is fetched by id"""
+        from admin import routes
+        from models import TicketCategory
+
+        routes.get_ticket_categories.cache_clear()
+        try:
+            with patch.object(routes.TicketCategory, 'get_all_active', return_value=[]), \
+                    patch.object(routes.TicketCategory, 'get_by_id',
+                                 return_value=TicketCategory(id=9, name='Old')) as get_by_id:
+                assert routes.get_ticket_category(9).name == 'Old'
+                get_by_id.assert_called_once_with(9)
+        finally:
+            routes.get_ticket_categories.cache_clear()
+
+
+class TestTicketThread:
+    """Test ticket pages load messages and attachments together"""
+
+    def test_thread_uses_one_connection(self):
+        """Test messages and attachments share one pooled connection"""
+        import models
+        from models import Ticket
+
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[{'id': 1, 'message': 'hi'}], [{'id': 5, 'filename': 'a.png'}]]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        with patch.object(models, 'get_db_connection', return_value=conn) as get_conn:
+            messages, attachments = Ticket(id=3).get_thread(include_internal=False)
+
+        get_conn.assert_called_once()
+        assert messages == [{'id': 1, 'message': 'hi'}]
+        assert attachments == [{'id': 5, 'filename': 'a.png'}]
+        assert 'is_internal_note = FALSE' in cursor.execute.call_args_list[0].args[0]
+
+
+class TestTicketCountCache:
+    """Test the customer ticket list reuses a cached total"""
+
+    def test_cached_total_skips_count(self, app, fake_redis):
+        """Test a cached count is passed through and a miss is stored with its own TTL"""
+        import app as app_module
+
+
+        with patch.object(app_module, 'get_redis_client', return_value=fake_redis), \
+                patch.object(app_module.Ticket, 'get_by_customer', return_value=([], 3)) as get_by_customer:
+            app_module.get_customer_tickets(7, status='open')
+            app_module.get_customer_tickets(7, status='open', page=2)
+
+        assert get_by_customer.call_args_list[0].kwargs['total'] is None
+        assert get_by_customer.call_args_list[1].kwargs['total'] == 3
+        fake_redis.setex.assert_called_once_with(
+            'tickets:count:7:open', app_module.TICKET_COUNT_CACHE_TTL, 3)
+
+    def test_unknown_status_not_cached(self, app):
+        """Test arbitrary ?status= values don't create cache keys"""
+        import app as app_module
+
+        redis_client = MagicMock()
+
+        with patch.object(app_module, 'get_redis_client', return_value=redis_client), \
+                patch.object(app_module.Ticket, 'get_by_customer', return_value=([], 0)):
+            app_module.get_customer_tickets(7, status='bogus')
+
+        redis_client.get.assert_not_called()
+        redis_client.setex.assert_not_called()
+
+    def test_invalidate_drops_every_status(self, app):
+        """Test invalidation deletes the unfiltered and every per-status count"""
+        import app as app_module
+
+        redis_client = MagicMock()
+
+        with patch.object(app_module, 'get_redis_client', return_value=redis_client):
+            app_module.invalidate_ticket_counts(7)
+
+        keys = redis_client.delete.call_args.args
+        assert 'tickets:count:7:all' in keys
+        assert {f'tickets:count:7:{status}' for status in app_module.Ticket.STATUSES} <= set(keys)
+
+    def test_redis_outage_falls_back_to_count(self, app):
+        """Test the listing still works when Redis is down"""
+        import app as app_module
+
+        redis_client = MagicMock()
+        redis_client.get.side_effect = ConnectionError('down')
+        redis_client.setex.side_effect = ConnectionError('down')
+
+        with patch.object(app_module, 'get_redis_client', return_value=redis_client), \
+                patch.object(app_module.Ticket, 'get_by_customer', return_value=([], 4)) as get_by_customer:
+            assert app_module.get_customer_tickets(7) == ([], 4)
+
+        assert get_by_customer.call_args.kwargs['total'] is None
+
+
+class TestTicketSaveWithMessage:
+    """Test a ticket and its message are written in one transaction"""
+
+    def test_new_ticket_and_message_commit_once(self):
+        """Test both INSERTs share a connection and a single commit"""
+        import models
+        from models import Ticket, TicketMessage
+
+        cursor = MagicMock()
+        cursor.lastrowid = 12
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        ticket = Ticket(customer_id=7, subject='Help', ticket_number='TKT-000012')
+        message = TicketMessage(customer_id=7, message='Site is down')
+
+        with patch.object(models, 'get_db_connection', return_value=conn) as get_conn:
+            ticket.save_with_message(message)
+
+        get_conn.assert_called_once()
+        conn.commit.assert_called_once()
+        assert ticket.id == 12 and message.ticket_id == 12
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert 'INSERT INTO tickets' in statements[0]
+        assert 'INSERT INTO ticket_messages' in statements[1]
+
+    def test_failed_message_rolls_back_ticket(self):
+        """Test a failing message INSERT leaves no ticket behind"""
+        import models
+        from models import Ticket, TicketMessage
+
+        cursor = MagicMock()
+        cursor.execute.side_effect = [None, RuntimeError('insert failed')]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        with patch.object(models, 'get_db_connection', return_value=conn):
+            with pytest.raises(RuntimeError):
+                Ticket(customer_id=7, ticket_number='TKT-000013').save_with_message(
+                    TicketMessage(customer_id=7, message='hi'))
+
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
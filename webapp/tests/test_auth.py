@@ -2,6 +2,8 @@
 Tests for authentication endpoints
 """
 
+import json
+
 import pytest
 
 
@@ -59,6 +61,109 @@ class TestSignupEndpoint:
         response = client.get('/signup/woo-starter')
         assert response.status_code in [200, 302]
 
+    def test_signup_form_checks_conflicts_in_one_query(self, app):
+        """Test email and domain uniqueness come from one combined lookup"""
+        from unittest.mock import patch
+        import app as app_module
+
+        data = {
+            'email': 'taken@example.com', 'password': 'password123',
+            'confirm_password': 'password123', 'company_name': 'Acme',
+            'domain': 'Shop.Example.com', 'platform': 'woocommerce',
+        }
+        with app.test_request_context('/signup', method='POST', data=data), \
+                patch.object(app_module.Customer, 'signup_conflicts',
+                             return_value=(True, False)) as conflicts:
+            form = app_module.SignupForm(meta={'csrf': False})
+            assert not form.validate()
+
+        conflicts.assert_called_once_with('taken@example.com', 'shop.example.com')
+        assert form.email.errors == ['This email is already registered']
+        assert form.domain.errors == []
+
+    def test_signup_form_without_domain(self, app):
+        """Test a POST missing the domain field fails validation instead of erroring"""
+        from unittest.mock import patch
+        import app as app_module
+
+        data = {
+            'email': 'new@example.com', 'password': 'password123',
+            'confirm_password': 'password123', 'company_name': 'Acme',
+            'platform': 'woocommerce',
+        }
+        with app.test_request_context('/signup', method='POST', data=data), \
+                patch.object(app_module.Customer, 'signup_conflicts',
+                             return_value=(False, False)) as conflicts:
+            form = app_module.SignupForm(meta={'csrf': False})
+            assert not form.validate()
+
+        conflicts.assert_called_once_with('new@example.com', None)
+        assert form.domain.errors
+
+    def test_unpurchasable_plan_creates_no_customer(self, client):
+        """Test a plan without a Stripe price is rejected before any writes"""
+        from unittest.mock import patch
+        import app as app_module
+        from models import PricingPlan
+
+        app_module.invalidate_port_usage_cache()
+        plan = PricingPlan(id=1, slug='woo-starter', platform='woocommerce', stripe_price_id=None)
+        data = {
+            'email': 'new@example.com', 'password': 'password123',
+            'confirm_password': 'password123', 'company_name': 'Acme',
+            'domain': 'shop.example.com', 'platform': 'woocommerce',
+        }
+        with patch.object(app_module.PricingPlan, 'get_by_slug', return_value=plan), \
+                patch.object(app_module.PortManager, 'get_port_usage', return_value={'available': 5}), \
+                patch.object(app_module.PortManager, 'get_next_available_port') as next_port, \
+                patch.object(app_module.Customer, 'signup_conflicts', return_value=(False, False)), \
+                patch.object(app_module.Customer, 'save') as save:
+            response = client.post('/signup/woo-starter', data=data)
+
+        assert response.status_code == 200
+        assert b'not available for purchase' in response.data
+        next_port.assert_not_called()
+        save.assert_not_called()
+
+    def test_signup_page_uses_cached_plan(self, client):
+        """Test viewing the signup form reads the plan from the cached lists"""
+        from unittest.mock import patch
+        import app as app_module
+        from models import PricingPlan
+
+        plan = PricingPlan(id=1, slug='woo-starter', name='Starter', platform='woocommerce')
+        with patch.object(app_module, 'get_pricing_plan_by_slug', return_value=plan) as cached, \
+                patch.object(app_module.PricingPlan, 'get_by_slug') as get_by_slug, \
+                patch.object(app_module.PortManager, 'get_port_usage', return_value={'available': 5}):
+            response = client.get('/signup/woo-starter')
+
+        assert response.status_code == 200
+        cached.assert_called_once_with('woo-starter')
+        get_by_slug.assert_not_called()
+
+    def test_port_usage_cached_between_requests(self):
+        """Test signup reuses port usage until it expires or is invalidated"""
+        import time
+        from unittest.mock import patch
+        import app as app_module
+
+        app_module.invalidate_port_usage_cache()
+        with patch.object(app_module.PortManager, 'get_port_usage',
+                          return_value={'available': 5}) as get_usage:
+            assert app_module.get_cached_port_usage() == {'available': 5}
+            assert app_module.get_cached_port_usage() == {'available': 5}
+            assert get_usage.call_count == 1
+
+            app_module.invalidate_port_usage_cache()
+            app_module.get_cached_port_usage()
+            assert get_usage.call_count == 2
+
+            with patch.object(app_module.time, 'monotonic',
+                              return_value=time.monotonic() + app_module.PORT_USAGE_CACHE_TTL + 1):
+                app_module.get_cached_port_usage()
+            assert get_usage.call_count == 3
+        app_module.invalidate_port_usage_cache()
+
 
 class TestLogoutEndpoint:
     """Test logout functionality"""
@@ -97,3 +202,290 @@ class TestPublicEndpoints:
         """Test that contact page loads"""
         response = client.get('/contact')
         assert response.status_code == 200
+
+
+class TestCustomerPasswordHashing:
+    """Test customer password verification and hash upgrades"""
+
+    def test_outdated_hash_is_upgraded_on_login(self, app):
+        """Test a pbkdf2 hash is replaced with the configured method"""
+        from unittest.mock import patch
+        from werkzeug.security import generate_password_hash
+        from models import Customer, password_needs_rehash
+
+        customer = Customer(id=5, password_hash=generate_password_hash('s3cret!', method='pbkdf2:sha256'))
+
+        with patch.object(Customer, 'update_password_hash') as update:
+            assert customer.check_password('s3cret!')
+            assert not customer.check_password('wrong')
+
+        update.assert_called_once()
+        assert not password_needs_rehash(customer.password_hash)
+
+    def test_argon2_hashes_verify_and_upgrade_legacy_rows(self, app):
+        """Test argon2 mode hashes new passwords and still verifies Werkzeug hashes"""
+        argon2 = pytest.importorskip('argon2')
+        from unittest.mock import patch
+        from werkzeug.security import generate_password_hash
+        import models
+
+        hasher = argon2.PasswordHasher(time_cost=1, memory_cost=1024, parallelism=1)
+        with patch.object(models, '_argon2_hasher', hasher):
+            new_hash = models.hash_password('s3cret!')
+            legacy_hash = generate_password_hash('s3cret!', method='pbkdf2:sha256')
+
+            assert new_hash.startswith('$argon2')
+            assert models.verify_password(new_hash, 's3cret!')
+            assert not models.verify_password(new_hash, 'wrong')
+            assert models.verify_password(legacy_hash, 's3cret!')
+            assert models.password_needs_rehash(legacy_hash)
+            assert not models.password_needs_rehash(new_hash)
+
+
+class TestRequestProfiler:
+    """Test the opt-in ?profile=1 request profiler"""
+
+    def _profiler(self):
+        from unittest.mock import MagicMock
+        profiler = MagicMock()
+        profiler.output_html.return_value = '<html>profile</html>'
+        return profiler
+
+    def test_profile_ignored_for_non_admins(self, client):
+        """Test customers and anonymous users get the normal page"""
+        from unittest.mock import patch
+        import app as app_module
+
+        profiler = self._profiler()
+        with patch.object(app_module, 'REQUEST_PROFILING', True), \
+                patch.object(app_module, 'Profiler', return_value=profiler):
+            response = client.get('/?profile=1')
+
+        assert response.status_code == 200
+        assert b'<html>profile</html>' not in response.data
+        profiler.start.assert_not_called()
+
+    def test_profile_returns_report_for_admins(self, client):
+        """Test admins get the profiler report instead of the page"""
+        from unittest.mock import patch
+        import app as app_module
+
+        with client.session_transaction() as sess:
+            sess['admin_user_id'] = 1
+
+        profiler = self._profiler()
+        with patch.object(app_module, 'REQUEST_PROFILING', True), \
+                patch.object(app_module, 'Profiler', return_value=profiler):
+            response = client.get('/?profile=1')
+
+        assert response.data == b'<html>profile</html>'
+        profiler.start.assert_called_once()
+        profiler.stop.assert_called_once()
+
+
+class TestInjectNow:
+    """Test the now template variable"""
+
+    def test_now_fixed_for_the_request(self, app):
+        """Test every render in one request sees the same timestamp"""
+        import app as app_module
+
+        with app.test_request_context('/'):
+            first = app_module.inject_now()['now']
+            assert app_module.inject_now()['now'] is first
+
+
+class TestStaticPages:
+    """Test pre-rendered marketing pages"""
+
+    @pytest.mark.parametrize('template_name', ['index.html', 'features.html', 'about.html', 'contact.html'])
+    def test_matches_full_render(self, app, template_name):
+        """Test the cached blocks produce the same HTML as a full render"""
+        from unittest.mock import patch
+        from flask import render_template
+        import app as app_module
+
+        with app.test_request_context('/'), patch.object(app_module, '_static_page_blocks', {}):
+            app.preprocess_request()
+            assert app_module.render_static_page(template_name) == render_template(template_name)
+
+    def test_blocks_rendered_once(self, app):
+        """Test the page's own blocks are reused across requests"""
+        from unittest.mock import patch
+        import app as app_module
+
+        with patch.object(app_module, '_static_page_blocks', {}) as cache, \
+                patch.dict(app.config, {'DEBUG': False}):
+            with app.test_request_context('/'):
+                app.preprocess_request()
+                app_module.render_static_page('about.html')
+            with patch.object(app.jinja_env, 'get_template', wraps=app.jinja_env.get_template) as get_template, \
+                    app.test_request_context('/'):
+                app.preprocess_request()
+                assert '<title>About Us - ShopHosting.io</title>' in app_module.render_static_page('about.html')
+            assert 'about.html' in cache
+            assert 'about.html' not in [c.args[0] for c in get_template.call_args_list]
+
+
+class TestCurrentCustomer:
+    """Test logged-in routes reuse the customer loaded by Flask-Login"""
+
+    def test_api_status_loads_customer_once(self, client):
+        """Test api_status doesn't fetch the customer row a second time"""
+        from unittest.mock import patch
+        import app as app_module
+        from models import Customer
+
+        customer = Customer(id=7, email='a@example.com', domain='shop.example.com',
+                            platform='woocommerce', status='provisioning')
+        with client.session_transaction() as sess:
+            sess['_user_id'] = '7'
+            sess['_fresh'] = True
+
+        with patch.object(app_module.Customer, 'get_by_id', return_value=customer) as get_by_id:
+            response = client.get('/api/status')
+
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'provisioning'
+        get_by_id.assert_called_once_with(7)
+
+
+class TestBackupApi:
+    """Test the backup API hands work to the backup worker queue"""
+
+    def _login(self, client):
+        from models import Customer
+        with client.session_transaction() as sess:
+            sess['_user_id'] = '7'
+            sess['_fresh'] = True
+        return Customer(id=7, email='a@example.com', domain='shop.example.com', status='active')
+
+    def test_backup_enqueues_job(self, client):
+        """Test /api/backup records a job and enqueues it instead of forking"""
+        from unittest.mock import patch, MagicMock
+        import app as app_module
+
+        customer = self._login(client)
+        queue = MagicMock()
+        with patch.object(app_module.Customer, 'get_by_id', return_value=customer), \
+                patch.object(app_module.os.path, 'exists', return_value=True), \
+                patch.object(app_module.CustomerBackupJob, 'get_active_job', return_value=None), \
+                patch.object(app_module.CustomerBackupJob, 'save') as save, \
+                patch.object(app_module, 'get_backup_queue', return_value=queue):
+            response = client.post('/api/backup')
+
+        assert response.status_code == 200
+        save.assert_called_once()
+        queue.enqueue.assert_called_once()
+        assert queue.enqueue.call_args.args[0].__name__ == 'create_backup_job'
+
+    def test_restore_all_maps_to_both(self, client):
+        """Test a full restore is queued with the worker's 'both' type"""
+        from unittest.mock import patch
+        import app as app_module
+
+        customer = self._login(client)
+        with patch.object(app_module.Customer, 'get_by_id', return_value=customer), \
+                patch.object(app_module.CustomerBackupJob, 'get_active_job', return_value=None), \
+                patch.object(app_module, 'queue_backup_job') as queue_job:
+            queue_job.return_value.id = 5
+            response = client.post('/api/backup/restore',
+                                   json={'snapshot_id': 'abcdef12', 'target': 'all'})
+
+        assert response.status_code == 200
+        queue_job.assert_called_once_with(7, 'restore', 'both', 'abcdef12')
+
+    def test_backup_rejected_while_job_active(self, client):
+        """Test a second backup isn't queued while one is running"""
+        from unittest.mock import patch, MagicMock
+        import app as app_module
+
+        customer = self._login(client)
+        with patch.object(app_module.Customer, 'get_by_id', return_value=customer), \
+                patch.object(app_module.os.path, 'exists', return_value=True), \
+                patch.object(app_module.CustomerBackupJob, 'get_active_job', return_value=MagicMock()), \
+                patch.object(app_module, 'queue_backup_job') as queue_job:
+            response = client.post('/api/backup')
+
+        assert response.status_code == 400
+        queue_job.assert_not_called()
+
+    def test_status_served_from_cache(self, client):
+        """Test cached snapshots are returned without running restic"""
+        from unittest.mock import patch, MagicMock
+        import subprocess
+        import app as app_module
+
+        customer = self._login(client)
+        queue = MagicMock()
+        queue.connection.get.return_value = b'[{"id": "abcdef12"}]'
+        with patch.object(app_module.Customer, 'get_by_id', return_value=customer), \
+                patch.dict(app_module.os.environ, {'RESTIC_REPOSITORY': 'repo', 'RESTIC_PASSWORD_FILE': 'pw'}), \
+                patch.object(app_module, 'get_backup_queue', return_value=queue), \
+                patch.object(subprocess, 'run') as run:
+            response = client.get('/api/backup/status')
+
+        assert response.get_json() == {'success': True, 'snapshots': [{'id': 'abcdef12'}]}
+        queue.connection.get.assert_called_once_with('backup:snaps:7')
+        run.assert_not_called()
+
+    def test_status_caches_restic_output(self, client):
+        """Test a cache miss runs restic once and stores the parsed list"""
+        from unittest.mock import patch, MagicMock
+        import subprocess
+        import app as app_module
+
+        customer = self._login(client)
+        queue = MagicMock()
+        queue.connection.get.return_value = None
+        result = MagicMock(returncode=0, stdout='[{"id": "abcdef1234", "time": "2026-01-01T00:00:00Z"}]')
+        with patch.object(app_module.Customer, 'get_by_id', return_value=customer), \
+                patch.dict(app_module.os.environ, {'RESTIC_REPOSITORY': 'repo', 'RESTIC_PASSWORD_FILE': 'pw'}), \
+                patch.object(app_module, 'get_backup_queue', return_value=queue), \
+                patch.object(subprocess, 'run', return_value=result) as run:
+            response = client.get('/api/backup/status')
+
+        # restic inherits the process environment instead of a per-request copy
+        assert 'env' not in run.call_args.kwargs
+        snapshots = response.get_json()['snapshots']
+        assert snapshots[0]['id'] == 'abcdef12'
+        key, ttl, value = queue.connection.setex.call_args.args
+        assert key == 'backup:snaps:7' and ttl == app_module.BACKUP_SNAPSHOTS_CACHE_TTL
+        assert json.loads(value) == snapshots
+
+    def test_daily_backups_listed_without_lock(self, app):
+        """Test snapshot listings skip restic's repository lock"""
+        from unittest.mock import patch, MagicMock
+        import subprocess
+        import app as app_module
+
+        result = MagicMock(returncode=0, stdout=json.dumps([
+            {'id': 'a', 'time': '2026-01-01', 'paths': ['/var/customers/customer-7']},
+            {'id': 'b', 'time': '2026-01-02', 'paths': ['/var/customers/customer-8']},
+        ]))
+        with patch.object(subprocess, 'run', return_value=result) as run:
+            backups = app_module.get_customer_daily_backups(7)
+
+        assert '--no-lock' in run.call_args.args[0][-1]
+        assert [b['id'] for b in backups] == ['a']
+
+    def test_backup_lists_use_own_executor(self, app):
+        """Test both restic listings run on the backups pool, not the admin stats pool"""
+        import threading
+        from unittest.mock import patch
+        import app as app_module
+        from admin import routes
+
+        threads = []
+
+        def listing(customer_id):
+            threads.append(threading.current_thread().name)
+            return [customer_id]
+
+        with patch.object(app_module, 'get_customer_manual_backups', side_effect=listing), \
+                patch.object(app_module, 'get_customer_daily_backups', side_effect=listing), \
+                patch.object(routes, '_stats_executor') as stats_executor:
+            assert app_module.list_customer_backups(7) == ([7], [7])
+
+        stats_executor.submit.assert_not_called()
+        assert all(name.startswith('backup-list') for name in threads)
@@ -27,6 +27,36 @@ class TestWebhookSignature:
         )
         assert response.status_code in [400, 401, 403]
 
+    def test_webhook_rejects_oversized_body(self, client):
+        """Test bodies over the cap are refused before signature verification"""
+        from unittest.mock import patch
+        import app as app_module
+
+        with patch.object(app_module, 'process_webhook') as process:
+            response = client.post(
+                '/webhook/stripe',
+                data=b'x' * (app_module.STRIPE_WEBHOOK_MAX_BYTES + 1),
+                headers={'Stripe-Signature': 't=1,v1=abc'}
+            )
+
+        assert response.status_code == 413
+        process.assert_not_called()
+
+    def test_webhook_passes_body_to_processor(self, client):
+        """Test normal-sized bodies still reach process_webhook unchanged"""
+        from unittest.mock import patch
+        import app as app_module
+
+        with patch.object(app_module, 'process_webhook', return_value=(True, 'ok')) as process:
+            response = client.post(
+                '/webhook/stripe',
+                data=b'{"id": "evt_1"}',
+                headers={'Stripe-Signature': 't=1,v1=abc'}
+            )
+
+        assert response.status_code == 200
+        process.assert_called_once_with(b'{"id": "evt_1"}', 't=1,v1=abc')
+
 
 class TestCheckoutSession:
     """Test Stripe checkout session handling"""
@@ -37,6 +67,19 @@ class TestCheckoutSession:
         # Should fail or redirect without plan
         assert response.status_code in [302, 400, 404]
 
+    def test_success_page_caches_session_customer(self, app, fake_redis):
+        """Test the checkout session's customer id is fetched from Stripe once"""
+        import app as app_module
+
+        checkout_session = {'client_reference_id': '42'}
+
+        with patch.object(app_module, 'get_redis_client', return_value=fake_redis), \
+                patch.object(app_module, 'get_checkout_session', return_value=checkout_session) as retrieve:
+            assert app_module.get_checkout_customer_id('cs_test_1') == '42'
+            assert app_module.get_checkout_customer_id('cs_test_1') == '42'
+
+        retrieve.assert_called_once_with('cs_test_1')
+
 
 class TestSubscriptionEvents:
     """Test subscription event handling logic"""
@@ -242,3 +285,71 @@ class TestWebhookEventTypes:
         subscription = event_data['data']['object']
         assert subscription['id'] == 'sub_123'
         assert subscription['status'] == 'active'
+
+
+class TestBillingSummary:
+    """Test the customer billing page loads in one connection"""
+
+    def _connection(self, fetchone_rows, invoice_rows):
+        """Mock connection with one dictionary cursor for every read"""
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = fetchone_rows
+        cursor.fetchall.return_value = invoice_rows
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    def test_summary_uses_one_connection(self, app):
+        """Test subscription, plan and invoices are read on one connection"""
+        import models
+        from models import Customer
+
+        conn, cursor = self._connection(
+            [{'id': 1, 'customer_id': 7, 'plan_id': 3},
+             {'id': 3, 'name': 'Starter', 'features': '{"staging": true}'}],
+            [{'id': 11, 'customer_id': 7}])
+
+        with patch.object(models, 'get_db_connection', return_value=conn) as get_conn:
+            subscription, plan, invoices, has_more = Customer(id=7, plan_id=2).get_billing_summary()
+
+        get_conn.assert_called_once()
+        conn.cursor.assert_called_once_with(dictionary=True)
+        cursor.close.assert_called_once()
+        # The subscription's plan wins over the customer's own plan_id
+        assert cursor.execute.call_args_list[1].args[1] == (3,)
+        assert subscription.plan_id == 3
+        assert plan.id == 3 and plan.name == 'Starter' and plan.has_feature('staging')
+        assert [i.id for i in invoices] == [11]
+        assert has_more is False
+
+    def test_summary_without_subscription(self, app):
+        """Test the customer's own plan is used when there is no subscription"""
+        import models
+        from models import Customer
+
+        conn, cursor = self._connection([None, {'id': 2, 'name': 'Basic'}], [])
+
+        with patch.object(models, 'get_db_connection', return_value=conn):
+            subscription, plan, invoices, has_more = Customer(id=7, plan_id=2).get_billing_summary()
+
+        assert cursor.execute.call_args_list[1].args[1] == (2,)
+        assert subscription is None
+        assert plan.id == 2
+        assert invoices == []
+
+    def test_summary_pages_invoices(self, app):
+        """Test invoices are fetched one page at a time, newest first"""
+        import models
+        from models import Customer
+
+        conn, cursor = self._connection([None], [{'id': n, 'customer_id': 7} for n in (21, 22, 23)])
+
+        with patch.object(models, 'get_db_connection', return_value=conn):
+            _, plan, invoices, has_more = Customer(id=7).get_billing_summary(invoice_page=3, invoices_per_page=2)
+
+        # No plan to look up; asks for one extra invoice to detect an older page
+        assert plan is None
+        assert cursor.execute.call_count == 2
+        assert cursor.execute.call_args.args[1] == (7, 3, 4)
+        assert [i.id for i in invoices] == [21, 22]
+        assert has_more is True
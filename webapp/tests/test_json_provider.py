@@ -0,0 +1,47 @@
+"""
+Tests for the orjson-backed JSON provider
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+from json_provider import OrjsonProvider, orjson
+
+pytestmark = pytest.mark.skipif(orjson is None, reason='orjson not installed')
+
+
+@pytest.fixture
+def json_app():
+    """Minimal app using OrjsonProvider in non-debug mode"""
+    flask_app = Flask(__name__)
+    flask_app.json = OrjsonProvider(flask_app)
+    return flask_app
+
+
+class TestOrjsonProvider:
+    """Test OrjsonProvider matches the default provider's output"""
+
+    def test_response_matches_default_provider(self, json_app):
+        """Test dates, decimals and key order match stdlib jsonify"""
+        payload = {'b': Decimal('9.99'), 'a': datetime(2024, 5, 1, 12, 30), 'c': [1, None, 'x']}
+
+        with json_app.app_context():
+            fast = jsonify(payload)
+        default_app = Flask(__name__)
+        with default_app.app_context():
+            slow = jsonify(payload)
+
+        assert fast.mimetype == 'application/json'
+        assert json.loads(fast.get_data()) == json.loads(slow.get_data())
+        assert list(json.loads(fast.get_data())) == ['a', 'b', 'c']
+
+    def test_oversized_int_falls_back_to_stdlib(self, json_app):
+        """Test values orjson rejects are still encoded"""
+        with json_app.app_context():
+            response = jsonify(value=2 ** 70)
+
+        assert json.loads(response.get_data()) == {'value': 2 ** 70}
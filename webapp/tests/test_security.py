@@ -64,3 +64,75 @@ class TestSessionSecurity:
         """Test session cookie security flags are configured"""
         assert app.config.get('SESSION_COOKIE_HTTPONLY') is True
         assert app.config.get('SESSION_COOKIE_SAMESITE') == 'Lax'
+
+    def _get_status(self, client, last_activity):
+        """Hit a logged-in endpoint with the given last_activity timestamp"""
+        from unittest.mock import patch
+        import app as app_module
+        from models import Customer
+
+        with client.session_transaction() as sess:
+            sess['_user_id'] = '7'
+            sess['_fresh'] = True
+            sess['last_activity'] = last_activity
+
+        customer = Customer(id=7, email='a@example.com', status='active')
+        with patch.object(app_module.Customer, 'get_by_id', return_value=customer):
+            return client.get('/api/status')
+
+    def test_recent_activity_not_rewritten(self, client):
+        """Test the session isn't re-saved when activity was just recorded"""
+        import time
+
+        last_activity = time.time() - 5
+        # Flask-Login settles its own session keys on the first request
+        self._get_status(client, last_activity)
+        response = self._get_status(client, last_activity)
+
+        assert response.status_code == 200
+        assert 'Set-Cookie' not in response.headers
+        with client.session_transaction() as sess:
+            assert sess['last_activity'] == last_activity
+
+    def test_stale_activity_rewritten(self, client):
+        """Test activity is refreshed once the write interval has passed"""
+        import time
+        import app as app_module
+
+        last_activity = time.time() - app_module.SESSION_ACTIVITY_WRITE_INTERVAL - 1
+        self._get_status(client, last_activity)
+
+        with client.session_transaction() as sess:
+            assert sess['last_activity'] > last_activity
+
+
+class TestRedisSessions:
+    """Test the optional Flask-Session Redis backend"""
+
+    def test_session_entries_expire(self):
+        """Test Redis session entries get a TTL even though cookies aren't permanent"""
+        pytest.importorskip('flask_session')
+        from unittest.mock import MagicMock
+        from flask import Flask, session
+        from redis import Redis
+        import app as app_module
+
+        flask_app = Flask(__name__)
+        flask_app.config['SECRET_KEY'] = 'test'
+        flask_app.config['PERMANENT_SESSION_LIFETIME'] = 86400
+        redis_client = MagicMock(spec=Redis)
+        redis_client.get.return_value = None
+        assert app_module.init_redis_sessions(flask_app, redis_client)
+
+        @flask_app.route('/')
+        def index():
+            session['customer'] = 7
+            return 'ok'
+
+        response = flask_app.test_client().get('/')
+
+        key = redis_client.set.call_args.kwargs['name']
+        assert key.startswith('session:')
+        assert redis_client.set.call_args.kwargs['ex'] == 86400
+        # Browser-session cookie: no Expires attribute
+        assert 'Expires' not in response.headers['Set-Cookie']